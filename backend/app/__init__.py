@@ -1,11 +1,12 @@
-from flask import Flask
+import hmac
+import ipaddress
+from flask import Flask, abort, request
 from flask_cors import CORS
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from authlib.integrations.flask_client import OAuth
 from app.core.config import Config
-from app.core.database import engine
-from app.models.models import Base
+from app.core.database import close_db, pool_stats
 
 bcrypt = Bcrypt()
 jwt = JWTManager()
@@ -14,7 +15,8 @@ oauth = OAuth()
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
-    CORS(app, resources={r"/api/*": {"origins": app.config["FRONTEND_URL"]}}, supports_credentials=True)
+    CORS(app, resources={r"/api/*": {"origins": app.config["FRONTEND_URL"]}}, supports_credentials=True,
+         expose_headers=["X-Next-Cursor"])
     bcrypt.init_app(app)
     jwt.init_app(app)
     oauth.init_app(app)
@@ -25,22 +27,51 @@ def create_app(config_class=Config):
         server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
         client_kwargs={'scope': 'openid email profile'}
     )
-    Base.metadata.create_all(bind=engine)
+    app.teardown_appcontext(close_db)
     from app.api.auth import auth_bp
     from app.api.users import users_bp
     from app.api.classes import classes_bp
     from app.api.lectures import lectures_bp
     from app.api.chat import chat_bp
     from app.api.action_items import action_items_bp
+    from app.api.jobs import jobs_bp
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(users_bp, url_prefix="/api/user")
     app.register_blueprint(classes_bp, url_prefix="/api/classes")
     app.register_blueprint(lectures_bp, url_prefix="/api/lectures")
     app.register_blueprint(chat_bp, url_prefix="/api/chat")
     app.register_blueprint(action_items_bp, url_prefix="/api/action_items")
+    app.register_blueprint(jobs_bp, url_prefix="/api/jobs")
 
     @app.route("/health")
     def health_check():
         return {"status": "i'm fine don't worry", "env": app.config["APP_ENV"]}
 
+    metrics_networks = [ipaddress.ip_network(network, strict=False) for network in app.config["METRICS_ALLOWED_NETWORKS"]]
+
+    def require_metrics_access():
+        # operational detail (queue depths, pool usage, pids) is not for the public; nginx refuses
+        # /metrics/ as well, so a proxied request never arrives from nginx's address
+        token = app.config["METRICS_TOKEN"]
+        header = request.headers.get("Authorization", "")
+        if token and hmac.compare_digest(header, f"Bearer {token}"):
+            return
+        try:
+            address = ipaddress.ip_address(request.remote_addr or "")
+        except ValueError:
+            abort(404)
+        if not any(address in network for network in metrics_networks):
+            abort(404)
+
+    @app.route("/metrics/clova")
+    def clova_metrics():
+        require_metrics_access()
+        from app.services.scheduler import scheduler
+        return scheduler.stats()
+
+    @app.route("/metrics/db")
+    def db_metrics():
+        require_metrics_access()
+        return pool_stats()
+
     return app
\ No newline at end of file
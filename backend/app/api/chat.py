@@ -1,13 +1,63 @@
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, request, jsonify, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, get_db, get_read_db
+from app.core.pagination import decode_cursor, encode_cursor, json_page, keyset_page, page_limit
 from app.core.config import Config
 from app.models.models import GeneralChatSession, GeneralMessage, SocraticChatSession, SocraticMessage, Lecture
-from app.services.ai_client import AIService
-from app.schemas.schemas import GeneralChatSession as GeneralSchema, SocraticChatSession as SocraticSchema
+from app.services.ai_client import AIService, DeltaAssembler
+from app.services.chat_context import build_chat_history, current_context, load_context, record_turn, save_turn
+from app.services.context_cache import context_cache
+from app.services.retrieval import retrieve_passages
+from app.schemas.schemas import (
+    GeneralChatSession as GeneralSchema, GeneralChatSessionListItem as GeneralListSchema,
+    SocraticChatSession as SocraticSchema, SocraticChatSessionListItem as SocraticListSchema
+)
 
 chat_bp = Blueprint('chat', __name__)
 
+def wants_stream(data):
+    return bool(data.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def stream_reply(mode, session_id, user_msg, history):
+    def generate():
+        assembler = DeltaAssembler()
+        yield sse_event("session", {"session_id": session_id})
+        try:
+            for delta in AIService.stream_chat_response(history, assembler):
+                yield sse_event("delta", {"content": delta})
+        except Exception as e:
+            print(f"Stream Error: {e}")
+            yield sse_event("error", {"detail": "AI response failed."})
+        finally:
+            # runs on normal completion and when the client disconnects mid-stream
+            ai_text = assembler.text().strip()
+            if ai_text:
+                db = SessionLocal()
+                try:
+                    save_turn(db, mode, session_id, user_msg, ai_text)
+                    db.commit()
+                    record_turn(mode, session_id, user_msg, ai_text)
+                finally:
+                    db.close()
+        yield sse_event("done", {"response": ai_text, "session_id": session_id})
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+def socratic_system_content(db, lecture_id):
+    system_content = Config.SOCRATIC_PROMPT
+    if lecture_id:
+        lecture = db.query(Lecture).filter_by(id=lecture_id).first()
+        if lecture and lecture.summary:
+            system_content += f"\n\n[CONTEXT FROM LECTURE]\n{lecture.summary}\n\nStart by asking a question about this."
+    return system_content
+
 @chat_bp.route("/general", methods=["POST"])
 @jwt_required()
 def chat_general():
@@ -16,35 +66,31 @@ def chat_general():
     session_id = data.get('session_id')
     user_msg = data.get('message')
 
-    db = SessionLocal()
-    try:
-        if not session_id:
-            session = GeneralChatSession(user_id=user_id, title="General Chat")
-            db.add(session)
-            db.flush()
-            session_id = session.id
-        else:
+    db = get_db()
+    if not session_id:
+        session = GeneralChatSession(user_id=user_id, title="General Chat")
+        db.add(session)
+        db.flush()
+        session_id = session.id
+        context = load_context(db, "GENERAL", session, Config.GENERAL_PROMPT)
+    else:
+        context, version = current_context(db, "GENERAL", session_id, user_id)
+        if version is None: return jsonify({"detail": "Session not found"}), 404
+        if not context:
             session = db.query(GeneralChatSession).filter_by(id=session_id, user_id=user_id).first()
-            if not session: return jsonify({"detail": "Session not found"}), 404
-
-        history = [{"role": "system", "content": Config.GENERAL_PROMPT}]
-
-        msgs = db.query(GeneralMessage).filter_by(session_id=session_id)\
-            .order_by(GeneralMessage.created_at.desc()).limit(10).all()
-        msgs.reverse()
-        
-        for m in msgs:
-            history.append({"role": m.role, "content": m.content})
+            context = load_context(db, "GENERAL", session, Config.GENERAL_PROMPT, version)
 
-        history.append({"role": "user", "content": user_msg})
-        ai_text = AIService.get_socratic_response(history)
-        db.add(GeneralMessage(session_id=session_id, role="user", content=user_msg))
-        db.add(GeneralMessage(session_id=session_id, role="assistant", content=ai_text))
+    history = build_chat_history(db, "GENERAL", context, user_msg)
+    if wants_stream(data):
         db.commit()
+        return stream_reply("GENERAL", session_id, user_msg, history)
+
+    ai_text = AIService.get_socratic_response(history)
+    save_turn(db, "GENERAL", session_id, user_msg, ai_text)
+    db.commit()
+    record_turn("GENERAL", session_id, user_msg, ai_text)
 
-        return jsonify({"response": ai_text, "session_id": session_id})
-    finally:
-        db.close()
+    return jsonify({"response": ai_text, "session_id": session_id})
 
 @chat_bp.route("/socratic", methods=["POST"])
 @jwt_required()
@@ -55,83 +101,87 @@ def chat_socratic():
     user_msg = data.get('message')
     lecture_id = data.get('lecture_id')
 
-    db = SessionLocal()
-    try:
-        if not session_id:
-            if not lecture_id:
-                return jsonify({"detail": "Lecture ID required for new Socratic session"}), 400
+    db = get_db()
+    if not session_id:
+        if not lecture_id:
+            return jsonify({"detail": "Lecture ID required for new Socratic session"}), 400
                 
-            session = SocraticChatSession(user_id=user_id, lecture_id=lecture_id)
-            db.add(session)
-            db.flush()
-            session_id = session.id
-        else:
+        session = SocraticChatSession(user_id=user_id, lecture_id=lecture_id)
+        db.add(session)
+        db.flush()
+        session_id = session.id
+        context = load_context(db, "SOCRATIC", session, socratic_system_content(db, lecture_id))
+    else:
+        context, version = current_context(db, "SOCRATIC", session_id, user_id)
+        if version is None: return jsonify({"detail": "Session not found"}), 404
+        if not context:
             session = db.query(SocraticChatSession).filter_by(id=session_id, user_id=user_id).first()
-            if not session: return jsonify({"detail": "Session not found"}), 404
-        
-        system_content = Config.SOCRATIC_PROMPT
-        if session.lecture_id:
-            lecture = db.query(Lecture).filter_by(id=session.lecture_id).first()
-            if lecture and lecture.summary:
-                system_content += f"\n\n[CONTEXT FROM LECTURE]\n{lecture.summary}\n\nStart by asking a question about this."
-
-        history = [{"role": "system", "content": system_content}]
-        msgs = db.query(SocraticMessage).filter_by(session_id=session_id)\
-            .order_by(SocraticMessage.created_at.desc()).limit(10).all()
-        msgs.reverse()
-        
-        for m in msgs:
-            history.append({"role": m.role, "content": m.content})
+            context = load_context(db, "SOCRATIC", session, socratic_system_content(db, session.lecture_id), version)
 
-        history.append({"role": "user", "content": user_msg})
-        ai_text = AIService.get_socratic_response(history)
-        db.add(SocraticMessage(session_id=session_id, role="user", content=user_msg))
-        db.add(SocraticMessage(session_id=session_id, role="assistant", content=ai_text))
+    passages = retrieve_passages(db, context.lecture_id, user_msg) if context.lecture_id else []
+    history = build_chat_history(db, "SOCRATIC", context, user_msg, passages)
+    if wants_stream(data):
         db.commit()
+        return stream_reply("SOCRATIC", session_id, user_msg, history)
+
+    ai_text = AIService.get_socratic_response(history)
+    save_turn(db, "SOCRATIC", session_id, user_msg, ai_text)
+    db.commit()
+    record_turn("SOCRATIC", session_id, user_msg, ai_text)
 
-        return jsonify({"response": ai_text, "session_id": session_id})
-    finally:
-        db.close()
+    return jsonify({"response": ai_text, "session_id": session_id})
 
 @chat_bp.route("/sessions", methods=["GET"])
 @jwt_required()
 def get_sessions():
     user_id = get_jwt_identity()
     mode = request.args.get('mode', 'GENERAL').upper()
-    
-    db = SessionLocal()
+    session_model, schema = (SocraticChatSession, SocraticListSchema) if mode == 'SOCRATIC' \
+        else (GeneralChatSession, GeneralListSchema)
+
     try:
-        if mode == 'SOCRATIC':
-            sessions = db.query(SocraticChatSession).filter_by(user_id=user_id)\
-                .order_by(SocraticChatSession.created_at.desc()).all()
-            return jsonify([SocraticSchema.model_validate(s).model_dump() for s in sessions]), 200
-        else:
-            sessions = db.query(GeneralChatSession).filter_by(user_id=user_id)\
-                .order_by(GeneralChatSession.created_at.desc()).all()
-            return jsonify([GeneralSchema.model_validate(s).model_dump() for s in sessions]), 200
-    finally:
-        db.close()
+        limit = page_limit(request.args.get('limit'))
+        after = decode_cursor(request.args.get('cursor'))
+        db = get_read_db()
+        sessions, next_position = keyset_page(
+            db.query(session_model).filter_by(user_id=user_id),
+            session_model, after, limit
+        )
+    except ValueError as e:
+        return jsonify({"detail": str(e)}), 400
+    return json_page((schema.model_validate(s).model_dump() for s in sessions), next_position), 200
 
 @chat_bp.route("/sessions/<string:session_id>", methods=["GET"])
 @jwt_required()
 def get_session_history(session_id):
+    # the newest page of messages first, in chronological order; X-Next-Cursor fetches the page before it
     user_id = get_jwt_identity()
     mode = request.args.get('mode', 'GENERAL').upper()
-    
-    db = SessionLocal()
+    session_model, message_model, schema = (SocraticChatSession, SocraticMessage, SocraticSchema) if mode == 'SOCRATIC' \
+        else (GeneralChatSession, GeneralMessage, GeneralSchema)
+
     try:
-        if mode == 'SOCRATIC':
-            session = db.query(SocraticChatSession).filter_by(id=session_id, user_id=user_id).first()
-            if not session: return jsonify({"detail": "Session not found"}), 404
-            
-            return jsonify(SocraticSchema.model_validate(session).model_dump()), 200
-        else:
-            session = db.query(GeneralChatSession).filter_by(id=session_id, user_id=user_id).first()
-            if not session: return jsonify({"detail": "Session not found"}), 404
-            
-            return jsonify(GeneralSchema.model_validate(session).model_dump()), 200
-    finally:
-        db.close()
+        limit = page_limit(request.args.get('limit'))
+        after = decode_cursor(request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"detail": str(e)}), 400
+
+    db = get_db()
+    session = db.query(session_model).filter_by(id=session_id, user_id=user_id).first()
+    if not session: return jsonify({"detail": "Session not found"}), 404
+
+    try:
+        messages, next_position = keyset_page(
+            db.query(message_model).filter_by(session_id=session_id), message_model, after, limit,
+            order=message_model.seq
+        )
+    except ValueError as e:
+        return jsonify({"detail": str(e)}), 400
+    fields = {name: getattr(session, name) for name in schema.model_fields if name != "messages"}
+    response = jsonify(schema.model_validate({**fields, "messages": messages[::-1]}).model_dump())
+    if next_position:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_position)
+    return response, 200
 
 @chat_bp.route("/sessions/<string:session_id>", methods=["PATCH"])
 @jwt_required()
@@ -144,23 +194,20 @@ def rename_session(session_id):
     if not new_title:
         return jsonify({"detail": "Title is required"}), 400
 
-    db = SessionLocal()
-    try:
-        if mode == 'SOCRATIC':
-            session = db.query(SocraticChatSession).filter_by(id=session_id, user_id=user_id).first()
-        else:
-            session = db.query(GeneralChatSession).filter_by(id=session_id, user_id=user_id).first()
+    db = get_db()
+    if mode == 'SOCRATIC':
+        session = db.query(SocraticChatSession).filter_by(id=session_id, user_id=user_id).first()
+    else:
+        session = db.query(GeneralChatSession).filter_by(id=session_id, user_id=user_id).first()
             
-        if not session:
-            return jsonify({"detail": "Session not found"}), 404
+    if not session:
+        return jsonify({"detail": "Session not found"}), 404
             
-        session.title = new_title
-        db.commit()
-        db.refresh(session)
+    session.title = new_title
+    db.commit()
+    db.refresh(session)
         
-        return jsonify({"id": session.id, "title": session.title}), 200
-    finally:
-        db.close()
+    return jsonify({"id": session.id, "title": session.title}), 200
 
 @chat_bp.route("/sessions/<string:session_id>", methods=["DELETE"])
 @jwt_required()
@@ -168,18 +215,16 @@ def delete_session(session_id):
     user_id = get_jwt_identity()
     mode = request.args.get('mode', 'GENERAL').upper()
     
-    db = SessionLocal()
-    try:
-        if mode == 'SOCRATIC':
-            session = db.query(SocraticChatSession).filter_by(id=session_id, user_id=user_id).first()
-        else:
-            session = db.query(GeneralChatSession).filter_by(id=session_id, user_id=user_id).first()
+    db = get_db()
+    if mode == 'SOCRATIC':
+        session = db.query(SocraticChatSession).filter_by(id=session_id, user_id=user_id).first()
+    else:
+        session = db.query(GeneralChatSession).filter_by(id=session_id, user_id=user_id).first()
             
-        if not session:
-            return jsonify({"detail": "Session not found"}), 404
+    if not session:
+        return jsonify({"detail": "Session not found"}), 404
             
-        db.delete(session)
-        db.commit()
-        return jsonify({"message": "Session deleted"}), 200
-    finally:
-        db.close()
\ No newline at end of file
+    db.delete(session)
+    db.commit()
+    context_cache.invalidate(mode, session_id)
+    return jsonify({"message": "Session deleted"}), 200
\ No newline at end of file
@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy.orm import joinedload
-from app.core.database import SessionLocal
-from app.models.models import Class as ClassModel, Lecture, ExternalNote
-from app.schemas.schemas import Class as ClassSchema, ClassCreate
+from sqlalchemy.orm import selectinload
+from app.core.database import get_db, get_read_db
+from app.core.fields import parse_fields, project
+from app.core.pagination import decode_cursor, json_page, keyset_page, page_limit
+from app.models.models import Class as ClassModel, Lecture, ExternalNote, ActionItem, NotebookPage
+from app.schemas.schemas import Class as ClassSchema, ClassCreate, ClassListItem as ClassListSchema
+from app.services.context_cache import context_cache
 
 classes_bp = Blueprint('classes', __name__)
 
@@ -16,32 +19,50 @@ def create_class():
     except Exception as e:
         return jsonify({"detail": str(e)}), 422
 
-    db = SessionLocal()
-    try:
-        new_class = ClassModel(title=data.title, user_id=current_user_id)
-        db.add(new_class)
-        db.commit()
-        db.refresh(new_class)
-        return jsonify(ClassSchema.model_validate(new_class).model_dump()), 201
-    finally:
-        db.close()
+    db = get_db()
+    new_class = ClassModel(title=data.title, user_id=current_user_id)
+    db.add(new_class)
+    db.commit()
+    db.refresh(new_class)
+    return jsonify(ClassSchema.model_validate(new_class).model_dump()), 201
+
+def class_loader(schema) -> list:
+    # eager-load only what the schema will serialize; list items need just a few lecture columns
+    options = []
+    if "external_notes" in schema.model_fields:
+        options.append(selectinload(ClassModel.external_notes))
+    if "lectures" in schema.model_fields:
+        if schema is ClassListSchema:
+            options.append(selectinload(ClassModel.lectures).load_only(
+                Lecture.id, Lecture.title, Lecture.class_id, Lecture.status, Lecture.created_at))
+        else:
+            options += [
+                selectinload(ClassModel.lectures).undefer_group("content"),
+                selectinload(ClassModel.lectures).selectinload(Lecture.action_items)
+                .selectinload(ActionItem.notebook_page).undefer(NotebookPage.content),
+                selectinload(ClassModel.lectures).selectinload(Lecture.external_notes),
+            ]
+    return options
 
 @classes_bp.route("", methods=["GET"])
 @jwt_required()
 def get_classes():
+    # lectures come as list items unless ?fields= asks for the full ones (e.g. fields=title,lectures)
     current_user_id = get_jwt_identity()
-    db = SessionLocal()
     try:
-        classes = db.query(ClassModel).filter(
-            ClassModel.user_id == current_user_id
-        ).options(
-            joinedload(ClassModel.lectures),
-            joinedload(ClassModel.external_notes)
-        ).order_by(ClassModel.created_at.desc()).all()
-        
-        return jsonify([ClassSchema.model_validate(c).model_dump() for c in classes]), 200
-    finally:
-        db.close()
+        fields = parse_fields(request.args.get('fields'), ClassSchema)
+        schema = project(ClassSchema, fields) if fields else ClassListSchema
+        limit = page_limit(request.args.get('limit'))
+        after = decode_cursor(request.args.get('cursor'))
+        db = get_read_db()
+        classes, next_position = keyset_page(
+            db.query(ClassModel).filter(ClassModel.user_id == current_user_id).options(*class_loader(schema)),
+            ClassModel, after, limit
+        )
+    except ValueError as e:
+        return jsonify({"detail": str(e)}), 400
+
+    return json_page((schema.model_validate(c).model_dump() for c in classes), next_position), 200
 
 @classes_bp.route("/<string:class_id>", methods=["PUT"])
 @jwt_required()
@@ -52,31 +73,28 @@ def update_class(class_id):
     except Exception as e:
         return jsonify({"detail": str(e)}), 422
 
-    db = SessionLocal()
-    try:
-        db_class = db.query(ClassModel).filter_by(id=class_id, user_id=current_user_id).first()
-        if not db_class:
-            return jsonify({"detail": "Class not found."}), 404
+    db = get_db()
+    db_class = db.query(ClassModel).filter_by(id=class_id, user_id=current_user_id).first()
+    if not db_class:
+        return jsonify({"detail": "Class not found."}), 404
         
-        db_class.title = data.title
-        db.commit()
-        db.refresh(db_class)
-        return jsonify(ClassSchema.model_validate(db_class).model_dump()), 200
-    finally:
-        db.close()
+    db_class.title = data.title
+    db.commit()
+    db.refresh(db_class)
+    return jsonify(ClassSchema.model_validate(db_class).model_dump()), 200
 
 @classes_bp.route("/<string:class_id>", methods=["DELETE"])
 @jwt_required()
 def delete_class(class_id):
     current_user_id = get_jwt_identity()
-    db = SessionLocal()
-    try:
-        db_class = db.query(ClassModel).filter_by(id=class_id, user_id=current_user_id).first()
-        if not db_class:
-            return jsonify({"detail": "Class not found."}), 404
+    db = get_db()
+    db_class = db.query(ClassModel).filter_by(id=class_id, user_id=current_user_id).first()
+    if not db_class:
+        return jsonify({"detail": "Class not found."}), 404
         
-        db.delete(db_class)
-        db.commit()
-        return jsonify({"message": "Class deleted."}), 200
-    finally:
-        db.close()
\ No newline at end of file
+    lecture_ids = [lecture.id for lecture in db_class.lectures]
+    db.delete(db_class)
+    db.commit()
+    for lecture_id in lecture_ids:
+        context_cache.invalidate_lecture(lecture_id)
+    return jsonify({"message": "Class deleted."}), 200
\ No newline at end of file
@@ -0,0 +1,34 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.core.database import get_db
+from app.models.models import Job as JobModel
+from app.schemas.schemas import Job as JobSchema
+from app.services.jobs import JobQueue
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route("/<string:job_id>", methods=["GET"])
+@jwt_required()
+def get_job(job_id):
+    current_user_id = get_jwt_identity()
+    db = get_db()
+    job = db.query(JobModel).filter_by(id=job_id, user_id=current_user_id).first()
+    if not job:
+        return jsonify({"detail": "Job not found"}), 404
+    return jsonify(JobSchema.model_validate(job).model_dump()), 200
+
+@jobs_bp.route("/<string:job_id>/retry", methods=["POST"])
+@jwt_required()
+def retry_job(job_id):
+    current_user_id = get_jwt_identity()
+    db = get_db()
+    job = db.query(JobModel).filter_by(id=job_id, user_id=current_user_id).first()
+    if not job:
+        return jsonify({"detail": "Job not found"}), 404
+    if job.status != "DEAD":
+        return jsonify({"detail": "Only dead jobs can be retried"}), 409
+
+    if not JobQueue.requeue(db, job):
+        return jsonify({"detail": "Job was already put back on the queue"}), 409
+    db.refresh(job)
+    return jsonify(JobSchema.model_validate(job).model_dump()), 202
@@ -1,57 +1,276 @@
+import hashlib
+import json
+import time
+from botocore.exceptions import ClientError
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.core.database import SessionLocal
-from app.models.models import Lecture as LectureModel, Class as ClassModel, ActionItem as ActionItemModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload, undefer_group
+from app.core.config import Config
+from app.core.database import get_db, get_read_db
+from app.core.signing import sign, verify
+from app.core.form_stream import read_streaming_form, FormStreamError
+from app.core.fields import parse_fields, project
+from app.core.pagination import decode_cursor, json_page, page_limit
+from app.models.models import Lecture as LectureModel, Class as ClassModel, ActionItem as ActionItemModel, NotebookPage, TranscriptionSegment, UploadClaim
 from app.schemas.schemas import Lecture as LectureSchema, ActionItem as ActionItemSchema
-from app.services.storage import StorageService
+from app.services.storage import get_storage, new_object_key
 from app.services.ai_client import AIService
-from dateutil.parser import parse as date_parse
+from app.services.analysis_cache import AnalysisCache
+from app.services.context_cache import context_cache
+from app.services.retrieval import index_lecture
+from app.services.search import search_library
+from app.services.media import hashed_chunks, claim_media, find_media
+from app.services.transcription import (
+    SEGMENT_TRANSCRIPTION_JOB, complete_transcription, fail_transcription, fail_transcriptions, handle_result
+)
+from app.services.timeline import get_timeline, timeline_cache
+from app.services.jobs import JobQueue
+from app.services.lecture_analysis import run_lecture_analysis, analysis_dedupe_key
 
 lectures_bp = Blueprint('lectures', __name__)
 
+def create_audio_lecture(db, class_id, object_key, title, language, segmented):
+    # long WAV recordings are transcribed as overlapping segments in parallel
+    segmented = segmented and object_key.endswith('.wav')
+    lecture = LectureModel(
+        title=title, 
+        transcript="", 
+        summary=None,
+        status="PROCESSING", 
+        object_key=object_key,
+        class_id=class_id
+    )
+    
+    db.add(lecture)
+    db.flush()
+    # only the title until the transcript arrives, so the lecture is searchable right away
+    index_lecture(db, lecture)
+    if segmented:
+        # downloading, splitting and uploading a long recording takes minutes, so worker.py does it
+        JobQueue.enqueue(db, SEGMENT_TRANSCRIPTION_JOB, {"lecture_id": lecture.id, "language": language},
+                         max_attempts=1, dedupe_key=f"{SEGMENT_TRANSCRIPTION_JOB}:{lecture.id}")
+    db.commit()
+    db.refresh(lecture)
+    if segmented:
+        return lecture
+
+    # the row has to exist before the trigger, or a fast callback finds nothing to complete
+    try:
+        AIService.transcribe_audio(object_key, language)
+    except Exception:
+        db.delete(lecture)
+        db.commit()
+        # duplicates attached meanwhile must not wait on a transcription that never started
+        fail_transcriptions(db, [object_key])
+        raise
+    return lecture
+
+def attach_media_lecture(db, class_id, media, title):
+    # a re-upload of known media reuses its object and transcript instead of a new Clova job
+    lecture = LectureModel(
+        title=title,
+        transcript="",
+        summary=None,
+        status="PROCESSING",
+        object_key=media.object_key,
+        class_id=class_id
+    )
+    db.add(lecture)
+    db.flush()
+    index_lecture(db, lecture)
+    db.commit()
+
+    # committed first and then read under the media row lock: a transcription finishing in between
+    # either sees this lecture or has already committed its result here, so it can't be missed
+    media = find_media(db, media.content_hash, media.language, for_update=True)
+    if media.status == "COMPLETED":
+        complete_transcription(db, media.object_key, media.transcript or "", json.loads(media.result) if media.result else None)
+    elif media.status == "FAILED":
+        fail_transcription(db, media.object_key)
+    else:
+        db.commit()
+    db.refresh(lecture)
+    return lecture
+
+def upload_claim(user_id, class_id, object_key, upload_id, expires_at):
+    # prefixed so an upload token is never the signature of a bare object key, which is what
+    # transcription callbacks carry, and vice versa
+    return f"upload|{user_id}|{class_id}|{object_key}|{upload_id or ''}|{expires_at}"
+
+def wants_segmented(value):
+    return str(value if value is not None else Config.TRANSCRIPTION_SEGMENTED).lower() in ('1', 'true', 'yes')
+
 @lectures_bp.route("/upload-audio", methods=["POST"])
 @jwt_required()
 def upload_audio_lecture():
     current_user_id = get_jwt_identity()
-    
-    if 'media' not in request.files or 'class_id' not in request.form:
-        return jsonify({"detail": "Missing file or class_id"}), 400
-        
-    file = request.files['media']
-    class_id = request.form['class_id']
-    language = request.form.get('language', 'ko-KR')
-    title = request.form.get('title', file.filename)
+    storage = get_storage()
+    db = get_db()
+
+    def owns_class(class_id):
+        return db.query(ClassModel).filter_by(id=class_id, user_id=current_user_id).first() is not None
+
+    def store_media(filename, content_type, chunks, fields):
+        # class_id usually precedes the file in the form, so most bad requests stop before uploading
+        if 'class_id' in fields and not owns_class(fields['class_id']):
+            raise PermissionError("Class not found or unauthorized")
+        object_key, content_type = new_object_key(filename or "")
+        digest = hashlib.sha256()
+        size = storage.upload_stream(hashed_chunks(chunks, digest), object_key, content_type)
+        return object_key, filename, digest.hexdigest(), size
 
-    db = SessionLocal()
     try:
-        if not db.query(ClassModel).filter_by(id=class_id, user_id=current_user_id).first():
+        try:
+            form, media = read_streaming_form(request, 'media', store_media)
+        except FormStreamError as e:
+            return jsonify({"detail": str(e)}), 400
+        except PermissionError as e:
+            return jsonify({"detail": str(e)}), 403
+
+        if media is None or 'class_id' not in form:
+            if media:
+                storage.delete_file(media[0])
+            return jsonify({"detail": "Missing file or class_id"}), 400
+
+        object_key, filename, content_hash, size = media
+        class_id = form['class_id']
+        if not owns_class(class_id):
+            storage.delete_file(object_key)
             return jsonify({"detail": "Class not found or unauthorized"}), 403
 
-        storage = StorageService()
-        object_key = storage.upload_file(file, file.filename)
+        language = form.get('language', 'ko-KR')
+        title = form.get('title', filename)
+        segmented = wants_segmented(form.get('segmented'))
 
-        AIService.transcribe_audio(object_key, language)
+        known = claim_media(db, content_hash, language, object_key, size)
+        if known.object_key != object_key:
+            storage.delete_file(object_key)
+            lecture = attach_media_lecture(db, class_id, known, title)
+            status_code = 201 if lecture.status == "COMPLETED" else 202
+            return jsonify(LectureSchema.model_validate(lecture).model_dump()), status_code
 
-        lecture = LectureModel(
-            title=title, 
-            transcript="", 
-            summary=None,
-            status="PROCESSING", 
-            object_key=object_key,
-            class_id=class_id
-        )
-        
-        db.add(lecture)
+        lecture = create_audio_lecture(db, class_id, object_key, title, language, segmented)
+        return jsonify(LectureSchema.model_validate(lecture).model_dump()), 202
+
+    except Exception as e:
+        db.rollback()
+        return jsonify({"detail": str(e)}), 500
+
+@lectures_bp.route("/upload-url", methods=["POST"])
+@jwt_required()
+def create_upload_url():
+    current_user_id = get_jwt_identity()
+    data = request.json or {}
+    filename = data.get('filename') or ""
+    try:
+        size = int(data.get('size') or 0)
+    except (TypeError, ValueError):
+        return jsonify({"detail": "size must be an integer"}), 400
+    if 'class_id' not in data or size <= 0:
+        return jsonify({"detail": "Missing class_id or size"}), 400
+
+    storage = get_storage()
+    if not storage.supports_presigned_uploads:
+        return jsonify({"detail": "Direct uploads need object storage; use /upload-audio instead"}), 501
+
+    db = get_db()
+    if not db.query(ClassModel).filter_by(id=data['class_id'], user_id=current_user_id).first():
+        return jsonify({"detail": "Class not found or unauthorized"}), 403
+
+    # the key is chosen here, never by the client, so uploads can only land under audio-storage/
+    object_key, content_type = new_object_key(filename)
+    expires = Config.UPLOAD_URL_EXPIRES
+    part_size = max(Config.UPLOAD_PART_SIZE, -(-size // 10000))
+    part_count = -(-size // part_size)
+
+    upload_id = None
+    if part_count <= 1:
+        urls = [{"part_number": None, "url": storage.presign_put(object_key, content_type, expires)}]
+    else:
+        upload_id = storage.start_multipart(object_key, content_type)
+        urls = [
+            {"part_number": number, "url": storage.presign_part(object_key, upload_id, number, expires)}
+            for number in range(1, part_count + 1)
+        ]
+
+    expires_at = int(time.time()) + expires
+    return jsonify({
+        "object_key": object_key,
+        "upload_id": upload_id,
+        "content_type": content_type,
+        "part_size": part_size,
+        "urls": urls,
+        "expires_at": expires_at,
+        "upload_token": sign(upload_claim(current_user_id, data['class_id'], object_key, upload_id, expires_at)),
+    }), 201
+
+@lectures_bp.route("/upload-complete", methods=["POST"])
+@jwt_required()
+def complete_upload():
+    current_user_id = get_jwt_identity()
+    data = request.json or {}
+    object_key = data.get('object_key')
+    class_id = data.get('class_id')
+    upload_id = data.get('upload_id')
+    expires_at = data.get('expires_at')
+
+    claim = upload_claim(current_user_id, class_id, object_key, upload_id, expires_at)
+    if not object_key or not verify(claim, data.get('upload_token')):
+        return jsonify({"detail": "Invalid upload token"}), 403
+    if int(expires_at) < time.time():
+        return jsonify({"detail": "Upload token expired"}), 403
+
+    storage = get_storage()
+    db = get_db()
+
+    def release_claim():
+        # the upload can be completed again, e.g. with the right part list
+        db.rollback()
+        db.query(UploadClaim).filter_by(object_key=object_key).delete(synchronize_session=False)
         db.commit()
-        db.refresh(lecture)
 
+    try:
+        if not db.query(ClassModel).filter_by(id=class_id, user_id=current_user_id).first():
+            return jsonify({"detail": "Class not found or unauthorized"}), 403
+        # claimed before anything touches the upload: of two concurrent completions only one inserts
+        # the row, so only one lecture and one Clova job come out of an object
+        db.add(UploadClaim(object_key=object_key))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return jsonify({"detail": "Upload already completed"}), 409
+        if db.query(LectureModel.id).filter_by(object_key=object_key).first():
+            return jsonify({"detail": "Upload already completed"}), 409
+    except Exception as e:
+        db.rollback()
+        return jsonify({"detail": str(e)}), 500
+
+    try:
+        if upload_id:
+            parts = [{"PartNumber": int(p['part_number']), "ETag": p['etag']} for p in data.get('parts') or []]
+            if not parts:
+                release_claim()
+                return jsonify({"detail": "Missing parts"}), 400
+            try:
+                storage.complete_multipart(object_key, upload_id, sorted(parts, key=lambda p: p["PartNumber"]))
+            except ClientError as e:
+                release_claim()
+                return jsonify({"detail": f"Could not complete upload: {e}"}), 400
+
+        if not storage.object_size(object_key):
+            release_claim()
+            return jsonify({"detail": "Uploaded object not found"}), 400
+
+        title = data.get('title') or data.get('filename') or object_key.rsplit('/', 1)[-1]
+        lecture = create_audio_lecture(db, class_id, object_key, title,
+                                       data.get('language', 'ko-KR'), wants_segmented(data.get('segmented')))
         return jsonify(LectureSchema.model_validate(lecture).model_dump()), 202
 
     except Exception as e:
-        db.rollback()
+        release_claim()
         return jsonify({"detail": str(e)}), 500
-    finally:
-        db.close()
 
 @lectures_bp.route("/upload-text", methods=["POST"])
 @jwt_required()
@@ -70,180 +289,218 @@ def upload_text_lecture():
     except Exception:
         return jsonify({"detail": "Invalid text file encoding. Please use UTF-8."}), 400
 
-    db = SessionLocal()
-    try:
-        if not db.query(ClassModel).filter_by(id=class_id, user_id=current_user_id).first():
-            return jsonify({"detail": "Class not found or unauthorized"}), 403
+    db = get_db()
+    if not db.query(ClassModel).filter_by(id=class_id, user_id=current_user_id).first():
+        return jsonify({"detail": "Class not found or unauthorized"}), 403
 
-        lecture = LectureModel(
-            title=title,
-            transcript=content,
-            summary=None,
-            status="COMPLETED",
-            class_id=class_id
-        )
+    lecture = LectureModel(
+        title=title,
+        transcript=content,
+        summary=None,
+        status="COMPLETED",
+        class_id=class_id
+    )
         
-        db.add(lecture)
-        db.commit()
-        db.refresh(lecture)
+    db.add(lecture)
+    db.flush()
+    index_lecture(db, lecture)
+    db.commit()
+    db.refresh(lecture)
         
-        return jsonify(LectureSchema.model_validate(lecture).model_dump()), 201
-    finally:
-        db.close()
+    return jsonify(LectureSchema.model_validate(lecture).model_dump()), 201
 
 @lectures_bp.route("/<string:lecture_id>", methods=["GET"])
 @jwt_required()
 def get_lecture(lecture_id):
     current_user_id = get_jwt_identity()
-    db = SessionLocal()
     try:
-        lecture = db.query(LectureModel).filter(LectureModel.id == lecture_id)\
-            .join(ClassModel).filter(ClassModel.user_id == current_user_id).first()
+        fields = parse_fields(request.args.get('fields'), LectureSchema)
+    except ValueError as e:
+        return jsonify({"detail": str(e)}), 400
+    schema = project(LectureSchema, fields) if fields else LectureSchema
+
+    db = get_db()
+    query = db.query(LectureModel).filter(LectureModel.id == lecture_id)\
+        .join(ClassModel).filter(ClassModel.user_id == current_user_id)
+    if fields is None or fields & {"transcript", "summary"}:
+        query = query.options(undefer_group("content"))
+    if fields is None or "action_items" in fields:
+        query = query.options(selectinload(LectureModel.action_items).selectinload(ActionItemModel.notebook_page)
+                              .undefer(NotebookPage.content))
+    lecture = query.first()
             
-        if not lecture:
-            return jsonify({"detail": "Lecture not found"}), 404
+    if not lecture:
+        return jsonify({"detail": "Lecture not found"}), 404
             
-        return jsonify(LectureSchema.model_validate(lecture).model_dump()), 200
-    finally:
-        db.close()
+    return jsonify(schema.model_validate(lecture).model_dump()), 200
 
 @lectures_bp.route("/<string:lecture_id>/status", methods=["GET"])
 @jwt_required()
 def check_lecture_status(lecture_id):
     current_user_id = get_jwt_identity()
-    db = SessionLocal()
-    try:
-        lecture = db.query(LectureModel).filter(LectureModel.id == lecture_id).first()
+    db = get_db()
+    lecture = db.query(LectureModel).filter(LectureModel.id == lecture_id)\
+        .join(ClassModel).filter(ClassModel.user_id == current_user_id).first()
         
-        if not lecture:
-            return jsonify({"detail": "Lecture not found"}), 404
+    if not lecture:
+        return jsonify({"detail": "Lecture not found"}), 404
             
-        if lecture.status == "PROCESSING":
-            transcript = AIService.check_transcription_result(lecture.object_key)
-            if transcript:
-                lecture.transcript = transcript
-                lecture.status = "COMPLETED"
-                db.commit()
-                db.refresh(lecture)
+    # with callbacks configured the result is pushed to us, so polling is a plain read
+    # segmented lectures are only completed by callbacks or the reconciler
+    if lecture.status == "PROCESSING" and not Config.CLOVA_SPEECH_CALLBACK_URL \
+            and not db.query(TranscriptionSegment.id).filter_by(lecture_id=lecture.id).first():
+        result = AIService.fetch_transcription_result(lecture.object_key)
+        if result:
+            complete_transcription(db, lecture.object_key, result['text'], result)
+            db.refresh(lecture)
         
-        return jsonify(LectureSchema.model_validate(lecture).model_dump()), 200
-    finally:
-        db.close()
+    return jsonify(LectureSchema.model_validate(lecture).model_dump()), 200
+
+@lectures_bp.route("/<string:lecture_id>/segments", methods=["GET"])
+@jwt_required()
+def get_lecture_segments(lecture_id):
+    current_user_id = get_jwt_identity()
+    try:
+        start_ms = int(request.args.get('start_ms', 0))
+        end_ms = int(request.args['end_ms'])
+    except (KeyError, ValueError):
+        return jsonify({"detail": "start_ms and end_ms are required integers"}), 400
+    if start_ms < 0 or end_ms < start_ms:
+        return jsonify({"detail": "Invalid time range"}), 400
+
+    db = get_db()
+    if not db.query(LectureModel.id).filter(LectureModel.id == lecture_id)\
+            .join(ClassModel).filter(ClassModel.user_id == current_user_id).first():
+        return jsonify({"detail": "Lecture not found"}), 404
+
+    timeline = get_timeline(db, lecture_id)
+    if timeline is None:
+        return jsonify({"detail": "No word timings for this lecture"}), 404
+
+    return jsonify(timeline.between(start_ms, end_ms, Config.TIMELINE_MAX_WORDS)), 200
+
+@lectures_bp.route("/<string:lecture_id>/segments/search", methods=["GET"])
+@jwt_required()
+def search_lecture_segments(lecture_id):
+    current_user_id = get_jwt_identity()
+    phrase = request.args.get('q', '')
+    if not phrase.strip():
+        return jsonify([]), 200
+
+    db = get_db()
+    if not db.query(LectureModel.id).filter(LectureModel.id == lecture_id)\
+            .join(ClassModel).filter(ClassModel.user_id == current_user_id).first():
+        return jsonify({"detail": "Lecture not found"}), 404
+
+    timeline = get_timeline(db, lecture_id)
+    if timeline is None:
+        return jsonify({"detail": "No word timings for this lecture"}), 404
+
+    return jsonify(timeline.find(phrase, limit=50)), 200
+
+@lectures_bp.route("/transcription-callback", methods=["POST"])
+def transcription_callback():
+    # called by Clova Speech, authenticated by the signature transcribe_audio put in the URL
+    object_key = request.args.get('key', '')
+    if not verify(object_key, request.args.get('sig', '')):
+        return jsonify({"detail": "Invalid signature"}), 403
+
+    result = request.get_json(silent=True) or {}
+    if 'result' not in result:
+        return jsonify({"detail": "Missing result"}), 400
+
+    db = get_db()
+    if result['result'] != 'COMPLETED':
+        print(f"Transcription failed for {object_key}: {result.get('message')}")
+    lecture = handle_result(db, object_key, result)
+
+    # duplicate deliveries are acknowledged too, otherwise Clova keeps retrying them
+    return jsonify({"lecture_id": lecture.id if lecture else None}), 200
 
 @lectures_bp.route("/<string:lecture_id>", methods=["PUT"])
 @jwt_required()
 def update_lecture(lecture_id):
     current_user_id = get_jwt_identity()
     data = request.json
-    db = SessionLocal()
-    try:
-        lecture = db.query(LectureModel).filter(LectureModel.id == lecture_id)\
-            .join(ClassModel).filter(ClassModel.user_id == current_user_id).first()
+    db = get_db()
+    lecture = db.query(LectureModel).filter(LectureModel.id == lecture_id)\
+        .join(ClassModel).filter(ClassModel.user_id == current_user_id).first()
             
-        if not lecture:
-            return jsonify({"detail": "Lecture not found"}), 404
+    if not lecture:
+        return jsonify({"detail": "Lecture not found"}), 404
             
-        if 'title' in data: lecture.title = data['title']
-        if 'transcript' in data: lecture.transcript = data['transcript']
+    if 'title' in data: lecture.title = data['title']
+    if 'transcript' in data: lecture.transcript = data['transcript']
+    if 'title' in data or 'transcript' in data:
+        # the search index covers titles too
+        index_lecture(db, lecture)
         
-        db.commit()
-        db.refresh(lecture)
-        return jsonify(LectureSchema.model_validate(lecture).model_dump()), 200
-    finally:
-        db.close()
+    db.commit()
+    db.refresh(lecture)
+    return jsonify(LectureSchema.model_validate(lecture).model_dump()), 200
 
 @lectures_bp.route("/<string:lecture_id>", methods=["DELETE"])
 @jwt_required()
 def delete_lecture(lecture_id):
     current_user_id = get_jwt_identity()
-    db = SessionLocal()
-    try:
-        lecture = db.query(LectureModel).filter(LectureModel.id == lecture_id)\
-            .join(ClassModel).filter(ClassModel.user_id == current_user_id).first()
+    db = get_db()
+    lecture = db.query(LectureModel).filter(LectureModel.id == lecture_id)\
+        .join(ClassModel).filter(ClassModel.user_id == current_user_id).first()
             
-        if not lecture:
-            return jsonify({"detail": "Lecture not found"}), 404
+    if not lecture:
+        return jsonify({"detail": "Lecture not found"}), 404
             
-        db.delete(lecture)
-        db.commit()
-        return jsonify({"message": "Lecture deleted"}), 200
-    finally:
-        db.close()
+    db.delete(lecture)
+    db.commit()
+    context_cache.invalidate_lecture(lecture_id)
+    timeline_cache.invalidate(lecture_id)
+    return jsonify({"message": "Lecture deleted"}), 200
 
 @lectures_bp.route("/<string:lecture_id>/analyze", methods=["POST"])
 @jwt_required()
 def analyze_lecture(lecture_id):
     current_user_id = get_jwt_identity()
-    db = SessionLocal()
-    try:
-        lecture = db.query(LectureModel).filter(LectureModel.id == lecture_id)\
-            .join(ClassModel).filter(ClassModel.user_id == current_user_id).first()
+    db = get_db()
+    lecture = db.query(LectureModel).filter(LectureModel.id == lecture_id)\
+        .join(ClassModel).filter(ClassModel.user_id == current_user_id).first()
             
-        if not lecture:
-            return jsonify({"detail": "Lecture not found"}), 404
+    if not lecture:
+        return jsonify({"detail": "Lecture not found"}), 404
 
-        if not lecture.transcript:
-             return jsonify({"detail": "Transcript not ready or empty"}), 400
+    if not lecture.transcript:
+         return jsonify({"detail": "Transcript not ready or empty"}), 400
 
-        analysis = AIService.analyze_transcript(lecture.transcript)
-        lecture.summary = analysis.get("summary", "")
-        existing_items = db.query(ActionItemModel).filter_by(lecture_id=lecture_id).all()
-        existing_content_set = {item.content.strip().lower() for item in existing_items}
-        
-        new_items_added = []
-        
-        for item in analysis.get("action_items", []):
-            clean_content = item['content'].strip().lower()
-            
-            if clean_content in existing_content_set:
-                continue
-
-            due_date = None
-            if item.get('due_date'):
-                try: 
-                    due_date = date_parse(item['due_date']) 
-                except: 
-                    due_date = None
-            
-            ai_item = ActionItemModel(
-                type=item['type'], 
-                content=item['content'], 
-                due_date=due_date, 
-                lecture_id=lecture_id, 
-                user_id=current_user_id
-            )
-            db.add(ai_item)
-            new_items_added.append(ai_item)
-            
+    # unchanged transcripts are answered from the analysis cache without queueing
+    cache_key = AnalysisCache.make_key(lecture.transcript)
+    analysis = AnalysisCache.get(db, cache_key)
+    if analysis is None:
+        job = JobQueue.enqueue(db, "analyze_lecture", {"lecture_id": lecture_id, "user_id": current_user_id},
+                               user_id=current_user_id, dedupe_key=analysis_dedupe_key(lecture_id, cache_key))
         db.commit()
-        db.refresh(lecture)
+        return jsonify({"job_id": job.id, "status": job.status, "lecture_id": lecture_id}), 202
+
+    result = run_lecture_analysis(db, lecture_id, current_user_id, analysis=analysis)
+    db.refresh(lecture)
         
-        all_items = db.query(ActionItemModel).filter_by(lecture_id=lecture_id).order_by(ActionItemModel.created_at.desc()).all()
+    all_items = db.query(ActionItemModel).filter_by(lecture_id=lecture_id).order_by(ActionItemModel.created_at.desc()).all()
         
-        return jsonify({
-            "lecture": LectureSchema.model_validate(lecture).model_dump(),
-            "action_items": [ActionItemSchema.model_validate(i).model_dump() for i in all_items],
-            "new_items_count": len(new_items_added)
-        })
-    finally:
-        db.close()
+    return jsonify({
+        "lecture": LectureSchema.model_validate(lecture).model_dump(),
+        "action_items": [ActionItemSchema.model_validate(i).model_dump() for i in all_items],
+        "new_items_count": result["new_items_count"],
+        "cached": True
+    })
 
 @lectures_bp.route("/search", methods=["GET"])
 @jwt_required()
 def search_lectures():
-    query = request.args.get('q', '')
+    query = request.args.get('q', '').strip()
     if not query:
         return jsonify([]), 200
-
-    current_user_id = get_jwt_identity()
-    db = SessionLocal()
     try:
-        results = db.query(LectureModel).join(ClassModel).filter(
-            ClassModel.user_id == current_user_id,
-            (LectureModel.title.ilike(f"%{query}%")) | 
-            (LectureModel.transcript.ilike(f"%{query}%"))
-        ).limit(20).all()
-        
-        return jsonify([LectureSchema.model_validate(r).model_dump() for r in results]), 200
-    finally:
-        db.close()
\ No newline at end of file
+        limit = page_limit(request.args.get('limit'), Config.SEARCH_PAGE_SIZE, Config.SEARCH_MAX_PAGE_SIZE)
+        after = decode_cursor(request.args.get('cursor'))
+        results, next_position = search_library(get_read_db(), get_jwt_identity(), query, limit, after)
+    except ValueError as e:
+        return jsonify({"detail": str(e)}), 400
+    return json_page(results, next_position), 200
\ No newline at end of file
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import bcrypt
-from app.core.database import SessionLocal
+from app.core.database import get_db
 from app.models.models import User as UserModel
 from app.schemas.schemas import UserUpdateUsername, UserUpdateEmail, UserUpdatePassword
 
@@ -16,20 +16,17 @@ def update_username():
     except Exception as e:
         return jsonify({"detail": str(e)}), 422
 
-    db = SessionLocal()
-    try:
-        if db.query(UserModel).filter(UserModel.username == data.username).first():
-            return jsonify({"detail": "Username already taken."}), 400
+    db = get_db()
+    if db.query(UserModel).filter(UserModel.username == data.username).first():
+        return jsonify({"detail": "Username already taken."}), 400
         
-        user = db.query(UserModel).filter_by(id=current_user_id).first()
-        if not user:
-            return jsonify({"detail": "User not found."}), 404
+    user = db.query(UserModel).filter_by(id=current_user_id).first()
+    if not user:
+        return jsonify({"detail": "User not found."}), 404
             
-        user.username = data.username
-        db.commit()
-        return jsonify({"message": "Username updated successfully."}), 200
-    finally:
-        db.close()
+    user.username = data.username
+    db.commit()
+    return jsonify({"message": "Username updated successfully."}), 200
 
 @users_bp.route("/email", methods=["PATCH"])
 @jwt_required()
@@ -40,17 +37,14 @@ def update_email():
     except Exception as e:
         return jsonify({"detail": str(e)}), 422
 
-    db = SessionLocal()
-    try:
-        if db.query(UserModel).filter(UserModel.email == data.email).first():
-            return jsonify({"detail": "Email already registered."}), 400
+    db = get_db()
+    if db.query(UserModel).filter(UserModel.email == data.email).first():
+        return jsonify({"detail": "Email already registered."}), 400
         
-        user = db.query(UserModel).filter_by(id=current_user_id).first()
-        user.email = data.email
-        db.commit()
-        return jsonify({"message": "Email updated successfully."}), 200
-    finally:
-        db.close()
+    user = db.query(UserModel).filter_by(id=current_user_id).first()
+    user.email = data.email
+    db.commit()
+    return jsonify({"message": "Email updated successfully."}), 200
 
 @users_bp.route("/password", methods=["PUT"])
 @jwt_required()
@@ -61,37 +55,31 @@ def update_password():
     except Exception as e:
         return jsonify({"detail": str(e)}), 422
 
-    db = SessionLocal()
-    try:
-        user = db.query(UserModel).filter_by(id=current_user_id).first()
+    db = get_db()
+    user = db.query(UserModel).filter_by(id=current_user_id).first()
         
-        if not user or not user.hashed_password:
-            return jsonify({"detail": "User cannot change password."}), 404
+    if not user or not user.hashed_password:
+        return jsonify({"detail": "User cannot change password."}), 404
 
-        if not bcrypt.check_password_hash(user.hashed_password, data.old_password):
-            return jsonify({"detail": "Old password incorrect."}), 401
+    if not bcrypt.check_password_hash(user.hashed_password, data.old_password):
+        return jsonify({"detail": "Old password incorrect."}), 401
         
-        user.hashed_password = bcrypt.generate_password_hash(data.new_password).decode('utf-8')
-        db.commit()
-        return jsonify({"message": "Password updated successfully."}), 200
-    finally:
-        db.close()
+    user.hashed_password = bcrypt.generate_password_hash(data.new_password).decode('utf-8')
+    db.commit()
+    return jsonify({"message": "Password updated successfully."}), 200
         
 @users_bp.route("/me", methods=["GET"])
 @jwt_required()
 def get_current_user_profile():
     current_user_id = get_jwt_identity()
-    db = SessionLocal()
-    try:
-        user = db.query(UserModel).filter_by(id=current_user_id).first()
-        if not user:
-            return jsonify({"detail": "User not found."}), 404
+    db = get_db()
+    user = db.query(UserModel).filter_by(id=current_user_id).first()
+    if not user:
+        return jsonify({"detail": "User not found."}), 404
         
-        return jsonify({
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "google_id": user.google_id
-        }), 200
-    finally:
-        db.close()
+    return jsonify({
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "google_id": user.google_id
+    }), 200
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -7,24 +8,109 @@ class Config:
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev_jwt_key")
     APP_ENV = os.getenv("APP_ENV", "development")
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
+    # /metrics/* answers callers presenting this bearer token, or connecting straight from these networks
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    METRICS_ALLOWED_NETWORKS = [network.strip() for network in
+                                os.getenv("METRICS_ALLOWED_NETWORKS", "127.0.0.1/32,::1/128").split(",") if network.strip()]
     MYSQL_HOST = os.getenv("MYSQL_HOST", "localhost")
     MYSQL_PORT = int(os.getenv("MYSQL_PORT", 3306))
     MYSQL_USER = os.getenv("MYSQL_USER", "root")
     MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD", "")
     MYSQL_DB = os.getenv("MYSQL_DB", "chatbot_db")
-    SQLALCHEMY_DATABASE_URI = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        "DATABASE_URL", f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+    )
+    # optional read replica for read-only list/search endpoints
+    SQLALCHEMY_REPLICA_URI = os.getenv("DATABASE_REPLICA_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ECHO = (APP_ENV == "development")
+    SQLALCHEMY_ECHO = (APP_ENV == "development") and os.getenv("SQLALCHEMY_ECHO", "0") == "1"
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
     GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
     GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
     CLOVA_API_HOST = os.getenv("CLOVA_API_HOST", "https://clovastudio.stream.ntruss.com")
     CLOVA_API_KEY = os.getenv("CLOVA_API_KEY")
     CLOVA_MODEL = os.getenv("CLOVA_MODEL", "HCX-005")
+    CLOVA_POOL_CONNECTIONS = int(os.getenv("CLOVA_POOL_CONNECTIONS", 4))
+    CLOVA_POOL_MAXSIZE = int(os.getenv("CLOVA_POOL_MAXSIZE", 16))
+    CLOVA_MAX_RETRIES = int(os.getenv("CLOVA_MAX_RETRIES", 3))
+    CLOVA_RETRY_BACKOFF = float(os.getenv("CLOVA_RETRY_BACKOFF", 0.5))
+    CLOVA_CONNECT_TIMEOUT = float(os.getenv("CLOVA_CONNECT_TIMEOUT", 5))
+    CLOVA_READ_TIMEOUT = float(os.getenv("CLOVA_READ_TIMEOUT", 60))
+    CLOVA_RATE_PER_MINUTE = float(os.getenv("CLOVA_RATE_PER_MINUTE", 60))
+    CLOVA_RATE_BURST = int(os.getenv("CLOVA_RATE_BURST", 10))
+    CLOVA_SCHEDULER_DB = os.getenv("CLOVA_SCHEDULER_DB", os.path.join(tempfile.gettempdir(), "clova_scheduler.sqlite3"))
+    CLOVA_SCHEDULER_MAX_WAIT = {
+        "interactive": float(os.getenv("CLOVA_MAX_WAIT_INTERACTIVE", 10)),
+        "analysis": float(os.getenv("CLOVA_MAX_WAIT_ANALYSIS", 120)),
+        "batch": float(os.getenv("CLOVA_MAX_WAIT_BATCH", 600)),
+    }
+    SINGLE_FLIGHT_LOCK_DIR = os.getenv("SINGLE_FLIGHT_LOCK_DIR", os.path.join(tempfile.gettempdir(), "single_flight"))
+    CLOVA_BREAKER_THRESHOLD = int(os.getenv("CLOVA_BREAKER_THRESHOLD", 5))
+    CLOVA_BREAKER_COOLDOWN = float(os.getenv("CLOVA_BREAKER_COOLDOWN", 30))
+    ANALYSIS_CHUNK_CHARS = int(os.getenv("ANALYSIS_CHUNK_CHARS", 6000))
+    ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", 4))
+    ANALYSIS_CACHE_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+    JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", 30))
+    JOB_LOCK_TIMEOUT = float(os.getenv("JOB_LOCK_TIMEOUT", 900))
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2))
+    CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", 3000))
+    CHAT_HISTORY_MAX_MESSAGES = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", 50))
+    CHAT_CONTEXT_CACHE_SIZE = int(os.getenv("CHAT_CONTEXT_CACHE_SIZE", 1000))
+    CHAT_CONTEXT_CACHE_TTL = float(os.getenv("CHAT_CONTEXT_CACHE_TTL", 300))
+    CHAT_SUMMARY_BATCH = int(os.getenv("CHAT_SUMMARY_BATCH", 10))
+    CHAT_SUMMARY_KEEP_RECENT = int(os.getenv("CHAT_SUMMARY_KEEP_RECENT", 6))
+    RETRIEVAL_CHUNK_CHARS = int(os.getenv("RETRIEVAL_CHUNK_CHARS", 800))
+    RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", 4))
+    RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", 900))
+    RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", 64))
+    LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", 50))
+    LIST_MAX_PAGE_SIZE = int(os.getenv("LIST_MAX_PAGE_SIZE", 200))
+    SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", 20))
+    SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", 50))
+    SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", 200))
+    SEARCH_TITLE_WEIGHT = float(os.getenv("SEARCH_TITLE_WEIGHT", 3))
+    TIMELINE_CACHE_SIZE = int(os.getenv("TIMELINE_CACHE_SIZE", 32))
+    TIMELINE_MAX_WORDS = int(os.getenv("TIMELINE_MAX_WORDS", 2000))
     SOCRATIC_PROMPT = os.getenv("SYSTEM_PROMPT")
     ANALYSIS_PROMPT = os.getenv("ANALYSIS_PROMPT")
     GENERAL_PROMPT = "You are a helpful AI teaching assistant. Answer questions clearly and concisely."
+    SUMMARY_PROMPT = os.getenv("SUMMARY_PROMPT", "Summarize the conversation so far for your own memory. Merge the previous summary with the new messages, keep facts, open questions and what the student struggled with. Answer with the summary only.")
     CLOVA_SPEECH_URL = os.getenv("CLOVA_SPEECH_URL")
     CLOVA_SPEECH_SECRET = os.getenv("CLOVA_SPEECH_SECRET")
+    # public URL of /api/lectures/transcription-callback; without it /status falls back to polling the bucket
+    CLOVA_SPEECH_CALLBACK_URL = os.getenv("CLOVA_SPEECH_CALLBACK_URL")
+    CALLBACK_SIGNING_KEY = os.getenv("CALLBACK_SIGNING_KEY", SECRET_KEY)
+    TRANSCRIPTION_TIMEOUT = float(os.getenv("TRANSCRIPTION_TIMEOUT", 6 * 3600))
+    RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", 60))
+    RECONCILE_FETCH_WORKERS = int(os.getenv("RECONCILE_FETCH_WORKERS", 8))
+    UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", 8 * 1024 * 1024))
+    UPLOAD_MAX_INFLIGHT_PARTS = int(os.getenv("UPLOAD_MAX_INFLIGHT_PARTS", 4))
+    UPLOAD_READ_SIZE = int(os.getenv("UPLOAD_READ_SIZE", 64 * 1024))
+    UPLOAD_URL_EXPIRES = int(os.getenv("UPLOAD_URL_EXPIRES", 3600))
+    UPLOAD_MAX_FIELD_SIZE = int(os.getenv("UPLOAD_MAX_FIELD_SIZE", 64 * 1024))
+    TRANSCRIPTION_SEGMENTED = os.getenv("TRANSCRIPTION_SEGMENTED", "0") == "1"
+    TRANSCRIPTION_SEGMENT_SECONDS = float(os.getenv("TRANSCRIPTION_SEGMENT_SECONDS", 600))
+    TRANSCRIPTION_SEGMENT_OVERLAP = float(os.getenv("TRANSCRIPTION_SEGMENT_OVERLAP", 5))
+    TRANSCRIPTION_SEGMENT_WORKERS = int(os.getenv("TRANSCRIPTION_SEGMENT_WORKERS", 4))
+    # "s3" talks to NCP Object Storage; "local" keeps objects under STORAGE_LOCAL_ROOT for tests and benchmarks
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3")
+    STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "storage-data")
+    STORAGE_MAX_POOL_CONNECTIONS = int(os.getenv("STORAGE_MAX_POOL_CONNECTIONS", 32))
+    STORAGE_MAX_ATTEMPTS = int(os.getenv("STORAGE_MAX_ATTEMPTS", 3))
+    STORAGE_CONNECT_TIMEOUT = float(os.getenv("STORAGE_CONNECT_TIMEOUT", 5))
+    STORAGE_READ_TIMEOUT = float(os.getenv("STORAGE_READ_TIMEOUT", 60))
+    # orphaned media and result objects are swept once per interval (0 disables); objects younger
+    # than STORAGE_GC_MIN_AGE are left alone so in-flight uploads are never collected
+    STORAGE_GC_INTERVAL = float(os.getenv("STORAGE_GC_INTERVAL", 24 * 3600))
+    STORAGE_GC_MIN_AGE = float(os.getenv("STORAGE_GC_MIN_AGE", 24 * 3600))
+    STORAGE_GC_BATCH_SIZE = int(os.getenv("STORAGE_GC_BATCH_SIZE", 1000))
+    STORAGE_GC_PAUSE = float(os.getenv("STORAGE_GC_PAUSE", 1))
+    STORAGE_GC_MAX_DELETES = int(os.getenv("STORAGE_GC_MAX_DELETES", 0))
+    STORAGE_GC_DRY_RUN = os.getenv("STORAGE_GC_DRY_RUN", "0") == "1"
     NCP_ACCESS_KEY = os.getenv("NCP_ACCESS_KEY")
     NCP_SECRET_KEY = os.getenv("NCP_SECRET_KEY")
     NCP_ENDPOINT = os.getenv("NCP_ENDPOINT", "https://kr.object.ncloudstorage.com")
@@ -1,18 +1,111 @@
+import threading
+import time
+from collections import deque
+from flask import g
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from app.core.config import Config
 
-engine = create_engine(
-    Config.SQLALCHEMY_DATABASE_URI, 
-    echo=Config.SQLALCHEMY_ECHO, 
-    future=True
-)
+class PoolStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waits = deque(maxlen=1000)
+        self.checkouts = 0
+        self.timeouts = 0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self.lock:
+            self.waits.append(waited)
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            ordered = sorted(self.waits)
+            checkouts, timeouts = self.checkouts, self.timeouts
+
+        def ms(fraction):
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 2) if ordered else 0.0
+
+        return {"checkouts": checkouts, "timeouts": timeouts,
+                "wait_p50_ms": ms(0.50), "wait_p95_ms": ms(0.95), "wait_max_ms": ms(1.0)}
+
+class TimedQueuePool(QueuePool):
+    # QueuePool has no "about to wait" event, so the wait for a free connection is timed around _do_get
+    def _do_get(self):
+        started = time.monotonic()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.wait_stats.record(time.monotonic() - started, timed_out=True)
+            raise
+        self.wait_stats.record(time.monotonic() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+def make_engine(uri: str):
+    options = {"echo": Config.SQLALCHEMY_ECHO, "future": True}
+    if not uri.startswith("sqlite"):
+        # sized per worker process: pool_size + max_overflow is this process's ceiling on connections,
+        # pre-ping replaces connections MySQL dropped while idle and recycle retires them before wait_timeout
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=Config.DB_POOL_SIZE,
+            max_overflow=Config.DB_MAX_OVERFLOW,
+            pool_timeout=Config.DB_POOL_TIMEOUT,
+            pool_recycle=Config.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    engine = create_engine(uri, **options)
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.wait_stats = PoolStats()
+    return engine
+
+engine = make_engine(Config.SQLALCHEMY_DATABASE_URI)
+# without a replica, reads simply go to the primary
+read_engine = make_engine(Config.SQLALCHEMY_REPLICA_URI) if Config.SQLALCHEMY_REPLICA_URI else engine
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+ReadSessionLocal = sessionmaker(bind=read_engine, autocommit=False, autoflush=False) \
+    if read_engine is not engine else SessionLocal
 
 def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+    # one session per request, closed by close_db when the app context is torn down
+    if "db" not in g:
+        g.db = SessionLocal()
+    return g.db
+
+def get_read_db():
+    # for read-only handlers that can tolerate replica lag; shares the request session when there is no replica
+    if ReadSessionLocal is SessionLocal:
+        return get_db()
+    if "read_db" not in g:
+        g.read_db = ReadSessionLocal()
+    return g.read_db
+
+def close_db(exception=None):
+    for name in ("db", "read_db"):
+        db = g.pop(name, None)
+        if db is not None:
+            db.close()
+
+def pool_stats() -> dict:
+    stats = {}
+    for name, pool_engine in (("primary", engine), ("replica", read_engine)):
+        if name == "replica" and pool_engine is engine:
+            continue
+        pool = pool_engine.pool
+        entry = {"status": pool.status()}
+        if isinstance(pool, QueuePool):
+            entry.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        if hasattr(pool, "wait_stats"):
+            entry.update(pool.wait_stats.snapshot())
+        stats[name] = entry
+    return stats
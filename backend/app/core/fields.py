@@ -0,0 +1,22 @@
+from functools import lru_cache
+from pydantic import ConfigDict, create_model
+
+def parse_fields(value: str, schema) -> frozenset:
+    # ?fields=id,title,status -> the top-level schema fields to send; id always comes along
+    if not value:
+        return None
+    fields = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = fields - set(schema.model_fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return frozenset(fields | {"id"})
+
+@lru_cache(maxsize=256)
+def project(schema, fields: frozenset):
+    # a copy of the schema with only those fields, so validating an ORM object never reads the
+    # others and never triggers their lazy or deferred loads
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (info.annotation, info) for name, info in schema.model_fields.items() if name in fields},
+    )
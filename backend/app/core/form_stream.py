@@ -0,0 +1,53 @@
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import MultipartDecoder, NeedData, Field, File, Epilogue
+from app.core.config import Config
+
+class FormStreamError(Exception):
+    pass
+
+def iter_events(stream, boundary: str):
+    decoder = MultipartDecoder(boundary.encode("latin-1"), max_form_memory_size=Config.UPLOAD_MAX_FIELD_SIZE)
+    while True:
+        chunk = stream.read(Config.UPLOAD_READ_SIZE)
+        decoder.receive_data(chunk or None)
+        try:
+            event = decoder.next_event()
+            while not isinstance(event, NeedData):
+                yield event
+                if isinstance(event, Epilogue):
+                    return
+                event = decoder.next_event()
+        except ValueError as e:
+            raise FormStreamError(f"Malformed multipart body: {e}")
+        if not chunk:
+            raise FormStreamError("Request body ended before the multipart form was complete")
+
+def read_streaming_form(request, file_field: str, store_file) -> tuple:
+    # parses multipart/form-data straight off request.stream; the file part is handed to
+    # store_file(filename, content_type, chunks, fields_so_far) as an iterator instead of being spooled to disk
+    mimetype, options = parse_options_header(request.headers.get("Content-Type", ""))
+    if mimetype != "multipart/form-data" or not options.get("boundary"):
+        raise FormStreamError("Expected a multipart/form-data body")
+
+    fields = {}
+    stored = None
+    events = iter_events(request.stream, options["boundary"])
+
+    def part_chunks():
+        for event in events:
+            if event.data:
+                yield event.data
+            if not event.more_data:
+                return
+
+    for event in events:
+        if isinstance(event, Field):
+            fields[event.name] = b"".join(part_chunks()).decode("utf-8", "replace")
+        elif isinstance(event, File):
+            chunks = part_chunks()
+            if event.name == file_field and stored is None:
+                stored = store_file(event.filename, event.headers.get("Content-Type"), chunks, fields)
+            # whatever the consumer left unread still has to be skipped to reach the next part
+            for _ in chunks:
+                pass
+    return fields, stored
@@ -0,0 +1,77 @@
+import base64
+import json
+from datetime import datetime
+from flask import Response, current_app, stream_with_context
+from sqlalchemy import DateTime, Integer, String, and_, literal, or_
+from app.core.config import Config
+
+def encode_cursor(position: dict) -> str:
+    # opaque to clients; it only ever addresses rows the caller can already see
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    if not cursor:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
+
+def page_limit(value, default: int = None, maximum: int = None) -> int:
+    default = default or Config.LIST_PAGE_SIZE
+    maximum = maximum or Config.LIST_MAX_PAGE_SIZE
+    try:
+        limit = int(value) if value not in (None, "") else default
+    except (TypeError, ValueError):
+        raise ValueError("Invalid limit")
+    return min(max(limit, 1), maximum)
+
+def cursor_value(column, value):
+    if isinstance(column.type, DateTime):
+        # bound as text, not a datetime: SQLite keeps CURRENT_TIMESTAMP as "YYYY-MM-DD HH:MM:SS", which a
+        # bound datetime (always rendered with microseconds) never equals; MySQL converts it back to a DATETIME
+        return literal(str(datetime.fromisoformat(value)), String)
+    if isinstance(column.type, Integer):
+        return int(value)
+    return str(value)
+
+def keyset_page(query, model, after: dict, limit: int, descending: bool = True, order=None) -> tuple:
+    # pages on (order column, id), (created_at, id) unless given, so rows inserted while a client pages
+    # through never shift or repeat entries; the id breaks ties in the order column
+    column, key = order if order is not None else model.created_at, model.id
+    if after:
+        try:
+            value, last_id = cursor_value(column, after[column.key]), str(after["id"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        if descending:
+            query = query.filter(or_(column < value, and_(column == value, key < last_id)))
+        else:
+            query = query.filter(or_(column > value, and_(column == value, key > last_id)))
+    ordering = (column.desc(), key.desc()) if descending else (column.asc(), key.asc())
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+    next_position = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = getattr(rows[-1], column.key)
+        next_position = {column.key: str(last) if isinstance(last, datetime) else last, "id": rows[-1].id}
+    return rows, next_position
+
+def json_page(items, next_position: dict = None) -> Response:
+    # items may be a generator: each one is serialized and sent as it is produced, so a large page
+    # never sits in memory as one string. The request context (and its DB session) stays open
+    # until the last item is written
+    def generate():
+        yield "["
+        for index, item in enumerate(items):
+            yield ("," if index else "") + current_app.json.dumps(item)
+        yield "]"
+
+    response = Response(stream_with_context(generate()), mimetype="application/json")
+    if next_position:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_position)
+    return response
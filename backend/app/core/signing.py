@@ -0,0 +1,11 @@
+import hashlib
+import hmac
+from app.core.config import Config
+
+def sign(value: str) -> str:
+    return hmac.new(Config.CALLBACK_SIGNING_KEY.encode("utf-8"), value.encode("utf-8"), hashlib.sha256).hexdigest()
+
+def verify(value: str, signature: str) -> bool:
+    if not value or not signature:
+        return False
+    return hmac.compare_digest(sign(value), signature)
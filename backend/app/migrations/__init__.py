@@ -0,0 +1,129 @@
+import importlib
+import pkgutil
+from contextlib import contextmanager
+from sqlalchemy import Column, DateTime, Index, MetaData, String, Table, func, inspect, select, text
+from app.core.database import engine
+
+VERSIONS_PACKAGE = "app.migrations.versions"
+
+class MigrationError(Exception):
+    pass
+
+# kept off the models' Base so create_all and the migrations never fight over it
+metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", metadata,
+    Column("version", String(32), primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, server_default=func.now()),
+)
+
+def discover() -> list:
+    # versions/v0003_some_change.py -> ("0003", "some_change", module), oldest first
+    package = importlib.import_module(VERSIONS_PACKAGE)
+    found = []
+    for info in pkgutil.iter_modules(package.__path__):
+        prefix, _, name = info.name.partition("_")
+        if not (prefix.startswith("v") and prefix[1:].isdigit()):
+            continue
+        module = importlib.import_module(f"{VERSIONS_PACKAGE}.{info.name}")
+        found.append((prefix[1:], name, module))
+    found.sort(key=lambda entry: entry[0])
+    versions = [version for version, _, _ in found]
+    if len(set(versions)) != len(versions):
+        raise MigrationError(f"Duplicate migration versions in {versions}")
+    return found
+
+def applied_versions(conn) -> list:
+    schema_migrations.create(conn, checkfirst=True)
+    return [row.version for row in conn.execute(select(schema_migrations.c.version).order_by(schema_migrations.c.version))]
+
+@contextmanager
+def migration_lock():
+    # several containers may boot at once; MySQL's named lock lets only one of them migrate
+    with engine.connect() as conn:
+        if conn.dialect.name == "mysql":
+            if conn.execute(text("SELECT GET_LOCK('schema_migrations', 300)")).scalar() != 1:
+                raise MigrationError("Timed out waiting for another process to finish migrating")
+        try:
+            yield
+        finally:
+            if conn.dialect.name == "mysql":
+                conn.execute(text("SELECT RELEASE_LOCK('schema_migrations')"))
+
+def upgrade(target: str = None) -> list:
+    done = []
+    with migration_lock():
+        with engine.begin() as conn:
+            applied = set(applied_versions(conn))
+        for version, name, module in discover():
+            if version in applied or (target and version > target):
+                continue
+            print(f"Applying {version} {name}")
+            # MySQL commits DDL implicitly, so each step is written to be safe to re-run if it dies halfway
+            with engine.begin() as conn:
+                module.upgrade(conn)
+                conn.execute(schema_migrations.insert().values(version=version, name=name))
+            done.append(version)
+    return done
+
+def downgrade(target: str) -> list:
+    done = []
+    with migration_lock():
+        with engine.begin() as conn:
+            applied = set(applied_versions(conn))
+        for version, name, module in reversed(discover()):
+            if version not in applied or version <= target:
+                continue
+            print(f"Reverting {version} {name}")
+            with engine.begin() as conn:
+                module.downgrade(conn)
+                conn.execute(schema_migrations.delete().where(schema_migrations.c.version == version))
+            done.append(version)
+    return done
+
+def rollback(steps: int = 1) -> list:
+    with engine.begin() as conn:
+        applied = applied_versions(conn)
+    if not applied:
+        return []
+    steps = min(steps, len(applied))
+    target = applied[-steps - 1] if steps < len(applied) else "0000"
+    return downgrade(target)
+
+def status() -> list:
+    with engine.begin() as conn:
+        applied = set(applied_versions(conn))
+    return [(version, name, version in applied) for version, name, _ in discover()]
+
+def has_column(conn, table: str, column: str) -> bool:
+    return any(entry["name"] == column for entry in inspect(conn).get_columns(table))
+
+def add_column(conn, table: str, column: str, ddl: str):
+    if not has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+def drop_column(conn, table: str, column: str):
+    if has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+
+def create_index(conn, table: str, name: str, columns: list, unique: bool = False):
+    if any(entry["name"] == name for entry in inspect(conn).get_indexes(table)):
+        return
+    reflected = Table(table, MetaData(), autoload_with=conn)
+    Index(name, *(reflected.c[column] for column in columns), unique=unique).create(conn)
+
+def drop_index(conn, table: str, name: str):
+    inspector = inspect(conn)
+    indexes = {entry["name"]: entry for entry in inspector.get_indexes(table)}
+    if name not in indexes:
+        return
+    columns = indexes[name]["column_names"]
+    # InnoDB refuses to drop the last index backing a foreign key, so leave a plain one behind
+    leading = columns[0]
+    foreign = {column for fk in inspector.get_foreign_keys(table) for column in fk["constrained_columns"]}
+    if leading in foreign and not any(entry["column_names"][0] == leading
+                                      for other, entry in indexes.items() if other != name):
+        create_index(conn, table, f"ix_{table}_{leading}", [leading])
+    reflected = Table(table, MetaData(), autoload_with=conn)
+    Index(name, *(reflected.c[column] for column in columns)).drop(conn)
@@ -0,0 +1,77 @@
+from sqlalchemy import and_, or_, select, text
+from app.models.models import (
+    ActionItem, Class, GeneralChatSession, GeneralMessage, Job, Lecture, SearchPosting, SocraticChatSession,
+    SocraticMessage
+)
+
+def keyset(model, owner, order=None, limit=50):
+    # a second page of a list endpoint, as keyset_page builds it
+    column = order if order is not None else model.created_at
+    value = 1 if order is not None else "2000-01-01"
+    after = or_(column < value, and_(column == value, model.id < "x"))
+    return select(model.id).where(owner == "x", after).order_by(column.desc(), model.id.desc()).limit(limit + 1)
+
+# the statements behind chat history, the list endpoints and the background sweeps, each with
+# the index migrations 0003-0006 give it; literal values only stand in for request parameters
+HOT_QUERIES = [
+    ("general chat history", "ix_general_messages_session_seq",
+     select(GeneralMessage).where(GeneralMessage.session_id == "x")
+     .order_by(GeneralMessage.seq.desc(), GeneralMessage.id.desc()).limit(50)),
+    ("socratic chat history", "ix_socratic_messages_session_seq",
+     select(SocraticMessage).where(SocraticMessage.session_id == "x")
+     .order_by(SocraticMessage.seq.desc(), SocraticMessage.id.desc()).limit(50)),
+    ("general history page", "ix_general_messages_session_seq",
+     keyset(GeneralMessage, GeneralMessage.session_id, GeneralMessage.seq)),
+    ("socratic history page", "ix_socratic_messages_session_seq",
+     keyset(SocraticMessage, SocraticMessage.session_id, SocraticMessage.seq)),
+    ("classes page", "ix_classes_user_created_id", keyset(Class, Class.user_id)),
+    ("action items page", "ix_action_items_user_created_id", keyset(ActionItem, ActionItem.user_id)),
+    ("action items by lecture", "ix_action_items_lecture_created",
+     select(ActionItem).where(ActionItem.lecture_id == "x").order_by(ActionItem.created_at.desc())),
+    ("general sessions page", "ix_general_chat_sessions_user_created_id",
+     keyset(GeneralChatSession, GeneralChatSession.user_id)),
+    ("socratic sessions page", "ix_socratic_chat_sessions_user_created_id",
+     keyset(SocraticChatSession, SocraticChatSession.user_id)),
+    ("lectures by class", "ix_lectures_class_created",
+     select(Lecture.id, Lecture.created_at).where(Lecture.class_id == "x").order_by(Lecture.created_at.desc())),
+    ("processing lectures", "ix_lectures_status_created",
+     select(Lecture.object_key, Lecture.created_at).where(Lecture.status == "PROCESSING")),
+    ("recent jobs by type", "ix_jobs_type_created",
+     select(Job.id).where(Job.type == "x", Job.created_at >= "2000-01-01")),
+    ("search postings", "PRIMARY",
+     select(SearchPosting.lecture_id, SearchPosting.tf).where(SearchPosting.user_id == "x", SearchPosting.term.in_(["a", "b"]))),
+]
+
+def explain_mysql(conn, sql: str) -> tuple:
+    rows = [dict(row._mapping) for row in conn.execute(text(f"EXPLAIN {sql}"))]
+    first = rows[0]
+    plan = "; ".join(f"{row['table']}: type={row['type']} key={row['key']} extra={row.get('Extra') or ''}" for row in rows)
+    filesort = any("filesort" in (row.get("Extra") or "") for row in rows)
+    possible = (first.get("possible_keys") or "").split(",")
+    return first["key"], possible, first["type"] == "ALL", filesort, plan
+
+def explain_sqlite(conn, sql: str) -> tuple:
+    details = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    plan = "; ".join(details)
+    used = next((detail.split(" INDEX ", 1)[1].split(" ")[0] for detail in details if " INDEX " in detail), None)
+    # SQLite names a composite primary key's index after the table, MySQL calls it PRIMARY
+    if (used or "").startswith("sqlite_autoindex_") or (not used and any("USING PRIMARY KEY" in d for d in details)):
+        used = "PRIMARY"
+    full_scan = any(detail.startswith("SCAN ") and " INDEX " not in detail for detail in details)
+    filesort = any("TEMP B-TREE" in detail for detail in details)
+    return used, [], full_scan, filesort, plan
+
+def check_hot_queries(conn) -> list:
+    # returns (label, expected index, ok, plan); a query passes only when the planner actually chooses
+    # the expected index and doesn't sort in memory. An index that is merely a candidate doesn't count:
+    # MySQL passes over indexes on near-empty tables, so run this against representative data
+    explain = explain_mysql if conn.dialect.name == "mysql" else explain_sqlite
+    results = []
+    for label, expected, statement in HOT_QUERIES:
+        sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+        used, possible, full_scan, filesort, plan = explain(conn, sql)
+        ok = used == expected and not full_scan and not filesort
+        if not ok and used != expected and expected in possible:
+            plan += " (index available but not chosen)"
+        results.append((label, expected, ok, plan))
+    return results
@@ -0,0 +1,189 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, LargeBinary, MetaData, String, Table, \
+    Text, func
+from app.migrations import MigrationError
+
+# the schema as it stood when migrations were introduced, frozen here rather than read off the models:
+# later migrations change those, and a fresh database must pass through every step the same way an
+# old one did. The chat summary columns and the object_key index belong to 0002
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("username", String(50), unique=True, nullable=False),
+    Column("email", String(120), unique=True, nullable=False),
+    Column("hashed_password", String(255), nullable=True),
+    Column("google_id", String(255), unique=True, nullable=True),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "classes", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("title", String(80), nullable=False),
+    Column("created_at", DateTime),
+    Column("user_id", String(36), ForeignKey("users.id"), nullable=False),
+)
+
+Table(
+    "lectures", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("title", String(80), nullable=False),
+    Column("transcript", Text, nullable=True),
+    Column("object_key", String(255), nullable=True),
+    Column("status", String(20)),
+    Column("summary", Text, nullable=True),
+    Column("created_at", DateTime),
+    Column("class_id", String(36), ForeignKey("classes.id"), nullable=False),
+)
+
+Table(
+    "lecture_chunks", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("lecture_id", String(36), ForeignKey("lectures.id"), nullable=False),
+    Column("position", Integer, nullable=False),
+    Column("content", Text, nullable=False),
+    Index("ix_lecture_chunks_lecture_position", "lecture_id", "position"),
+)
+
+Table(
+    "lecture_timelines", metadata,
+    Column("lecture_id", String(36), ForeignKey("lectures.id"), primary_key=True),
+    Column("word_count", Integer, nullable=False),
+    Column("starts", LargeBinary(length=2**24), nullable=False),
+    Column("ends", LargeBinary(length=2**24), nullable=False),
+    Column("offsets", LargeBinary(length=2**24), nullable=False),
+    Column("words", Text(length=2**24), nullable=False),
+)
+
+Table(
+    "transcription_segments", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("lecture_id", String(36), ForeignKey("lectures.id"), nullable=False),
+    Column("position", Integer, nullable=False),
+    Column("object_key", String(255), nullable=False, unique=True),
+    Column("start_ms", Integer, nullable=False),
+    Column("end_ms", Integer, nullable=False),
+    Column("status", String(20), nullable=False),
+    Column("result", Text(length=2**24), nullable=True),
+    Index("ix_transcription_segments_lecture_position", "lecture_id", "position"),
+)
+
+Table(
+    "media_objects", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("content_hash", String(64), nullable=False),
+    Column("language", String(20), nullable=False),
+    Column("object_key", String(255), nullable=False, index=True),
+    Column("size", BigInteger, nullable=False),
+    Column("status", String(20), nullable=False),
+    Column("transcript", Text, nullable=True),
+    Column("result", Text(length=2**24), nullable=True),
+    Column("created_at", DateTime),
+    Column("last_used_at", DateTime),
+    Index("ix_media_objects_hash_language", "content_hash", "language", unique=True),
+)
+
+Table(
+    "action_items", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("type", String(50), nullable=False),
+    Column("content", Text, nullable=False),
+    Column("created_at", DateTime),
+    Column("due_date", DateTime, nullable=True),
+    Column("lecture_id", String(36), ForeignKey("lectures.id"), nullable=False),
+    Column("user_id", String(36), ForeignKey("users.id"), nullable=False),
+)
+
+Table(
+    "analysis_cache", metadata,
+    Column("key", String(64), primary_key=True),
+    Column("result", Text, nullable=False),
+    Column("size", Integer, nullable=False),
+    Column("hits", Integer),
+    Column("created_at", DateTime),
+    Column("last_used_at", DateTime, index=True),
+)
+
+Table(
+    "jobs", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("type", String(50), nullable=False),
+    Column("status", String(20), nullable=False),
+    Column("payload", Text, nullable=False),
+    Column("result", Text, nullable=True),
+    Column("error", Text, nullable=True),
+    Column("attempts", Integer, nullable=False),
+    Column("max_attempts", Integer, nullable=False),
+    Column("run_after", DateTime, nullable=False),
+    Column("locked_by", String(64), nullable=True),
+    Column("locked_at", DateTime, nullable=True),
+    Column("dedupe_key", String(255), unique=True, nullable=True),
+    Column("user_id", String(36), nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Index("ix_jobs_status_run_after", "status", "run_after"),
+)
+
+Table(
+    "general_chat_sessions", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("title", String(80), nullable=False),
+    Column("created_at", DateTime),
+    Column("user_id", String(36), ForeignKey("users.id"), nullable=False),
+)
+
+Table(
+    "general_messages", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("session_id", String(36), ForeignKey("general_chat_sessions.id"), nullable=False),
+    Column("role", String(50), nullable=False),
+    Column("content", Text, nullable=False),
+    Column("created_at", DateTime, server_default=func.now()),
+)
+
+Table(
+    "socratic_chat_sessions", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("title", String(80), nullable=False),
+    Column("created_at", DateTime),
+    Column("user_id", String(36), ForeignKey("users.id"), nullable=False),
+    Column("lecture_id", String(36), ForeignKey("lectures.id"), nullable=False),
+)
+
+Table(
+    "socratic_messages", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("session_id", String(36), ForeignKey("socratic_chat_sessions.id"), nullable=False),
+    Column("role", String(50), nullable=False),
+    Column("content", Text, nullable=False),
+    Column("created_at", DateTime, server_default=func.now()),
+)
+
+Table(
+    "notebook_pages", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("content", Text, nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("action_item_id", String(36), ForeignKey("action_items.id"), unique=True, nullable=False),
+)
+
+Table(
+    "external_notes", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("title", String(255), nullable=False),
+    Column("url", Text, nullable=False),
+    Column("type", String(50), nullable=False),
+    Column("created_at", DateTime),
+    Column("user_id", String(36), ForeignKey("users.id"), nullable=False),
+    Column("class_id", String(36), ForeignKey("classes.id"), nullable=True),
+    Column("lecture_id", String(36), ForeignKey("lectures.id"), nullable=True),
+)
+
+# databases created before migrations existed already have these tables; checkfirst skips them
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+
+def downgrade(conn):
+    raise MigrationError("The baseline can't be rolled back; use reset_database.py to start over")
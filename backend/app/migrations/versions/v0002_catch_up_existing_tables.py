@@ -0,0 +1,15 @@
+from app.migrations import add_column, create_index, drop_column, drop_index
+
+# create_all never altered tables that already existed, so older databases are missing
+# the chat summary columns and the lookup index on lectures.object_key
+def upgrade(conn):
+    for table in ("general_chat_sessions", "socratic_chat_sessions"):
+        add_column(conn, table, "summary", "TEXT NULL")
+        add_column(conn, table, "summarized_count", "INTEGER NOT NULL DEFAULT 0")
+    create_index(conn, "lectures", "ix_lectures_object_key", ["object_key"])
+
+def downgrade(conn):
+    drop_index(conn, "lectures", "ix_lectures_object_key")
+    for table in ("general_chat_sessions", "socratic_chat_sessions"):
+        drop_column(conn, table, "summarized_count")
+        drop_column(conn, table, "summary")
@@ -0,0 +1,24 @@
+from app.migrations import create_index, drop_index
+
+# (table, index, columns) for the filter + sort of the hottest reads: chat history, the per-user
+# list endpoints, a class's lectures, the reconciler's PROCESSING sweep and the GC schedule check
+INDEXES = [
+    ("general_messages", "ix_general_messages_session_created", ["session_id", "created_at"]),
+    ("socratic_messages", "ix_socratic_messages_session_created", ["session_id", "created_at"]),
+    ("classes", "ix_classes_user_created", ["user_id", "created_at"]),
+    ("action_items", "ix_action_items_user_created", ["user_id", "created_at"]),
+    ("action_items", "ix_action_items_lecture_created", ["lecture_id", "created_at"]),
+    ("general_chat_sessions", "ix_general_chat_sessions_user_created", ["user_id", "created_at"]),
+    ("socratic_chat_sessions", "ix_socratic_chat_sessions_user_created", ["user_id", "created_at"]),
+    ("lectures", "ix_lectures_class_created", ["class_id", "created_at"]),
+    ("lectures", "ix_lectures_status_created", ["status", "created_at"]),
+    ("jobs", "ix_jobs_type_created", ["type", "created_at"]),
+]
+
+def upgrade(conn):
+    for table, name, columns in INDEXES:
+        create_index(conn, table, name, columns)
+
+def downgrade(conn):
+    for table, name, _ in reversed(INDEXES):
+        drop_index(conn, table, name)
@@ -0,0 +1,65 @@
+from collections import Counter
+from sqlalchemy import Column, ForeignKey, Index, Integer, MetaData, String, Table, select
+from app.services.search import term_counts
+
+# the inverted index behind /lectures/search, backfilled from every existing lecture. The tables and
+# the rows read here are spelled out rather than taken from the models, which later migrations change
+metadata = MetaData()
+lectures = Table("lectures", metadata, Column("id", String(36), primary_key=True), Column("title", String(80)),
+                 Column("transcript", String), Column("class_id", String(36)))
+classes = Table("classes", metadata, Column("id", String(36), primary_key=True), Column("user_id", String(36)))
+lecture_chunks = Table("lecture_chunks", metadata, Column("lecture_id", String(36)), Column("position", Integer),
+                       Column("content", String))
+
+search_documents = Table(
+    "search_documents", metadata,
+    Column("lecture_id", String(36), ForeignKey("lectures.id"), primary_key=True),
+    Column("user_id", String(36), nullable=False),
+    Column("length", Integer, nullable=False),
+    Index("ix_search_documents_user_length", "user_id", "length"),
+)
+
+search_postings = Table(
+    "search_postings", metadata,
+    Column("user_id", String(36), primary_key=True),
+    Column("term", String(64), primary_key=True),
+    Column("lecture_id", String(36), ForeignKey("lectures.id"), primary_key=True),
+    Column("tf", Integer, nullable=False),
+    Column("title_tf", Integer, nullable=False),
+    Index("ix_search_postings_lecture", "lecture_id"),
+)
+
+def upgrade(conn):
+    search_documents.create(conn, checkfirst=True)
+    search_postings.create(conn, checkfirst=True)
+    # ids first: writing postings while a cursor over lectures is still open isn't safe on every driver
+    indexed = select(search_documents.c.lecture_id).where(search_documents.c.lecture_id == lectures.c.id)
+    pending = conn.execute(select(lectures.c.id).where(~indexed.exists())).scalars().all()
+    for lecture_id in pending:
+        lecture = conn.execute(
+            select(lectures.c.title, lectures.c.transcript, classes.c.user_id)
+            .join(classes, classes.c.id == lectures.c.class_id).where(lectures.c.id == lecture_id)
+        ).one()
+        chunks = conn.execute(select(lecture_chunks.c.content).where(lecture_chunks.c.lecture_id == lecture_id)
+                              .order_by(lecture_chunks.c.position)).scalars().all()
+        # lectures never chunked for retrieval get their whole transcript as one chunk
+        if not chunks and lecture.transcript:
+            chunks = [lecture.transcript]
+        body = Counter()
+        for chunk in chunks:
+            body.update(term_counts(chunk))
+        title = term_counts(lecture.title or "")
+        rows = [
+            {"user_id": lecture.user_id, "term": term, "lecture_id": lecture_id, "tf": body[term], "title_tf": title[term]}
+            for term in body.keys() | title.keys()
+        ]
+        # a run that died halfway may have left this lecture's postings without its document
+        conn.execute(search_postings.delete().where(search_postings.c.lecture_id == lecture_id))
+        if rows:
+            conn.execute(search_postings.insert(), rows)
+        conn.execute(search_documents.insert().values(
+            lecture_id=lecture_id, user_id=lecture.user_id, length=sum(body.values()) + sum(title.values())))
+
+def downgrade(conn):
+    search_postings.drop(conn, checkfirst=True)
+    search_documents.drop(conn, checkfirst=True)
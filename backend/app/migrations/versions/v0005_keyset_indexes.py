@@ -0,0 +1,27 @@
+from app.migrations import create_index, drop_index
+
+# the paginated list endpoints order by (created_at, id), so the id joins the 0003 indexes they
+# read from; (old index, new index, table, columns)
+INDEXES = [
+    ("ix_classes_user_created", "ix_classes_user_created_id", "classes", ["user_id", "created_at", "id"]),
+    ("ix_action_items_user_created", "ix_action_items_user_created_id", "action_items", ["user_id", "created_at", "id"]),
+    ("ix_general_chat_sessions_user_created", "ix_general_chat_sessions_user_created_id", "general_chat_sessions",
+     ["user_id", "created_at", "id"]),
+    ("ix_socratic_chat_sessions_user_created", "ix_socratic_chat_sessions_user_created_id", "socratic_chat_sessions",
+     ["user_id", "created_at", "id"]),
+    ("ix_general_messages_session_created", "ix_general_messages_session_created_id", "general_messages",
+     ["session_id", "created_at", "id"]),
+    ("ix_socratic_messages_session_created", "ix_socratic_messages_session_created_id", "socratic_messages",
+     ["session_id", "created_at", "id"]),
+]
+
+def upgrade(conn):
+    # the new index goes in before the old one comes out, so no query is left without one
+    for old, new, table, columns in INDEXES:
+        create_index(conn, table, new, columns)
+        drop_index(conn, table, old)
+
+def downgrade(conn):
+    for old, new, table, columns in reversed(INDEXES):
+        create_index(conn, table, old, columns[:-1])
+        drop_index(conn, table, new)
@@ -0,0 +1,51 @@
+from sqlalchemy import MetaData, Table, bindparam, case, select
+from app.migrations import add_column, create_index, drop_column, drop_index
+
+TABLES = ["general_messages", "socratic_messages"]
+BATCH_SIZE = 1000
+SESSION_BATCH_SIZE = 200
+
+# chat messages get an explicit order: the user and assistant rows of a turn share a second-precision
+# created_at and have random ids, so pages and model context could put a reply before its question
+def upgrade(conn):
+    for table in TABLES:
+        add_column(conn, table, "seq", "BIGINT NOT NULL DEFAULT 0")
+        backfill(conn, table)
+        create_index(conn, table, f"ix_{table}_session_seq", ["session_id", "seq", "id"])
+        drop_index(conn, table, f"ix_{table}_session_created_id")
+
+def backfill(conn, table: str):
+    # existing rows are numbered 1, 2, ... per session, user before assistant within a second; new rows
+    # take microsecond timestamps, which all sort after these. Sessions are taken a page at a time so
+    # a table of millions of messages never sits in memory at once
+    messages = Table(table, MetaData(), autoload_with=conn)
+    statement = messages.update().where(messages.c.id == bindparam("row_id")).values(seq=bindparam("position"))
+    last_session = None
+    while True:
+        sessions = select(messages.c.session_id).where(messages.c.seq == 0).distinct()\
+            .order_by(messages.c.session_id).limit(SESSION_BATCH_SIZE)
+        if last_session is not None:
+            sessions = sessions.where(messages.c.session_id > last_session)
+        session_ids = conn.execute(sessions).scalars().all()
+        if not session_ids:
+            return
+        last_session = session_ids[-1]
+        rows = conn.execute(
+            select(messages.c.id, messages.c.session_id)
+            .where(messages.c.seq == 0, messages.c.session_id.in_(session_ids)).order_by(
+                messages.c.session_id, messages.c.created_at, case((messages.c.role == "user", 0), else_=1), messages.c.id
+            )
+        ).all()
+        updates, session_id, position = [], None, 0
+        for row in rows:
+            position = position + 1 if row.session_id == session_id else 1
+            session_id = row.session_id
+            updates.append({"row_id": row.id, "position": position})
+        for start in range(0, len(updates), BATCH_SIZE):
+            conn.execute(statement, updates[start:start + BATCH_SIZE])
+
+def downgrade(conn):
+    for table in reversed(TABLES):
+        create_index(conn, table, f"ix_{table}_session_created_id", ["session_id", "created_at", "id"])
+        drop_index(conn, table, f"ix_{table}_session_seq")
+        drop_column(conn, table, "seq")
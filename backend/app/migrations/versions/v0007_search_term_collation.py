@@ -0,0 +1,12 @@
+from sqlalchemy import text
+
+# search terms are compared byte for byte; under the default utf8mb4 collations "café"/"cafe" or
+# "ß"/"ss" are equal and collide in the (user_id, term, lecture_id) primary key. SQLite compares
+# text as binary already
+def upgrade(conn):
+    if conn.dialect.name == "mysql":
+        conn.execute(text("ALTER TABLE search_postings MODIFY term VARCHAR(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL"))
+
+def downgrade(conn):
+    if conn.dialect.name == "mysql":
+        conn.execute(text("ALTER TABLE search_postings MODIFY term VARCHAR(64) NOT NULL"))
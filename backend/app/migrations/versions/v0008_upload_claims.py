@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, Index, MetaData, String, Table
+
+# upload-complete claims the object key here before creating its lecture
+metadata = MetaData()
+upload_claims = Table(
+    "upload_claims", metadata,
+    Column("object_key", String(255), primary_key=True),
+    Column("created_at", DateTime),
+    Index("ix_upload_claims_created_at", "created_at"),
+)
+
+def upgrade(conn):
+    upload_claims.create(conn, checkfirst=True)
+
+def downgrade(conn):
+    upload_claims.drop(conn, checkfirst=True)
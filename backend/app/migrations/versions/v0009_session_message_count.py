@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, MetaData, String, Table, func, select
+from app.migrations import add_column, drop_column
+
+# each chat session counts its messages, bumped in the same transaction as the insert, so checking a
+# cached context against the database is a primary-key read instead of a count over the history
+TABLES = [("general_chat_sessions", "general_messages"), ("socratic_chat_sessions", "socratic_messages")]
+SESSION_BATCH_SIZE = 500
+
+def upgrade(conn):
+    for sessions, messages in TABLES:
+        add_column(conn, sessions, "message_count", "INTEGER NOT NULL DEFAULT 0")
+        backfill(conn, sessions, messages)
+
+def backfill(conn, sessions_table: str, messages_table: str):
+    # recounted a page of sessions at a time, so a rerun after a failure simply counts again
+    metadata = MetaData()
+    sessions = Table(sessions_table, metadata, Column("id", String(36), primary_key=True),
+                     Column("message_count", Integer))
+    messages = Table(messages_table, metadata, Column("id", String(36), primary_key=True),
+                     Column("session_id", String(36)))
+    count = select(func.count(messages.c.id)).where(messages.c.session_id == sessions.c.id).scalar_subquery()
+    last_session = None
+    while True:
+        page = select(sessions.c.id).order_by(sessions.c.id).limit(SESSION_BATCH_SIZE)
+        if last_session is not None:
+            page = page.where(sessions.c.id > last_session)
+        session_ids = conn.execute(page).scalars().all()
+        if not session_ids:
+            return
+        last_session = session_ids[-1]
+        conn.execute(sessions.update().where(sessions.c.id.in_(session_ids)).values(message_count=count))
+
+def downgrade(conn):
+    for sessions, _ in reversed(TABLES):
+        drop_column(conn, sessions, "message_count")
@@ -0,0 +1,9 @@
+from app.migrations import add_column, drop_column
+
+# every saved timeline gets a fresh revision, so API processes can tell their cached copy is stale
+# after worker.py rewrites it. Existing rows keep NULL, which still matches until they are next written
+def upgrade(conn):
+    add_column(conn, "lecture_timelines", "revision", "VARCHAR(36) NULL")
+
+def downgrade(conn):
+    drop_column(conn, "lecture_timelines", "revision")
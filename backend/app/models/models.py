@@ -1,9 +1,24 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy import Column, Integer, BigInteger, String, Text, LargeBinary, ForeignKey, DateTime, Index, func
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import relationship, declarative_base, deferred
+import threading
+import time
 import uuid
 
 Base = declarative_base()
 
+message_seq_lock = threading.Lock()
+last_message_seq = 0
+
+def next_message_seq() -> int:
+    # microseconds since the epoch, strictly increasing within the process: the user and assistant rows of
+    # a turn are flushed together (often as one INSERT), so neither their timestamps nor their random ids
+    # can tell which came first
+    global last_message_seq
+    with message_seq_lock:
+        last_message_seq = max(last_message_seq + 1, time.time_ns() // 1000)
+        return last_message_seq
+
 class Class(Base):
     __tablename__ = "classes"
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -13,6 +28,7 @@ class Class(Base):
     user = relationship("User", back_populates="classes")    
     lectures = relationship("Lecture", back_populates="class_obj", cascade="all, delete-orphan")
     external_notes = relationship("ExternalNote", back_populates="class_obj", cascade="all, delete-orphan")
+    __table_args__ = (Index("ix_classes_user_created_id", "user_id", "created_at", "id"),)
     def __repr__(self):
         return f"<Class(id={self.id}, title='{self.title}')>"
 
@@ -20,19 +36,121 @@ class Lecture(Base):
     __tablename__ = "lectures"
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(String(80), nullable=False)
-    transcript = Column(Text, nullable=True)
-    object_key = Column(String(255), nullable=True)
+    # the large text columns load on first access (together), so lists and status checks never fetch them
+    transcript = deferred(Column(Text, nullable=True), group="content")
+    object_key = Column(String(255), nullable=True, index=True)
     status = Column(String(20), default="PROCESSING")
-    summary = Column(Text, nullable=True)
+    summary = deferred(Column(Text, nullable=True), group="content")
     created_at = Column(DateTime, default=func.now())
     class_id = Column(String(36), ForeignKey("classes.id"), nullable=False)
     class_obj = relationship("Class", back_populates="lectures")
     action_items = relationship("ActionItem", back_populates="lecture", cascade="all, delete-orphan")
     external_notes = relationship("ExternalNote", back_populates="lecture", cascade="all, delete-orphan")
     socratic_chat_sessions = relationship("SocraticChatSession", back_populates="lecture", cascade="all, delete-orphan")
+    chunks = relationship("LectureChunk", back_populates="lecture", cascade="all, delete-orphan", order_by="LectureChunk.position")
+    timeline = relationship("LectureTimeline", back_populates="lecture", uselist=False, cascade="all, delete-orphan")
+    transcription_segments = relationship("TranscriptionSegment", back_populates="lecture", cascade="all, delete-orphan", order_by="TranscriptionSegment.position")
+    search_document = relationship("SearchDocument", back_populates="lecture", uselist=False, cascade="all, delete-orphan")
+    search_postings = relationship("SearchPosting", back_populates="lecture", cascade="all, delete-orphan")
+    __table_args__ = (Index("ix_lectures_class_created", "class_id", "created_at"),
+                      Index("ix_lectures_status_created", "status", "created_at"))
     def __repr__(self):
         return f"<Lecture(id={self.id}, title='{self.title}')>"
 
+class LectureChunk(Base):
+    __tablename__ = "lecture_chunks"
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    lecture_id = Column(String(36), ForeignKey("lectures.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    lecture = relationship("Lecture", back_populates="chunks")
+    __table_args__ = (Index("ix_lecture_chunks_lecture_position", "lecture_id", "position"),)
+    def __repr__(self):
+        return f"<LectureChunk(lecture_id={self.lecture_id}, position={self.position})>"
+
+class SearchDocument(Base):
+    __tablename__ = "search_documents"
+    lecture_id = Column(String(36), ForeignKey("lectures.id"), primary_key=True)
+    # denormalized owner so ranking statistics never join through classes
+    user_id = Column(String(36), nullable=False)
+    length = Column(Integer, nullable=False, default=0)
+    lecture = relationship("Lecture", back_populates="search_document")
+    __table_args__ = (Index("ix_search_documents_user_length", "user_id", "length"),)
+    def __repr__(self):
+        return f"<SearchDocument(lecture_id={self.lecture_id}, length={self.length})>"
+
+class SearchPosting(Base):
+    __tablename__ = "search_postings"
+    # clustered by (user_id, term), so a query reads one contiguous range per term
+    user_id = Column(String(36), primary_key=True)
+    # compared byte for byte: the tables' case- and accent-insensitive collation would make distinct
+    # terms such as "café" and "cafe" collide as duplicate keys
+    term = Column(String(64).with_variant(mysql.VARCHAR(64, charset="utf8mb4", collation="utf8mb4_bin"), "mysql"),
+                  primary_key=True)
+    lecture_id = Column(String(36), ForeignKey("lectures.id"), primary_key=True)
+    tf = Column(Integer, nullable=False, default=0)
+    title_tf = Column(Integer, nullable=False, default=0)
+    lecture = relationship("Lecture", back_populates="search_postings")
+    __table_args__ = (Index("ix_search_postings_lecture", "lecture_id"),)
+    def __repr__(self):
+        return f"<SearchPosting(term='{self.term}', lecture_id={self.lecture_id}, tf={self.tf})>"
+
+class LectureTimeline(Base):
+    __tablename__ = "lecture_timelines"
+    lecture_id = Column(String(36), ForeignKey("lectures.id"), primary_key=True)
+    word_count = Column(Integer, nullable=False, default=0)
+    # packed little-endian uint32 arrays: word start/end in ms and each word's offset into `words`
+    starts = Column(LargeBinary(length=2**24), nullable=False)
+    ends = Column(LargeBinary(length=2**24), nullable=False)
+    offsets = Column(LargeBinary(length=2**24), nullable=False)
+    words = Column(Text(length=2**24), nullable=False)
+    # a fresh uuid on every save; cached timelines are checked against it
+    revision = Column(String(36), nullable=True)
+    lecture = relationship("Lecture", back_populates="timeline")
+    def __repr__(self):
+        return f"<LectureTimeline(lecture_id={self.lecture_id}, words={self.word_count})>"
+
+class TranscriptionSegment(Base):
+    __tablename__ = "transcription_segments"
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    lecture_id = Column(String(36), ForeignKey("lectures.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    object_key = Column(String(255), nullable=False, unique=True)
+    start_ms = Column(Integer, nullable=False)
+    end_ms = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="PROCESSING")
+    result = Column(Text(length=2**24), nullable=True)
+    lecture = relationship("Lecture", back_populates="transcription_segments")
+    __table_args__ = (Index("ix_transcription_segments_lecture_position", "lecture_id", "position"),)
+    def __repr__(self):
+        return f"<TranscriptionSegment(lecture_id={self.lecture_id}, position={self.position}, status='{self.status}')>"
+
+class UploadClaim(Base):
+    __tablename__ = "upload_claims"
+    # one row per object completed through upload-complete; the primary key makes completion a
+    # conditional insert, so two concurrent completions of the same upload can't both create a lecture
+    object_key = Column(String(255), primary_key=True)
+    created_at = Column(DateTime, default=func.now(), index=True)
+    def __repr__(self):
+        return f"<UploadClaim(object_key={self.object_key})>"
+
+class MediaObject(Base):
+    __tablename__ = "media_objects"
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # sha256 of the uploaded bytes; the same recording in another language is a separate transcription
+    content_hash = Column(String(64), nullable=False)
+    language = Column(String(20), nullable=False)
+    object_key = Column(String(255), nullable=False, index=True)
+    size = Column(BigInteger, nullable=False, default=0)
+    status = Column(String(20), nullable=False, default="PROCESSING")
+    transcript = Column(Text, nullable=True)
+    result = Column(Text(length=2**24), nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    last_used_at = Column(DateTime, default=func.now())
+    __table_args__ = (Index("ix_media_objects_hash_language", "content_hash", "language", unique=True),)
+    def __repr__(self):
+        return f"<MediaObject(content_hash={self.content_hash}, status='{self.status}')>"
+
 class ActionItem(Base):
     __tablename__ = "action_items"
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -45,18 +163,57 @@ class ActionItem(Base):
     lecture = relationship("Lecture", back_populates="action_items")
     user = relationship("User", back_populates="action_items")
     notebook_page = relationship("NotebookPage", back_populates="action_item", uselist=False, cascade="all, delete-orphan")
+    __table_args__ = (Index("ix_action_items_user_created_id", "user_id", "created_at", "id"),
+                      Index("ix_action_items_lecture_created", "lecture_id", "created_at"))
     def __repr__(self):
         return f"<ActionItem(id={self.id}, type='{self.type}')>"
 
 
+class AnalysisCacheEntry(Base):
+    __tablename__ = "analysis_cache"
+    key = Column(String(64), primary_key=True)
+    result = Column(Text, nullable=False)
+    size = Column(Integer, nullable=False)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=func.now())
+    last_used_at = Column(DateTime, default=func.now(), index=True)
+    def __repr__(self):
+        return f"<AnalysisCacheEntry(key={self.key}, hits={self.hits})>"
+
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    type = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="PENDING")
+    payload = Column(Text, nullable=False)
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False)
+    locked_by = Column(String(64), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    dedupe_key = Column(String(255), unique=True, nullable=True)
+    user_id = Column(String(36), nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),
+                      Index("ix_jobs_type_created", "type", "created_at"))
+    def __repr__(self):
+        return f"<Job(id={self.id}, type='{self.type}', status='{self.status}')>"
+
 class GeneralChatSession(Base):
     __tablename__ = "general_chat_sessions"
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(String(80), nullable=False, default="General Chat")
     created_at = Column(DateTime, default=func.now())
+    summary = Column(Text, nullable=True)
+    summarized_count = Column(Integer, nullable=False, default=0)
+    message_count = Column(Integer, nullable=False, default=0)
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
     user = relationship("User", back_populates="general_chat_sessions")
-    messages = relationship("GeneralMessage", back_populates="session", cascade="all, delete-orphan")
+    messages = relationship("GeneralMessage", back_populates="session", cascade="all, delete-orphan", order_by="GeneralMessage.seq")
+    __table_args__ = (Index("ix_general_chat_sessions_user_created_id", "user_id", "created_at", "id"),)
 
 class GeneralMessage(Base):
     __tablename__ = "general_messages"
@@ -65,18 +222,25 @@ class GeneralMessage(Base):
     role = Column(String(50), nullable=False) 
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
+    # conversation order; created_at only has second precision
+    seq = Column(BigInteger, nullable=False, default=next_message_seq)
     session = relationship("GeneralChatSession", back_populates="messages")
+    __table_args__ = (Index("ix_general_messages_session_seq", "session_id", "seq", "id"),)
 
 class SocraticChatSession(Base):
     __tablename__ = "socratic_chat_sessions"
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(String(80), nullable=False, default="Socratic Test")
     created_at = Column(DateTime, default=func.now())
+    summary = Column(Text, nullable=True)
+    summarized_count = Column(Integer, nullable=False, default=0)
+    message_count = Column(Integer, nullable=False, default=0)
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
     lecture_id = Column(String(36), ForeignKey("lectures.id"), nullable=False) 
     user = relationship("User", back_populates="socratic_chat_sessions")
     lecture = relationship("Lecture", back_populates="socratic_chat_sessions")
-    messages = relationship("SocraticMessage", back_populates="session", cascade="all, delete-orphan")
+    messages = relationship("SocraticMessage", back_populates="session", cascade="all, delete-orphan", order_by="SocraticMessage.seq")
+    __table_args__ = (Index("ix_socratic_chat_sessions_user_created_id", "user_id", "created_at", "id"),)
 
 class SocraticMessage(Base):
     __tablename__ = "socratic_messages"
@@ -85,7 +249,10 @@ class SocraticMessage(Base):
     role = Column(String(50), nullable=False) 
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
+    # conversation order; created_at only has second precision
+    seq = Column(BigInteger, nullable=False, default=next_message_seq)
     session = relationship("SocraticChatSession", back_populates="messages")
+    __table_args__ = (Index("ix_socratic_messages_session_seq", "session_id", "seq", "id"),)
 
 class User(Base):
     __tablename__ = "users"
@@ -106,7 +273,7 @@ class User(Base):
 class NotebookPage(Base):
     __tablename__ = "notebook_pages"
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    content = Column(Text, nullable=True, default="") 
+    content = deferred(Column(Text, nullable=True, default=""))
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     action_item_id = Column(String(36), ForeignKey("action_items.id"), unique=True, nullable=False)
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import Any, List, Optional
 from datetime import datetime
+import json
 import uuid
 
 class MessageBase(BaseModel):
@@ -22,6 +23,13 @@ class GeneralChatSession(GeneralChatSessionBase):
     created_at: datetime
     messages: List[Message] = []
 
+# session lists carry no messages; GET /chat/sessions/<id> pages through those
+class GeneralChatSessionListItem(GeneralChatSessionBase):
+    model_config = ConfigDict(from_attributes=True)
+    id: uuid.UUID
+    user_id: uuid.UUID
+    created_at: datetime
+
 class SocraticChatSessionBase(BaseModel):
     title: str
 
@@ -33,6 +41,13 @@ class SocraticChatSession(SocraticChatSessionBase):
     created_at: datetime
     messages: List[Message] = []
 
+class SocraticChatSessionListItem(SocraticChatSessionBase):
+    model_config = ConfigDict(from_attributes=True)
+    id: uuid.UUID
+    user_id: uuid.UUID
+    lecture_id: uuid.UUID
+    created_at: datetime
+
 class NotebookPageBase(BaseModel):
     content: Optional[str] = ""
 
@@ -93,6 +108,14 @@ class Lecture(LectureBase):
     action_items: List[ActionItem] = []
     external_notes: List[ExternalNote] = []
 
+# what list views send per lecture; the transcript, summary and nested items stay on the detail schema
+class LectureListItem(LectureBase):
+    model_config = ConfigDict(from_attributes=True)
+    id: uuid.UUID
+    created_at: datetime
+    class_id: uuid.UUID
+    status: str = "PROCESSING"
+
 class ClassBase(BaseModel):
     title: str
 
@@ -107,6 +130,30 @@ class Class(ClassBase):
     lectures: List[Lecture] = []
     external_notes: List[ExternalNote] = []
 
+class ClassListItem(ClassBase):
+    model_config = ConfigDict(from_attributes=True)
+    id: uuid.UUID
+    user_id: uuid.UUID
+    created_at: datetime
+    lectures: List[LectureListItem] = []
+
+class Job(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: uuid.UUID
+    type: str
+    status: str
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    result: Optional[Any] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    @field_validator("result", mode="before")
+    @classmethod
+    def parse_result(cls, value):
+        return json.loads(value) if isinstance(value, str) else value
+
 class UserUpdateUsername(BaseModel):
     username: str
 
@@ -1,10 +1,57 @@
 import requests
 import json
+import re
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
 from app.core.config import Config
-from app.services.storage import StorageService
+from app.core.signing import sign
+from app.services.storage import get_storage
+from app.services.clova_client import RETRY_STATUSES, get_clova_client
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。！？])\s+|\n+")
+
+class AIStreamError(Exception):
+    pass
+
+class DeltaAssembler:
+    def __init__(self):
+        self.parts = []
+        self.length = 0
+
+    def add_token(self, content: str) -> str:
+        self.parts.append(content)
+        self.length += len(content)
+        return content
+
+    def add_result(self, content: str) -> str:
+        # the closing "result" event repeats the whole answer; only forward the unseen tail
+        text = self.text()
+        if content.startswith(text):
+            delta = content[self.length:]
+        else:
+            delta = ""
+        self.parts = [content]
+        self.length = len(content)
+        return delta
+
+    def text(self) -> str:
+        if len(self.parts) > 1:
+            self.parts = ["".join(self.parts)]
+        return self.parts[0] if self.parts else ""
 
 class AIService:
+    ANALYSIS_PARAMS = {
+        "maxTokens": 2048,
+        "temperature": 0.5,
+        "includeAiFilters": True
+    }
+    SUMMARY_PARAMS = {
+        "maxTokens": 512,
+        "temperature": 0.3,
+        "includeAiFilters": True
+    }
+
     @staticmethod
     def generate_request_id():
         return str(uuid.uuid4()).replace("-", "")
@@ -43,15 +90,23 @@ class AIService:
             'fullText': True,
             'diarization': {'enable': False},
         }
+        if Config.CLOVA_SPEECH_CALLBACK_URL:
+            request_body['callback'] = f"{Config.CLOVA_SPEECH_CALLBACK_URL}?{urlencode({'key': data_key, 'sig': sign(data_key)})}"
 
         try:
             print(f"Triggering Async Clova Speech for: {data_key}...")
-            response = requests.post(
+            response = get_clova_client().post(
                 url=api_url,
                 headers=headers,
                 data=json.dumps(request_body).encode('UTF-8')
             )
             
+            if response.status_code in RETRY_STATUSES:
+                # not sent again: after a 500, 502 or 504 the job may exist already and a second trigger
+                # would transcribe (and bill) the recording twice. The lecture fails instead; a result
+                # that still turns up only finds it FAILED and is dropped
+                print(f"Clova Speech trigger for {data_key} failed with {response.status_code}")
+                raise Exception(f"Audio transcription trigger failed with status {response.status_code}")
             if response.status_code != 200:
                 print(f"Clova Error: {response.status_code} - {response.text}")
                 raise Exception(f"Clova API Error: {response.text}")
@@ -66,31 +121,21 @@ class AIService:
             raise Exception(f"Audio transcription trigger failed: {e}")
         
     @staticmethod
-    def check_transcription_result(data_key: str) -> str:
-        storage = StorageService()
+    def fetch_transcription_result(data_key: str) -> dict:
+        storage = get_storage()
         
         try:
-            response = storage.s3_client.list_objects_v2(
-                Bucket=storage.bucket_name, 
-                Prefix=data_key
-            )
-            
-            if 'Contents' not in response:
-                return None
-
-            for obj in response['Contents']:
-                file_key = obj['Key']
+            for file_key in storage.list_keys(data_key):
                 
                 if file_key.endswith('.json') and data_key in file_key:
                     
                     print(f"Found transcription result: {file_key}")
                     
-                    file_obj = storage.s3_client.get_object(Bucket=storage.bucket_name, Key=file_key)
-                    content = file_obj['Body'].read().decode('utf-8')
+                    content = storage.read_bytes(file_key).decode('utf-8')
                     result_json = json.loads(content)
 
                     if 'text' in result_json:
-                        return result_json['text']
+                        return result_json
             
             return None
 
@@ -99,7 +144,7 @@ class AIService:
             return None
 
     @staticmethod
-    def analyze_transcript(transcript: str):
+    def complete(messages: list, params: dict, priority: str = "analysis") -> str:
         url = f"{Config.CLOVA_API_HOST}/v3/chat-completions/{Config.CLOVA_MODEL}"
         headers = {
             "Authorization": f"Bearer {Config.CLOVA_API_KEY}",
@@ -108,43 +153,108 @@ class AIService:
             "Accept": "application/json", 
         }
 
+        payload = {
+            "messages": AIService.format_messages_for_api(messages),
+            **params
+        }
+
+        response = get_clova_client().post(url, priority=priority, idempotent=True, headers=headers, json=payload)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("result", {}).get("message", {}).get("content", "")
+
+    @staticmethod
+    def request_analysis(transcript: str):
         messages = [
             {"role": "system", "content": Config.ANALYSIS_PROMPT},
             {"role": "user", "content": transcript}
         ]
         
-        payload = {
-            "messages": AIService.format_messages_for_api(messages),
-            "maxTokens": 2048, 
-            "temperature": 0.5,
-            "includeAiFilters": True
-        }
+        ai_content = AIService.complete(messages, AIService.ANALYSIS_PARAMS) or "{}"
+        
+        if "```" in ai_content:
+            ai_content = ai_content.replace("```json", "").replace("```", "").strip()
+        start_index = ai_content.find('{')
+        end_index = ai_content.rfind('}')
+        if start_index != -1 and end_index != -1:
+            ai_content = ai_content[start_index : end_index + 1]
+
+        return json.loads(ai_content, strict=False)
+
+    @staticmethod
+    def summarize_conversation(previous_summary: str, messages: list) -> str:
+        conversation = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        prompt = [
+            {"role": "system", "content": Config.SUMMARY_PROMPT},
+            {"role": "user", "content": f"[PREVIOUS SUMMARY]\n{previous_summary or '(none)'}\n\n[NEW MESSAGES]\n{conversation}"}
+        ]
+        return AIService.complete(prompt, AIService.SUMMARY_PARAMS, priority="batch").strip()
 
-        default_response = {"summary": "Error: Could not generate analysis.", "action_items": []}
+    @staticmethod
+    def split_transcript(transcript: str, max_chars: int) -> list:
+        chunks = []
+        current = []
+        current_len = 0
+        for sentence in SENTENCE_BOUNDARY.split(transcript):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            # a single run-on sentence longer than a chunk is cut on whitespace
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                if cut <= 0:
+                    cut = max_chars
+                if current:
+                    chunks.append(" ".join(current))
+                    current, current_len = [], 0
+                chunks.append(sentence[:cut].strip())
+                sentence = sentence[cut:].strip()
+            if current and current_len + len(sentence) + 1 > max_chars:
+                chunks.append(" ".join(current))
+                current, current_len = [], 0
+            if sentence:
+                current.append(sentence)
+                current_len += len(sentence) + 1
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
 
+    @staticmethod
+    def merge_analyses(results: list) -> dict:
+        summaries = []
+        action_items = []
+        seen = set()
+        for result in results:
+            summary = (result.get("summary") or "").strip()
+            if summary:
+                summaries.append(summary)
+            for item in result.get("action_items", []):
+                key = " ".join(item.get("content", "").split()).lower()
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                action_items.append(item)
+        return {"summary": "\n\n".join(summaries), "action_items": action_items}
+
+    @staticmethod
+    def analyze_transcript(transcript: str):
         try:
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            
-            ai_content = data.get("result", {}).get("message", {}).get("content", "{}")
-            
-            if "```" in ai_content:
-                ai_content = ai_content.replace("```json", "").replace("```", "").strip()
-            start_index = ai_content.find('{')
-            end_index = ai_content.rfind('}')
-            if start_index != -1 and end_index != -1:
-                ai_content = ai_content[start_index : end_index + 1]
+            chunks = AIService.split_transcript(transcript, Config.ANALYSIS_CHUNK_CHARS)
+            if len(chunks) <= 1:
+                return AIService.request_analysis(transcript)
 
-            analysis_data = json.loads(ai_content, strict=False)            
-            return analysis_data
+            print(f"Analyzing transcript in {len(chunks)} chunks...")
+            workers = min(Config.ANALYSIS_MAX_WORKERS, len(chunks))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(AIService.request_analysis, chunks))
+            return AIService.merge_analyses(results)
 
         except Exception as e:
             print(f"Analysis Error: {e}")
-            return {"summary": f"DEBUG ERROR: {str(e)}", "action_items": []}
+            return {"summary": f"DEBUG ERROR: {str(e)}", "action_items": [], "error": str(e)}
 
     @staticmethod
-    def get_socratic_response(messages: list):
+    def stream_chat_response(messages: list, assembler: "DeltaAssembler"):
         url = f"{Config.CLOVA_API_HOST}/v3/chat-completions/{Config.CLOVA_MODEL}"
         headers = {
             "Authorization": f"Bearer {Config.CLOVA_API_KEY}",
@@ -163,47 +273,54 @@ class AIService:
             "includeAiFilters": True
         }
 
-        output_text = ""
-        
+        with get_clova_client().post(url, priority="interactive", idempotent=True, headers=headers, json=payload,
+                                     stream=True, timeout=30) as r:
+            r.raise_for_status()
+            event = None
+            for line in r.iter_lines():
+                if not line:
+                    event = None
+                    continue
+                decoded = line.decode("utf-8-sig").strip()
+                if decoded.startswith("event:"):
+                    event = decoded[6:].strip()
+                    continue
+                if not decoded.startswith("data:"):
+                    continue
+
+                json_str = decoded[5:].strip()
+                if json_str == "[DONE]":
+                    break
+                try:
+                    data = json.loads(json_str)
+                except json.JSONDecodeError:
+                    continue
+
+                if event == "error" or "error" in data:
+                    raise AIStreamError(f"AI Error: {data}")
+
+                content = data.get("message", {}).get("content", "")
+                if not content:
+                    continue
+
+                if event == "result":
+                    delta = assembler.add_result(content)
+                else:
+                    delta = assembler.add_token(content)
+                if delta:
+                    yield delta
+
+    @staticmethod
+    def get_socratic_response(messages: list):
+        assembler = DeltaAssembler()
         try:
-            with requests.post(url, headers=headers, json=payload, stream=True, timeout=30) as r:
-                r.raise_for_status()
-                for line in r.iter_lines():
-                    if line:
-                        decoded = line.decode("utf-8-sig").strip()
-                        if decoded.startswith("data:"):
-                            json_str = decoded[5:].strip()
-                            if json_str == "[DONE]":
-                                break
-                            try:
-                                data = json.loads(json_str)
-                                if "error" in data:
-                                    print(f"AI Error: {data}")
-                                    return "Error from AI."
-
-                                message = data.get("message", {})
-                                content = message.get("content", "")
-                                
-                                if content:
-                                    if len(content) > len(output_text) and content.startswith(output_text):
-                                        output_text = content
-                                    elif content == output_text:
-                                        pass
-
-                                    elif len(content) > 5 and output_text.endswith(content):
-                                        pass
-                                        
-                                    else:
-                                        output_text += content
-                                        
-                            except json.JSONDecodeError:
-                                continue
-                            except Exception as e:
-                                print(f"Stream Error: {e}")
-                                continue
-                                
+            for _ in AIService.stream_chat_response(messages, assembler):
+                pass
+        except AIStreamError as e:
+            print(e)
+            return "Error from AI."
         except Exception as e:
             print(f"Connection Error: {e}")
             return "I'm dead, please contact my boss discord: nam.1353 ."
 
-        return output_text.strip()
\ No newline at end of file
+        return assembler.text().strip()
\ No newline at end of file
@@ -0,0 +1,59 @@
+import hashlib
+import json
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from app.core.config import Config
+from app.models.models import AnalysisCacheEntry
+from app.services.ai_client import AIService
+
+class AnalysisCache:
+    @staticmethod
+    def make_key(transcript: str) -> str:
+        material = json.dumps(
+            [transcript, Config.ANALYSIS_PROMPT, Config.CLOVA_MODEL, AIService.ANALYSIS_PARAMS,
+             Config.ANALYSIS_CHUNK_CHARS],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get(db, key: str):
+        entry = db.query(AnalysisCacheEntry).filter_by(key=key).first()
+        if not entry:
+            return None
+        entry.hits = (entry.hits or 0) + 1
+        entry.last_used_at = datetime.utcnow()
+        return json.loads(entry.result)
+
+    @staticmethod
+    def put(db, key: str, analysis: dict):
+        result = json.dumps(analysis, ensure_ascii=False)
+        try:
+            with db.begin_nested():
+                db.add(AnalysisCacheEntry(
+                    key=key, result=result, size=len(result.encode("utf-8")), hits=0, last_used_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # another worker cached the same analysis first
+            return
+        AnalysisCache.evict(db)
+
+    @staticmethod
+    def evict(db):
+        # the budget is on stored bytes: one long lecture's analysis can outweigh hundreds of short ones
+        excess = (db.query(func.sum(AnalysisCacheEntry.size)).scalar() or 0) - Config.ANALYSIS_CACHE_MAX_BYTES
+        if excess <= 0:
+            return
+        stale_keys = []
+        # keys and sizes only, read up front so no cursor is open while the deletes run
+        for row in db.query(AnalysisCacheEntry.key, AnalysisCacheEntry.size)\
+                .order_by(AnalysisCacheEntry.last_used_at.asc()).all():
+            stale_keys.append(row.key)
+            excess -= row.size
+            if excess <= 0:
+                break
+        for start in range(0, len(stale_keys), 500):
+            db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.key.in_(stale_keys[start:start + 500]))\
+                .delete(synchronize_session=False)
@@ -0,0 +1,83 @@
+import io
+import wave
+
+def plan_segments(total_frames: int, rate: int, segment_seconds: float, overlap_seconds: float) -> list:
+    length = int(segment_seconds * rate)
+    step = length - int(overlap_seconds * rate)
+    if step <= 0:
+        raise ValueError("Segment overlap must be shorter than the segment")
+
+    plan = []
+    start = 0
+    while True:
+        plan.append((start, min(length, total_frames - start)))
+        if start + length >= total_frames:
+            return plan
+        start += step
+
+class SequentialReader:
+    # hides tell()/seek() so wave reads a network body front to back instead of trying to seek it
+    def __init__(self, body):
+        self.body = body
+
+    def read(self, size: int = -1) -> bytes:
+        return self.body.read(size if size >= 0 else None)
+
+def split_wav(file_obj, segment_seconds: float, overlap_seconds: float):
+    # yields (start_ms, end_ms, wav bytes) for recordings longer than one segment, nothing otherwise;
+    # the input is read once, front to back, carrying only the overlap between segments
+    try:
+        reader = wave.open(SequentialReader(file_obj), 'rb')
+    except (wave.Error, EOFError):
+        return
+    with reader:
+        params = reader.getparams()
+        rate = reader.getframerate()
+        frame_size = reader.getsampwidth() * reader.getnchannels()
+        plan = plan_segments(reader.getnframes(), rate, segment_seconds, overlap_seconds)
+        if len(plan) < 2:
+            return
+
+        carried = b""
+        position = 0
+        for index, (start, count) in enumerate(plan):
+            frames = carried + reader.readframes(start + count - position)
+            position = start + count
+            next_start = plan[index + 1][0] if index + 1 < len(plan) else position
+            carried = frames[(next_start - start) * frame_size:]
+
+            buffer = io.BytesIO()
+            with wave.open(buffer, 'wb') as writer:
+                writer.setparams(params)
+                writer.writeframes(frames)
+            yield start * 1000 // rate, position * 1000 // rate, buffer.getvalue()
+
+def stitch_results(parts: list) -> dict:
+    # parts are (start_ms, end_ms, result) in order; word times move onto the recording's clock and
+    # each overlap is cut at its midpoint, earlier segment before it and later one after, so a word
+    # spoken inside the overlap is kept once
+    cuts = [0]
+    for (_, previous_end, _), (start, _, _) in zip(parts, parts[1:]):
+        cuts.append((start + previous_end) // 2)
+    cuts.append(float("inf"))
+
+    segments = []
+    texts = []
+    for index, (start_ms, end_ms, result) in enumerate(parts):
+        lower, upper = cuts[index], cuts[index + 1]
+        words = [
+            [start_ms + int(word_start), start_ms + int(word_end), word]
+            for segment in result.get('segments') or []
+            for word_start, word_end, word in segment.get('words') or []
+            if lower <= start_ms + int(word_start) < upper
+        ]
+        if words:
+            text = " ".join(word.strip() for _, _, word in words)
+        else:
+            # no word alignment for this part, so its overlap can't be trimmed
+            text = (result.get('text') or "").strip()
+        if text:
+            texts.append(text)
+        segments.append({"start": max(start_ms, lower), "end": min(end_ms, upper), "text": text, "words": words})
+
+    return {"result": "COMPLETED", "text": " ".join(texts), "segments": segments}
@@ -0,0 +1,142 @@
+from sqlalchemy import literal
+from app.core.config import Config
+from app.models.models import GeneralChatSession, GeneralMessage, Lecture, SocraticChatSession, SocraticMessage
+from app.services.ai_client import AIService
+from app.services.context_cache import ChatContext, context_cache
+from app.services.jobs import JobQueue, job_handler
+
+SESSION_MODELS = {
+    "GENERAL": (GeneralChatSession, GeneralMessage),
+    "SOCRATIC": (SocraticChatSession, SocraticMessage),
+}
+
+def estimate_tokens(text: str) -> int:
+    # Hangul/CJK is roughly one token per character, latin text about four characters per token
+    if not text:
+        return 0
+    wide = sum(1 for ch in text if ord(ch) > 0x2E7F)
+    return wide + (len(text) - wide) // 4 + 4
+
+def pack_history(system_content: str, summary: str, recent: list, user_msg: str, budget: int, passages: list = None):
+    if passages:
+        system_content = f"{system_content}\n\n[RELEVANT LECTURE PASSAGES]\n" + "\n---\n".join(passages)
+    if summary:
+        system_content = f"{system_content}\n\n[EARLIER IN THIS CONVERSATION]\n{summary}"
+
+    used = estimate_tokens(system_content) + estimate_tokens(user_msg)
+    packed = []
+    for message in reversed(recent):
+        cost = estimate_tokens(message["content"])
+        if used + cost > budget:
+            break
+        packed.append(message)
+        used += cost
+    packed.reverse()
+
+    history = [{"role": "system", "content": system_content}] + packed + [{"role": "user", "content": user_msg}]
+    return history, len(packed)
+
+def context_version(db, mode: str, session_id: str, user_id: str) -> tuple:
+    # what other processes change under a cached context: turns appended by other API workers, summaries
+    # folded and lecture analyses written by worker.py. One primary-key read per turn, None if the
+    # session isn't the user's
+    session_model, _ = SESSION_MODELS[mode]
+    if mode == "SOCRATIC":
+        query = db.query(session_model.summarized_count, session_model.message_count, Lecture.summary)\
+            .outerjoin(Lecture, Lecture.id == session_model.lecture_id)
+    else:
+        query = db.query(session_model.summarized_count, session_model.message_count, literal(None))
+    row = query.filter(session_model.id == session_id, session_model.user_id == user_id).first()
+    return (row[0] or 0, row[1] or 0, row[2]) if row else None
+
+def current_context(db, mode: str, session_id: str, user_id: str):
+    # returns (cached context or None, version); a None version means the session doesn't exist
+    version = context_version(db, mode, session_id, user_id)
+    if version is None:
+        return None, None
+    context = context_cache.get(mode, session_id)
+    if context is not None and not context.matches(version):
+        context_cache.invalidate(mode, session_id)
+        context = None
+    return context, version
+
+def load_context(db, mode: str, session, system_content: str, version: tuple = None) -> ChatContext:
+    _, message_model = SESSION_MODELS[mode]
+    # read the version before the messages: a turn landing in between then makes the cached
+    # context look stale (and reload), never fresh with a message missing
+    if version is None:
+        version = context_version(db, mode, session.id, session.user_id)
+    msgs = db.query(message_model).filter_by(session_id=session.id)\
+        .order_by(message_model.seq.desc(), message_model.id.desc()).limit(Config.CHAT_HISTORY_MAX_MESSAGES).all()
+    msgs.reverse()
+
+    context = ChatContext(
+        session_id=session.id,
+        user_id=session.user_id,
+        lecture_id=getattr(session, "lecture_id", None),
+        system_content=system_content,
+        summary=session.summary,
+        summarized_count=session.summarized_count,
+        total=version[1],
+        recent=[{"role": m.role, "content": m.content} for m in msgs],
+        lecture_summary=version[2] if version else None,
+    )
+    context_cache.put(mode, context)
+    return context
+
+def build_chat_history(db, mode: str, context: ChatContext, user_msg: str, passages: list = None) -> list:
+    history, window = pack_history(context.system_content, context.summary, list(context.recent), user_msg,
+                                   Config.CHAT_CONTEXT_TOKEN_BUDGET, passages)
+    if not context.summary_requested:
+        schedule_summary(db, mode, context, context.total - window)
+    return history
+
+def save_turn(db, mode: str, session_id: str, user_msg: str, ai_text: str):
+    # the caller commits; the session's message_count moves in the same transaction as the rows it counts
+    session_model, message_model = SESSION_MODELS[mode]
+    db.add(message_model(session_id=session_id, role="user", content=user_msg))
+    db.add(message_model(session_id=session_id, role="assistant", content=ai_text))
+    db.query(session_model).filter(session_model.id == session_id)\
+        .update({session_model.message_count: session_model.message_count + 2}, synchronize_session=False)
+
+def record_turn(mode: str, session_id: str, user_msg: str, ai_text: str):
+    context_cache.append(mode, session_id, [
+        {"role": "user", "content": user_msg},
+        {"role": "assistant", "content": ai_text},
+    ])
+
+def schedule_summary(db, mode: str, context: ChatContext, outside_window: int):
+    if outside_window - context.summarized_count < Config.CHAT_SUMMARY_BATCH:
+        return
+    JobQueue.enqueue(db, "summarize_chat_session", {"mode": mode, "session_id": context.session_id},
+                     user_id=context.user_id, dedupe_key=f"summarize_chat_session:{mode}:{context.session_id}")
+    # the summary lands in another process; the cached context notices through summarized_count
+    context_cache.mark_summary_requested(mode, context.session_id)
+
+@job_handler("summarize_chat_session")
+def summarize_chat_session_job(db, payload: dict) -> dict:
+    session_model, message_model = SESSION_MODELS[payload["mode"]]
+    session = db.query(session_model).filter_by(id=payload["session_id"]).first()
+    if not session:
+        return {"summarized_count": 0}
+
+    start = session.summarized_count or 0
+    fold = session.message_count - start - Config.CHAT_SUMMARY_KEEP_RECENT
+    if fold <= 0:
+        return {"summarized_count": start}
+
+    msgs = db.query(message_model).filter_by(session_id=session.id)\
+        .order_by(message_model.seq.asc(), message_model.id.asc()).offset(start).limit(fold).all()
+    summary = AIService.summarize_conversation(session.summary, [{"role": m.role, "content": m.content} for m in msgs])
+    if not summary:
+        raise Exception("Empty conversation summary")
+
+    # only advance if nobody else folded these messages in the meantime
+    updated = db.query(session_model).filter(
+        session_model.id == session.id,
+        session_model.summarized_count == start,
+    ).update({session_model.summary: summary, session_model.summarized_count: start + len(msgs)},
+             synchronize_session=False)
+    db.commit()
+    context_cache.invalidate(payload["mode"], session.id)
+    return {"summarized_count": start + len(msgs) if updated else start}
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.core.config import Config
+from app.services.scheduler import scheduler
+
+# 429 is left to post() so the shared scheduler hears about it
+RETRY_STATUSES = (500, 502, 503, 504)
+# a 503 turns the request away before it is processed, so even a call that starts something (the
+# speech trigger) can be sent again; after a 500, 502 or 504 it may already have taken effect
+UNPROCESSED_STATUSES = (503,)
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # half-open: let a single probe through, re-arm for everyone else
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    print(f"Circuit opened after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+
+class ClovaClient:
+    def __init__(self):
+        # the adapter only retries server errors for GETs; post() decides per call whether a POST is
+        # safe to send twice. Failed connects are retried either way, nothing was sent yet
+        retry = Retry(
+            total=Config.CLOVA_MAX_RETRIES,
+            read=0,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            backoff_factor=Config.CLOVA_RETRY_BACKOFF,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=Config.CLOVA_POOL_CONNECTIONS,
+            pool_maxsize=Config.CLOVA_POOL_MAXSIZE,
+            max_retries=retry,
+            pool_block=True,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = (Config.CLOVA_CONNECT_TIMEOUT, Config.CLOVA_READ_TIMEOUT)
+        self.breakers = {}
+        self.breakers_lock = threading.Lock()
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        with self.breakers_lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(Config.CLOVA_BREAKER_THRESHOLD, Config.CLOVA_BREAKER_COOLDOWN)
+            return self.breakers[host]
+
+    def post(self, url: str, priority: str = None, idempotent: bool = False, **kwargs) -> requests.Response:
+        # idempotent: the call has no effect beyond its response (a chat completion), so any 5xx is retried
+        breaker = self.breaker_for(url)
+        retry_statuses = RETRY_STATUSES if idempotent else UNPROCESSED_STATUSES
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}, request skipped.")
+
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            if priority:
+                scheduler.acquire(Config.CLOVA_API_KEY, priority)
+            try:
+                response = self.session.post(url, **kwargs)
+            except requests.exceptions.RequestException:
+                breaker.record_failure()
+                raise
+
+            retryable = response.status_code == 429 or response.status_code in retry_statuses
+            if not retryable or attempt >= Config.CLOVA_MAX_RETRIES:
+                break
+
+            retry_after = retry_after_seconds(response, Config.CLOVA_RETRY_BACKOFF * (2 ** attempt))
+            response.close()
+            attempt += 1
+            if response.status_code == 429:
+                print(f"Clova rate limited, retrying in {retry_after:.1f}s (attempt {attempt})")
+                if priority:
+                    scheduler.penalize(Config.CLOVA_API_KEY, retry_after)
+                else:
+                    time.sleep(retry_after)
+            else:
+                print(f"Clova returned {response.status_code}, retrying in {retry_after:.1f}s (attempt {attempt})")
+                time.sleep(retry_after)
+
+        if response.status_code in RETRY_STATUSES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+def retry_after_seconds(response: requests.Response, default: float) -> float:
+    value = response.headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+    return default
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+def get_clova_client() -> ClovaClient:
+    global _client, _client_pid
+    # gunicorn forks workers after import, so the pool is rebuilt once per worker pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = ClovaClient()
+                _client_pid = os.getpid()
+    return _client
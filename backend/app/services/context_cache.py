@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from app.core.config import Config
+
+class ChatContext:
+    def __init__(self, session_id, user_id, lecture_id, system_content, summary, summarized_count, total, recent,
+                 lecture_summary=None):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.lecture_id = lecture_id
+        self.system_content = system_content
+        self.lecture_summary = lecture_summary
+        self.summary = summary
+        self.summarized_count = summarized_count or 0
+        self.total = total
+        self.recent = deque(recent, maxlen=Config.CHAT_HISTORY_MAX_MESSAGES)
+        self.summary_requested = False
+        self.expires_at = time.monotonic() + Config.CHAT_CONTEXT_CACHE_TTL
+
+    def copy(self):
+        clone = ChatContext(self.session_id, self.user_id, self.lecture_id, self.system_content,
+                            self.summary, self.summarized_count, self.total, list(self.recent), self.lecture_summary)
+        clone.summary_requested = self.summary_requested
+        clone.expires_at = self.expires_at
+        return clone
+
+    def matches(self, version: tuple) -> bool:
+        # version is (summarized_count, message count, lecture summary) as chat_context.context_version reads it
+        return (self.summarized_count, self.total, self.lecture_summary) == version
+
+class ContextCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.by_lecture = {}
+        self.lock = threading.Lock()
+
+    def get(self, mode: str, session_id: str):
+        key = (mode, session_id)
+        with self.lock:
+            context = self.entries.get(key)
+            if context is None:
+                return None
+            if context.expires_at < time.monotonic():
+                self._drop(key)
+                return None
+            self.entries.move_to_end(key)
+            return context.copy()
+
+    def put(self, mode: str, context: ChatContext):
+        key = (mode, context.session_id)
+        with self.lock:
+            self._drop(key)
+            self.entries[key] = context.copy()
+            if context.lecture_id:
+                self.by_lecture.setdefault(context.lecture_id, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+
+    def append(self, mode: str, session_id: str, messages: list):
+        with self.lock:
+            context = self.entries.get((mode, session_id))
+            if context is not None:
+                context.recent.extend(messages)
+                context.total += len(messages)
+
+    def mark_summary_requested(self, mode: str, session_id: str):
+        with self.lock:
+            context = self.entries.get((mode, session_id))
+            if context is not None:
+                context.summary_requested = True
+
+    def invalidate(self, mode: str, session_id: str):
+        with self.lock:
+            self._drop((mode, session_id))
+
+    def invalidate_lecture(self, lecture_id: str):
+        with self.lock:
+            for key in list(self.by_lecture.get(lecture_id, ())):
+                self._drop(key)
+
+    def _drop(self, key):
+        context = self.entries.pop(key, None)
+        if context is not None and context.lecture_id:
+            keys = self.by_lecture.get(context.lecture_id)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self.by_lecture[context.lecture_id]
+
+context_cache = ContextCache(Config.CHAT_CONTEXT_CACHE_SIZE)
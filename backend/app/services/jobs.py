@@ -0,0 +1,165 @@
+import json
+import traceback
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from app.core.config import Config
+from app.core.database import SessionLocal
+from app.models.models import Job
+
+JOB_HANDLERS = {}
+
+def job_handler(job_type: str):
+    def register(fn):
+        JOB_HANDLERS[job_type] = fn
+        return fn
+    return register
+
+def load_handlers():
+    # handler modules register themselves on import
+    import app.services.lecture_analysis  # noqa: F401
+    import app.services.chat_context  # noqa: F401
+    import app.services.reconciler  # noqa: F401
+    import app.services.storage_gc  # noqa: F401
+    import app.services.transcription  # noqa: F401
+
+class JobQueue:
+    @staticmethod
+    def enqueue(db, job_type: str, payload: dict, user_id: str = None, max_attempts: int = None,
+                dedupe_key: str = None) -> Job:
+        # an unfinished job with the same dedupe_key is returned instead of queueing a twin;
+        # the unique constraint settles races between workers
+        if dedupe_key:
+            existing = db.query(Job).filter_by(dedupe_key=dedupe_key).first()
+            if existing and existing.status == "DEAD":
+                # a dead job keeps its key, so asking for the same work again puts it back on the
+                # queue rather than queueing a twin next to it; it counts as created now, as a new
+                # job would, so interval checks on created_at still hold
+                JobQueue.revive(db, existing, payload=json.dumps(payload),
+                                max_attempts=max_attempts or Config.JOB_MAX_ATTEMPTS, created_at=datetime.utcnow())
+                db.refresh(existing)
+            if existing:
+                return existing
+
+        job = Job(
+            type=job_type,
+            status="PENDING",
+            payload=json.dumps(payload),
+            attempts=0,
+            max_attempts=max_attempts or Config.JOB_MAX_ATTEMPTS,
+            run_after=datetime.utcnow(),
+            dedupe_key=dedupe_key,
+            user_id=user_id,
+        )
+        try:
+            with db.begin_nested():
+                db.add(job)
+        except IntegrityError:
+            return db.query(Job).filter_by(dedupe_key=dedupe_key).first()
+        return job
+
+    @staticmethod
+    def claim(db, worker_id: str):
+        while True:
+            now = datetime.utcnow()
+            stale_before = now - timedelta(seconds=Config.JOB_LOCK_TIMEOUT)
+            candidate = db.query(Job).filter(or_(
+                and_(Job.status == "PENDING", Job.run_after <= now),
+                and_(Job.status == "RUNNING", Job.locked_at < stale_before),
+            )).order_by(Job.run_after.asc()).with_for_update(skip_locked=True).first()
+
+            if not candidate:
+                db.rollback()
+                return None
+
+            if candidate.status == "RUNNING" and candidate.attempts >= candidate.max_attempts:
+                # the worker holding it died on its last attempt
+                candidate.status = "DEAD"
+                candidate.error = f"Lock held by {candidate.locked_by} expired"
+                candidate.locked_by = None
+                candidate.locked_at = None
+                db.commit()
+                continue
+
+            # compare-and-set on (status, attempts) so only one worker wins even without row locks
+            claimed = db.query(Job).filter(
+                Job.id == candidate.id,
+                Job.status == candidate.status,
+                Job.attempts == candidate.attempts,
+            ).update({
+                Job.status: "RUNNING",
+                Job.attempts: candidate.attempts + 1,
+                Job.locked_by: worker_id,
+                Job.locked_at: now,
+            }, synchronize_session=False)
+            db.commit()
+
+            if claimed:
+                db.refresh(candidate)
+                return candidate
+
+    @staticmethod
+    def complete(db, job: Job, result: dict):
+        job.status = "SUCCEEDED"
+        job.result = json.dumps(result)
+        job.dedupe_key = None
+        job.error = None
+        job.locked_by = None
+        job.locked_at = None
+        db.commit()
+
+    @staticmethod
+    def fail(db, job: Job, error: str):
+        job.error = error
+        job.locked_by = None
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = "DEAD"
+            print(f"Job {job.id} ({job.type}) moved to dead letter after {job.attempts} attempts")
+        else:
+            job.status = "PENDING"
+            delay = Config.JOB_RETRY_BACKOFF * (2 ** (job.attempts - 1))
+            job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+        db.commit()
+
+    @staticmethod
+    def revive(db, job: Job, **values) -> bool:
+        # only one of a retry and a repeated enqueue gets to put a dead job back on the queue
+        values.update(status="PENDING", attempts=0, error=None, run_after=datetime.utcnow())
+        revived = db.query(Job).filter(Job.id == job.id, Job.status == "DEAD")\
+            .update({getattr(Job, name): value for name, value in values.items()}, synchronize_session=False)
+        return bool(revived)
+
+    @staticmethod
+    def requeue(db, job: Job) -> bool:
+        revived = JobQueue.revive(db, job)
+        db.commit()
+        return revived
+
+    @staticmethod
+    def run_next(worker_id: str) -> bool:
+        db = SessionLocal()
+        try:
+            job = JobQueue.claim(db, worker_id)
+            if not job:
+                return False
+
+            handler = JOB_HANDLERS.get(job.type)
+            if not handler:
+                JobQueue.fail(db, job, f"No handler registered for job type '{job.type}'")
+                return True
+
+            print(f"Running job {job.id} ({job.type}), attempt {job.attempts}/{job.max_attempts}")
+            try:
+                result = handler(db, json.loads(job.payload))
+            except Exception as e:
+                db.rollback()
+                traceback.print_exc()
+                job = db.query(Job).filter_by(id=job.id).first()
+                JobQueue.fail(db, job, str(e))
+                return True
+
+            JobQueue.complete(db, job, result or {})
+            return True
+        finally:
+            db.close()
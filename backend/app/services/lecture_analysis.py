@@ -0,0 +1,91 @@
+from dateutil.parser import parse as date_parse
+from app.core.database import SessionLocal
+from app.models.models import Lecture as LectureModel, Class as ClassModel, ActionItem as ActionItemModel
+from app.services.ai_client import AIService
+from app.services.analysis_cache import AnalysisCache
+from app.services.context_cache import context_cache
+from app.services.jobs import job_handler
+from app.services.single_flight import analysis_flight
+
+class AnalysisError(Exception):
+    pass
+
+def analysis_dedupe_key(lecture_id: str, cache_key: str) -> str:
+    return f"analyze_lecture:{lecture_id}:{cache_key}"
+
+def fetch_analysis(transcript: str, cache_key: str) -> dict:
+    # own session so the cached result is committed before followers re-check the cache
+    db = SessionLocal()
+    try:
+        analysis = AnalysisCache.get(db, cache_key)
+        if analysis is None:
+            analysis = AIService.analyze_transcript(transcript)
+            if "error" in analysis:
+                raise AnalysisError(analysis["error"])
+            AnalysisCache.put(db, cache_key, analysis)
+        db.commit()
+        return analysis
+    finally:
+        db.close()
+
+def run_lecture_analysis(db, lecture_id: str, user_id: str, analysis: dict = None) -> dict:
+    lecture = db.query(LectureModel).filter(LectureModel.id == lecture_id)\
+        .join(ClassModel).filter(ClassModel.user_id == user_id).first()
+    if not lecture:
+        raise AnalysisError("Lecture not found")
+    if not lecture.transcript:
+        raise AnalysisError("Transcript not ready or empty")
+
+    cache_key = AnalysisCache.make_key(lecture.transcript)
+    return analysis_flight.do(
+        analysis_dedupe_key(lecture_id, cache_key),
+        lambda: apply_analysis(db, lecture_id, user_id, lecture.transcript, cache_key, analysis),
+    )
+
+def apply_analysis(db, lecture_id: str, user_id: str, transcript: str, cache_key: str, analysis: dict = None) -> dict:
+    # start a fresh transaction so rows committed by whoever held the lock before us are visible
+    db.commit()
+
+    cached = analysis is not None
+    if not cached:
+        analysis = analysis_flight.do(cache_key, lambda: fetch_analysis(transcript, cache_key))
+
+    lecture = db.query(LectureModel).filter_by(id=lecture_id).first()
+    lecture.summary = analysis.get("summary", "")
+    existing_items = db.query(ActionItemModel).filter_by(lecture_id=lecture_id).all()
+    existing_content_set = {item.content.strip().lower() for item in existing_items}
+
+    new_items_added = []
+
+    for item in analysis.get("action_items", []):
+        clean_content = item['content'].strip().lower()
+
+        if clean_content in existing_content_set:
+            continue
+
+        due_date = None
+        if item.get('due_date'):
+            try:
+                due_date = date_parse(item['due_date'])
+            except:
+                due_date = None
+
+        ai_item = ActionItemModel(
+            type=item['type'],
+            content=item['content'],
+            due_date=due_date,
+            lecture_id=lecture_id,
+            user_id=user_id
+        )
+        db.add(ai_item)
+        new_items_added.append(ai_item)
+        existing_content_set.add(clean_content)
+
+    db.commit()
+    context_cache.invalidate_lecture(lecture_id)
+
+    return {"lecture_id": lecture_id, "new_items_count": len(new_items_added), "cached": cached}
+
+@job_handler("analyze_lecture")
+def analyze_lecture_job(db, payload: dict) -> dict:
+    return run_lecture_analysis(db, payload["lecture_id"], payload["user_id"])
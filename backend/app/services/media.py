@@ -0,0 +1,61 @@
+import json
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from app.models.models import MediaObject
+
+def hashed_chunks(chunks, digest):
+    # feeds the upload and the content hash from the same pass over the request body
+    for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+
+def find_media(db, content_hash: str, language: str, for_update: bool = False):
+    query = db.query(MediaObject).filter_by(content_hash=content_hash, language=language)
+    if for_update:
+        query = query.with_for_update()
+    return query.first()
+
+def claim_media(db, content_hash: str, language: str, object_key: str, size: int) -> MediaObject:
+    # returns the row for this content; its object_key is ours only if nobody uploaded it before,
+    # otherwise the caller can drop its copy and reuse the existing object and transcript
+    media = find_media(db, content_hash, language)
+    if media is None:
+        media = MediaObject(content_hash=content_hash, language=language, object_key=object_key, size=size)
+        db.add(media)
+        try:
+            db.commit()
+            return media
+        except IntegrityError:
+            # the same recording finished uploading concurrently
+            db.rollback()
+            media = find_media(db, content_hash, language)
+
+    if media.status == "FAILED":
+        # a failed transcription is retried with this upload rather than cached
+        db.query(MediaObject).filter(MediaObject.id == media.id, MediaObject.status == "FAILED").update({
+            "object_key": object_key, "size": size, "status": "PROCESSING", "transcript": None, "result": None,
+        }, synchronize_session=False)
+    else:
+        db.query(MediaObject).filter(MediaObject.id == media.id).update(
+            {"last_used_at": func.now()}, synchronize_session=False
+        )
+    db.commit()
+    claimed = db.query(MediaObject).filter(MediaObject.id == media.id).first()
+    if claimed is None:
+        # the storage GC dropped the row as unused between the lookup and the update; start afresh
+        return claim_media(db, content_hash, language, object_key, size)
+    return claimed
+
+def record_media_result(db, object_key: str, transcript: str, result: dict = None) -> int:
+    return db.query(MediaObject).filter(
+        MediaObject.object_key == object_key,
+        MediaObject.status == "PROCESSING"
+    ).update({
+        "status": "COMPLETED", "transcript": transcript, "result": json.dumps(result) if result else None,
+    }, synchronize_session=False)
+
+def fail_media(db, object_keys: list) -> int:
+    return db.query(MediaObject).filter(
+        MediaObject.object_key.in_(object_keys),
+        MediaObject.status == "PROCESSING"
+    ).update({"status": "FAILED"}, synchronize_session=False)
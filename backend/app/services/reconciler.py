@@ -0,0 +1,92 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from app.core.config import Config
+from app.core.database import SessionLocal
+from app.models.models import Lecture as LectureModel, TranscriptionSegment
+from app.services.jobs import JobQueue, job_handler
+from app.services.storage import StorageBackend, get_storage, key_stem
+from app.services.transcription import apply_transcription, complete_segment, fail_transcriptions
+
+RECONCILE_JOB = "reconcile_transcriptions"
+
+def find_results(storage: StorageBackend, object_keys: list) -> dict:
+    # one paginated listing of the shared prefix instead of a list_objects_v2 per lecture
+    by_stem = {key_stem(key): key for key in object_keys}
+    found = {}
+    for result_key in storage.list_keys(os.path.commonprefix(object_keys)):
+        object_key = by_stem.get(key_stem(result_key))
+        if result_key.endswith(".json") and object_key and object_key != result_key:
+            found.setdefault(object_key, result_key)
+    return found
+
+def fetch_result(storage: StorageBackend, result_key: str):
+    try:
+        return json.loads(storage.read_bytes(result_key).decode('utf-8'))
+    except Exception as e:
+        print(f"Could not read transcription result {result_key}: {e}")
+        return None
+
+def reconcile_transcriptions(db) -> dict:
+    pending = db.query(LectureModel.object_key, LectureModel.created_at).filter(
+        LectureModel.status == "PROCESSING",
+        LectureModel.object_key.isnot(None)
+    ).all()
+    if not pending:
+        return {"pending": 0, "completed": 0, "failed": 0}
+    segments = {
+        segment.object_key: segment
+        for segment in db.query(TranscriptionSegment).join(LectureModel).filter(
+            LectureModel.status == "PROCESSING",
+            TranscriptionSegment.status == "PROCESSING"
+        )
+    }
+
+    storage = get_storage()
+    found = find_results(storage, [row.object_key for row in pending] + list(segments))
+    with ThreadPoolExecutor(max_workers=Config.RECONCILE_FETCH_WORKERS) as pool:
+        results = dict(zip(found, pool.map(lambda key: fetch_result(storage, key), found.values())))
+
+    completed = 0
+    failed_keys = []
+    for object_key, result in results.items():
+        if result is None:
+            continue
+        if object_key in segments:
+            # segments commit on their own so the last one can stitch the lecture
+            if complete_segment(db, segments[object_key], result):
+                completed += 1
+        elif result.get('result', 'COMPLETED') == 'COMPLETED' and 'text' in result:
+            if apply_transcription(db, object_key, result['text'], result):
+                completed += 1
+        else:
+            failed_keys.append(object_key)
+    db.commit()
+
+    cutoff = datetime.utcnow() - timedelta(seconds=Config.TRANSCRIPTION_TIMEOUT)
+    failed_keys += [
+        row.object_key for row in pending
+        if row.object_key not in results and row.created_at and row.created_at < cutoff
+    ]
+    failed = fail_transcriptions(db, failed_keys)
+
+    if completed or failed:
+        print(f"Reconciled transcriptions: {completed} completed, {failed} failed, {len(pending) - completed - failed} still processing")
+    return {"pending": len(pending), "completed": completed, "failed": failed}
+
+def schedule_reconcile():
+    db = SessionLocal()
+    try:
+        # nothing to sweep, so don't leave an empty job row behind every interval
+        if not db.query(LectureModel.id).filter(LectureModel.status == "PROCESSING").first():
+            return None
+        job = JobQueue.enqueue(db, RECONCILE_JOB, {}, max_attempts=1, dedupe_key=RECONCILE_JOB)
+        db.commit()
+        return job.id
+    finally:
+        db.close()
+
+@job_handler(RECONCILE_JOB)
+def reconcile_transcriptions_job(db, payload: dict) -> dict:
+    return reconcile_transcriptions(db)
@@ -0,0 +1,130 @@
+import math
+import threading
+from collections import Counter, OrderedDict
+import numpy as np
+from sqlalchemy import func
+from app.core.config import Config
+from app.models.models import Lecture, LectureChunk
+from app.services.ai_client import AIService
+from app.services.chat_context import estimate_tokens
+from app.services.search import index_search, tokenize
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+class LectureRetriever:
+    def __init__(self, chunks: list):
+        self.chunks = chunks
+        postings = {}
+        lengths = []
+        for position, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(position)
+                postings[term][1].append(tf)
+
+        self.lengths = np.array(lengths, dtype=np.float32)
+        self.avg_length = float(self.lengths.mean()) if chunks else 0.0
+        self.postings = {
+            term: (np.array(ids, dtype=np.int32), np.array(tfs, dtype=np.float32))
+            for term, (ids, tfs) in postings.items()
+        }
+
+    def search(self, query: str, top_k: int) -> list:
+        if not self.chunks:
+            return []
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        n = len(self.chunks)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths / max(self.avg_length, 1.0))
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            ids, tfs = self.postings[term]
+            idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            scores[ids] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[ids])
+
+        ranked = np.argsort(-scores)[:top_k]
+        return [int(i) for i in ranked if scores[i] > 0]
+
+class LectureCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, lecture_id: str):
+        with self.lock:
+            value = self.entries.get(lecture_id)
+            if value is not None:
+                self.entries.move_to_end(lecture_id)
+            return value
+
+    def put(self, lecture_id: str, value):
+        with self.lock:
+            self.entries[lecture_id] = value
+            self.entries.move_to_end(lecture_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, lecture_id: str):
+        with self.lock:
+            self.entries.pop(lecture_id, None)
+
+retriever_cache = LectureCache(Config.RETRIEVAL_CACHE_SIZE)
+
+def index_lecture(db, lecture: Lecture):
+    db.query(LectureChunk).filter_by(lecture_id=lecture.id).delete(synchronize_session=False)
+    chunks = AIService.split_transcript(lecture.transcript or "", Config.RETRIEVAL_CHUNK_CHARS)
+    for position, content in enumerate(chunks):
+        db.add(LectureChunk(lecture_id=lecture.id, position=position, content=content))
+    index_search(db, lecture, chunks)
+    retriever_cache.invalidate(lecture.id)
+    return chunks
+
+def chunk_version(db, lecture_id: str) -> tuple:
+    # every (re)index writes chunks under fresh ids, so count and smallest id change whenever the
+    # index does; read off ix_lecture_chunks_lecture_position, it costs one index range scan
+    count, first_id = db.query(func.count(LectureChunk.id), func.min(LectureChunk.id)) \
+        .filter(LectureChunk.lecture_id == lecture_id).one()
+    return count, first_id
+
+def get_retriever(db, lecture_id: str) -> LectureRetriever:
+    # the cache is per process and another worker may have re-indexed the lecture, so an entry is only
+    # used while the chunks it was built from are still the current ones
+    version = chunk_version(db, lecture_id)
+    cached = retriever_cache.get(lecture_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    chunks = [row.content for row in db.query(LectureChunk.content).filter_by(lecture_id=lecture_id)
+              .order_by(LectureChunk.position.asc()).all()]
+    if not chunks:
+        # lectures transcribed before the index existed are chunked on first use
+        lecture = db.query(Lecture).filter_by(id=lecture_id).first()
+        if lecture and lecture.transcript:
+            chunks = index_lecture(db, lecture)
+            db.commit()
+            version = chunk_version(db, lecture_id)
+
+    retriever = LectureRetriever(chunks)
+    if chunks:
+        # nothing to search yet (still PROCESSING): don't pin an empty retriever for when it finishes
+        retriever_cache.put(lecture_id, (version, retriever))
+    else:
+        retriever_cache.invalidate(lecture_id)
+    return retriever
+
+def retrieve_passages(db, lecture_id: str, query: str) -> list:
+    retriever = get_retriever(db, lecture_id)
+    selected = []
+    used = 0
+    for position in retriever.search(query, Config.RETRIEVAL_TOP_K):
+        cost = estimate_tokens(retriever.chunks[position])
+        if used + cost > Config.RETRIEVAL_TOKEN_BUDGET:
+            continue
+        selected.append(position)
+        used += cost
+    # keep lecture order so the passages read naturally
+    return [retriever.chunks[position] for position in sorted(selected)]
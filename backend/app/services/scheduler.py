@@ -0,0 +1,197 @@
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from app.core.config import Config
+
+PRIORITIES = ("interactive", "analysis", "batch")
+
+# share of the burst each class must leave untouched for the classes above it
+PRIORITY_RESERVE = {
+    "interactive": 0.0,
+    "analysis": 0.3,
+    "batch": 0.6,
+}
+
+# a waiter re-checks the bucket at least every 0.5s and refreshes its heartbeat each time; one that
+# hasn't for this long belongs to a process that died, possibly in another container, and is skipped
+WAITER_TIMEOUT = 5.0
+
+def percentile_ms(ordered: list, fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 1)
+
+class SchedulerTimeout(Exception):
+    pass
+
+class ClovaScheduler:
+    def __init__(self, path: str, rate_per_minute: float, burst: int):
+        self.path = path
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.local = threading.local()
+        self.stats_lock = threading.Lock()
+        self.waits = {priority: deque(maxlen=500) for priority in PRIORITIES}
+        self.rejected = {priority: 0 for priority in PRIORITIES}
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, blocked_until REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS waiters ("
+                "id TEXT PRIMARY KEY, rank INTEGER NOT NULL, enqueued REAL NOT NULL, heartbeat REAL NOT NULL)"
+            )
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def bucket_key(api_key: str) -> str:
+        return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+    def try_take(self, key: str, priority: str, waiter: tuple = None) -> float:
+        # waiter is (id, enqueued) once this request is queued; None on its first attempt
+        conn = self.connection()
+        now = time.time()
+        rank = PRIORITIES.index(priority)
+        waiter_id, enqueued = waiter or ("", now)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if waiter:
+                conn.execute("UPDATE waiters SET heartbeat = ? WHERE id = ?", (now, waiter_id))
+            row = conn.execute("SELECT tokens, updated, blocked_until FROM buckets WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                tokens, blocked_until = float(self.burst), 0.0
+            else:
+                tokens = min(float(self.burst), row[0] + (now - row[1]) * self.rate)
+                blocked_until = row[2]
+
+            # tokens go to live waiters strictly by priority, then by arrival: nobody takes one while
+            # a more urgent or an older request of the same class is still queued
+            ahead = conn.execute(
+                "SELECT 1 FROM waiters WHERE heartbeat > ? AND id != ? AND (rank < ? OR (rank = ? AND enqueued < ?)) "
+                "LIMIT 1",
+                (now - WAITER_TIMEOUT, waiter_id, rank, rank, enqueued),
+            ).fetchone()
+
+            if blocked_until > now:
+                wait = blocked_until - now
+            elif ahead:
+                wait = 0.05
+            else:
+                floor = PRIORITY_RESERVE[priority] * self.burst
+                if tokens - 1 >= floor:
+                    tokens -= 1
+                    wait = 0.0
+                else:
+                    wait = (floor + 1 - tokens) / self.rate
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated, blocked_until) VALUES (?, ?, ?, ?)",
+                (key, tokens, now, blocked_until),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def enqueue_waiter(self, priority: str) -> tuple:
+        conn = self.connection()
+        waiter = (uuid.uuid4().hex, time.time())
+        conn.execute("DELETE FROM waiters WHERE heartbeat <= ?", (waiter[1] - WAITER_TIMEOUT,))
+        conn.execute("INSERT INTO waiters (id, rank, enqueued, heartbeat) VALUES (?, ?, ?, ?)",
+                     (waiter[0], PRIORITIES.index(priority), waiter[1], waiter[1]))
+        return waiter
+
+    def dequeue_waiter(self, waiter: tuple):
+        self.connection().execute("DELETE FROM waiters WHERE id = ?", (waiter[0],))
+
+    def acquire(self, api_key: str, priority: str, max_wait: float = None):
+        if max_wait is None:
+            max_wait = Config.CLOVA_SCHEDULER_MAX_WAIT[priority]
+        key = self.bucket_key(api_key)
+        started = time.monotonic()
+        deadline = started + max_wait
+
+        wait = self.try_take(key, priority)
+        if wait:
+            waiter = self.enqueue_waiter(priority)
+            try:
+                while wait:
+                    if time.monotonic() + wait > deadline:
+                        with self.stats_lock:
+                            self.rejected[priority] += 1
+                        raise SchedulerTimeout(f"Clova {priority} request waited longer than {max_wait}s")
+                    time.sleep(min(wait, 0.5) + random.uniform(0, 0.05))
+                    wait = self.try_take(key, priority, waiter)
+            finally:
+                self.dequeue_waiter(waiter)
+
+        with self.stats_lock:
+            self.waits[priority].append(time.monotonic() - started)
+
+    def penalize(self, api_key: str, retry_after: float):
+        # a 429 means the upstream budget is gone for everyone sharing this key
+        conn = self.connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated, blocked_until) VALUES (?, 0, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET tokens = 0, updated = excluded.updated, "
+                "blocked_until = MAX(blocked_until, excluded.blocked_until)",
+                (self.bucket_key(api_key), now, now + retry_after),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> dict:
+        conn = self.connection()
+        depth = {priority: 0 for priority in PRIORITIES}
+        for rank, count in conn.execute("SELECT rank, COUNT(*) FROM waiters WHERE heartbeat > ? GROUP BY rank",
+                                        (time.time() - WAITER_TIMEOUT,)).fetchall():
+            depth[PRIORITIES[rank]] = count
+
+        with self.stats_lock:
+            waits = {}
+            for priority, samples in self.waits.items():
+                ordered = sorted(samples)
+                waits[priority] = {
+                    "count": len(ordered),
+                    "p50_ms": percentile_ms(ordered, 0.50),
+                    "p95_ms": percentile_ms(ordered, 0.95),
+                    "max_ms": percentile_ms(ordered, 1.0),
+                    "rejected": self.rejected[priority],
+                }
+
+        row = conn.execute(
+            "SELECT tokens, updated, blocked_until FROM buckets WHERE key = ?",
+            (self.bucket_key(Config.CLOVA_API_KEY),),
+        ).fetchone()
+        now = time.time()
+        tokens = min(float(self.burst), row[0] + (now - row[1]) * self.rate) if row else float(self.burst)
+        blocked_for = max(0.0, row[2] - now) if row else 0.0
+
+        return {
+            "queue_depth": depth,
+            "wait": waits,
+            "tokens_available": round(tokens, 2),
+            "blocked_for_s": round(blocked_for, 2),
+            "worker_pid": os.getpid(),
+        }
+
+scheduler = ClovaScheduler(Config.CLOVA_SCHEDULER_DB, Config.CLOVA_RATE_PER_MINUTE, Config.CLOVA_RATE_BURST)
@@ -0,0 +1,147 @@
+import html
+import math
+import re
+import unicodedata
+from collections import Counter
+from sqlalchemy import func, insert
+from app.core.config import Config
+from app.models.models import Class, Lecture, LectureChunk, SearchDocument, SearchPosting
+
+WORD = re.compile(r"\w+", re.UNICODE)
+MAX_TERM_LENGTH = 64
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def tokenize(text: str) -> list:
+    tokens = []
+    # NFC so composed and decomposed spellings (macOS filenames decompose Hangul) index as one term
+    for word in WORD.findall(unicodedata.normalize("NFC", text).lower()):
+        tokens.append(word)
+        # Korean particles stick to the noun ("강의에서"), so Hangul words also index their bigrams
+        if len(word) > 2 and any("가" <= ch <= "힣" for ch in word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+def term_counts(text: str) -> Counter:
+    return Counter(term[:MAX_TERM_LENGTH] for term in tokenize(text))
+
+def index_search(db, lecture: Lecture, chunks: list):
+    # one posting per (term, lecture); rewritten whole whenever the title or transcript changes
+    db.query(SearchPosting).filter_by(lecture_id=lecture.id).delete(synchronize_session=False)
+    user_id = db.query(Class.user_id).filter_by(id=lecture.class_id).scalar()
+    body = Counter()
+    for chunk in chunks:
+        body.update(term_counts(chunk))
+    title = term_counts(lecture.title or "")
+
+    rows = [
+        {"user_id": user_id, "term": term, "lecture_id": lecture.id, "tf": body[term], "title_tf": title[term]}
+        for term in body.keys() | title.keys()
+    ]
+    if rows:
+        db.execute(insert(SearchPosting), rows)
+    db.merge(SearchDocument(lecture_id=lecture.id, user_id=user_id,
+                            length=sum(body.values()) + sum(title.values())))
+
+def rank(db, user_id: str, terms: set) -> list:
+    # BM25 over the user's own library; title hits count SEARCH_TITLE_WEIGHT times
+    postings = db.query(SearchPosting.term, SearchPosting.lecture_id, SearchPosting.tf, SearchPosting.title_tf)\
+        .filter(SearchPosting.user_id == user_id, SearchPosting.term.in_(terms)).all()
+    if not postings:
+        return []
+    documents, avg_length = db.query(func.count(SearchDocument.lecture_id), func.avg(SearchDocument.length))\
+        .filter(SearchDocument.user_id == user_id).one()
+    avg_length = max(float(avg_length or 0), 1.0)
+    lengths = dict(db.query(SearchDocument.lecture_id, SearchDocument.length)
+                   .filter(SearchDocument.lecture_id.in_({row.lecture_id for row in postings})).all())
+
+    frequency = Counter(row.term for row in postings)
+    scores = Counter()
+    for row in postings:
+        tf = row.tf + Config.SEARCH_TITLE_WEIGHT * row.title_tf
+        idf = math.log(1 + (documents - frequency[row.term] + 0.5) / (frequency[row.term] + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths.get(row.lecture_id, 0) / avg_length)
+        scores[row.lecture_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+    # rounded so the score survives the round trip through a cursor unchanged
+    return sorted(((round(score, 6), lecture_id) for lecture_id, score in scores.items()),
+                  key=lambda entry: (-entry[0], entry[1]))
+
+def best_chunk(chunks: list, terms: set) -> str:
+    best, best_hits = (chunks[0] if chunks else ""), 0
+    for chunk in chunks:
+        counts = term_counts(chunk)
+        hits = sum(counts[term] for term in terms)
+        if hits > best_hits:
+            best, best_hits = chunk, hits
+    return best
+
+def word_pattern(words: list):
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(word) for word in sorted(words, key=len, reverse=True)), re.IGNORECASE)
+
+def highlight(text: str, pattern) -> str:
+    text = unicodedata.normalize("NFC", text)
+    parts = []
+    position = 0
+    for match in (pattern.finditer(text) if pattern else []):
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        position = match.end()
+    parts.append(html.escape(text[position:]))
+    return "".join(parts)
+
+def make_snippet(text: str, pattern, width: int) -> str:
+    # html-escaped excerpt around the first hit, every query word wrapped in <mark>
+    text = unicodedata.normalize("NFC", text)
+    first = pattern.search(text) if pattern else None
+    start = max(0, first.start() - width // 3) if first else 0
+    end = min(len(text), start + width)
+    return ("…" if start > 0 else "") + highlight(text[start:end], pattern).strip() + ("…" if end < len(text) else "")
+
+def search_library(db, user_id: str, query: str, limit: int, after: dict = None) -> tuple:
+    # returns (results, next cursor position or None); only the page's lectures and chunks are loaded
+    terms = set(term_counts(query))
+    if not terms:
+        return [], None
+    ranked = rank(db, user_id, terms)
+    if after:
+        try:
+            score, lecture_id = float(after["score"]), str(after["id"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        ranked = [entry for entry in ranked if entry[0] < score or (entry[0] == score and entry[1] > lecture_id)]
+    page = ranked[:limit]
+    if not page:
+        return [], None
+
+    ids = [lecture_id for _, lecture_id in page]
+    lectures = {row.id: row for row in db.query(
+        Lecture.id, Lecture.title, Lecture.class_id, Lecture.status, Lecture.created_at
+    ).filter(Lecture.id.in_(ids))}
+    chunks = {}
+    for row in db.query(LectureChunk.lecture_id, LectureChunk.content).filter(LectureChunk.lecture_id.in_(ids))\
+            .order_by(LectureChunk.lecture_id, LectureChunk.position):
+        chunks.setdefault(row.lecture_id, []).append(row.content)
+
+    pattern = word_pattern(WORD.findall(unicodedata.normalize("NFC", query).lower()))
+    results = []
+    for score, lecture_id in page:
+        lecture = lectures.get(lecture_id)
+        if lecture is None:
+            continue
+        results.append({
+            "id": lecture.id,
+            "title": lecture.title,
+            "class_id": lecture.class_id,
+            "status": lecture.status,
+            "created_at": lecture.created_at,
+            "score": score,
+            "title_html": highlight(lecture.title or "", pattern),
+            "snippet": make_snippet(best_chunk(chunks.get(lecture_id, []), terms), pattern, Config.SEARCH_SNIPPET_CHARS),
+        })
+
+    next_position = None
+    if len(ranked) > limit:
+        next_position = {"score": page[-1][0], "id": page[-1][1]}
+    return results, next_position
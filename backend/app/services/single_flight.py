@@ -0,0 +1,87 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from app.core.config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines only get in-process coalescing
+    fcntl = None
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+@contextmanager
+def process_lock(key: str):
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(Config.SINGLE_FLIGHT_LOCK_DIR, exist_ok=True)
+    # one file per key, so nested calls on different keys (the analysis job around its cache fetch)
+    # never contend with themselves or with unrelated keys
+    path = os.path.join(Config.SINGLE_FLIGHT_LOCK_DIR, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".lock")
+    while True:
+        handle = open(path, "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            # the previous holder unlinks the file before unlocking it; if that happened while we waited,
+            # we hold a lock nobody else can see and have to start over on the current file
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                current = None
+            if current is not None and os.path.samestat(current, os.fstat(handle.fileno())):
+                break
+        except BaseException:
+            handle.close()
+            raise
+        handle.close()
+    try:
+        yield
+    finally:
+        # unlinked while still locked, so no process can lock this inode and believe it is current
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        fcntl.flock(handle, fcntl.LOCK_UN)
+        handle.close()
+
+class SingleFlight:
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def do(self, key: str, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self.calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            # threads of this worker share the leader's result; other processes queue on the
+            # file lock and are expected to find the leader's work persisted once they get it
+            with process_lock(key):
+                call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+
+analysis_flight = SingleFlight()
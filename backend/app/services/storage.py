@@ -1,62 +1,297 @@
 import boto3
-import uuid
+import io
 import os
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from boto3.exceptions import Boto3Error
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
 from app.core.config import Config
-import tempfile
 
-class StorageService:
+AUDIO_EXTENSIONS = ["mp3", "m4a", "wav", "aac"]
+
+def new_object_key(original_filename: str) -> tuple:
+    extension = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else "bin"
+    content_type = f"audio/{extension}" if extension in AUDIO_EXTENSIONS else "application/octet-stream"
+    return f"audio-storage/{uuid.uuid4().hex}.{extension}", content_type
+
+def key_stem(key: str) -> str:
+    # "audio-storage/<hex>.wav" and its result "audio-storage/<hex>.wav.json" share "audio-storage/<hex>"
+    head, _, name = key.rpartition("/")
+    return f"{head}/{name.split('.', 1)[0]}"
+
+class StorageBackend:
+    # direct-to-bucket uploads (presign_put and the presigned multipart calls) only make sense against
+    # a real object store; callers check this before offering them
+    supports_presigned_uploads = False
+
+    def list_multipart_uploads(self, prefix: str = ""):
+        # yields (key, upload_id, initiated) for uploads started but neither completed nor aborted
+        return iter(())
+
+    def list_keys(self, prefix: str = ""):
+        return (key for key, _, _ in self.list_objects(prefix))
+
+    def read_bytes(self, key: str) -> bytes:
+        body = self.open_object(key)
+        try:
+            return body.read()
+        finally:
+            body.close()
+
+class S3Storage(StorageBackend):
+    supports_presigned_uploads = True
+
     def __init__(self):
+        # one client per worker: boto3 clients are thread-safe and keep their own connection pool,
+        # sized so parallel part uploads and reconciler fetches don't queue behind each other
         self.s3_client = boto3.client(
             's3',
             endpoint_url=Config.NCP_ENDPOINT,
             aws_access_key_id=Config.NCP_ACCESS_KEY,
-            aws_secret_access_key=Config.NCP_SECRET_KEY
+            aws_secret_access_key=Config.NCP_SECRET_KEY,
+            config=BotoConfig(
+                max_pool_connections=Config.STORAGE_MAX_POOL_CONNECTIONS,
+                retries={"max_attempts": Config.STORAGE_MAX_ATTEMPTS, "mode": "standard"},
+                connect_timeout=Config.STORAGE_CONNECT_TIMEOUT,
+                read_timeout=Config.STORAGE_READ_TIMEOUT,
+            )
         )
         self.bucket_name = Config.NCP_BUCKET_NAME
+        self.transfer_config = TransferConfig(
+            multipart_threshold=Config.UPLOAD_PART_SIZE,
+            multipart_chunksize=Config.UPLOAD_PART_SIZE,
+            max_concurrency=Config.UPLOAD_MAX_INFLIGHT_PARTS,
+        )
 
-    def upload_file(self, file_obj, original_filename: str) -> str:
-        extension = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else "bin"
-        unique_key = f"audio-storage/{uuid.uuid4().hex}.{extension}"
-
-        content_type = "application/octet-stream"
-        if extension in ["mp3", "m4a", "wav", "aac"]:
-            content_type = f"audio/{extension}"
+    def upload_stream(self, chunks, key: str, content_type: str = "application/octet-stream") -> int:
+        # request-body chunks go straight into a multipart upload: parts are sent in parallel while the
+        # next one is read, and at most UPLOAD_MAX_INFLIGHT_PARTS + 1 parts are held in memory
+        part_size = Config.UPLOAD_PART_SIZE
+        buffer = bytearray()
+        total = 0
+        upload_id = None
+        futures = []
+        slots = threading.BoundedSemaphore(Config.UPLOAD_MAX_INFLIGHT_PARTS)
 
-        temp_filename = f"{uuid.uuid4().hex}.{extension}"
-        temp_dir = tempfile.gettempdir()
-        temp_path = os.path.join(temp_dir, temp_filename)
+        def send_part(number: int, data: bytes) -> dict:
+            try:
+                response = self.s3_client.upload_part(
+                    Bucket=self.bucket_name, Key=key, UploadId=upload_id, PartNumber=number, Body=data
+                )
+                return {"PartNumber": number, "ETag": response["ETag"]}
+            finally:
+                slots.release()
 
         try:
-            file_obj.seek(0)
-            file_obj.save(temp_path)
+            with ThreadPoolExecutor(max_workers=Config.UPLOAD_MAX_INFLIGHT_PARTS) as pool:
+                for chunk in chunks:
+                    buffer.extend(chunk)
+                    total += len(chunk)
+                    while len(buffer) >= part_size:
+                        if upload_id is None:
+                            upload_id = self.start_multipart(key, content_type)
+                        slots.acquire()
+                        futures.append(pool.submit(send_part, len(futures) + 1, bytes(buffer[:part_size])))
+                        del buffer[:part_size]
+                        # surface a failed part now instead of after the whole body is read
+                        for future in futures:
+                            if future.done() and future.exception():
+                                raise future.exception()
 
-            print(f"Uploading {temp_path} to {unique_key}...")
+                if upload_id is None:
+                    # smaller than one part, a plain PUT is cheaper
+                    self.s3_client.put_object(Bucket=self.bucket_name, Key=key, Body=bytes(buffer), ContentType=content_type)
+                    return total
+                if buffer:
+                    slots.acquire()
+                    futures.append(pool.submit(send_part, len(futures) + 1, bytes(buffer)))
+                parts = [future.result() for future in futures]
 
-            self.s3_client.upload_file(
-                Filename=temp_path,
-                Bucket=self.bucket_name,
-                Key=unique_key,
-                ExtraArgs={'ContentType': content_type}
+            self.complete_multipart(key, upload_id, parts)
+            print(f"Uploaded {total} bytes to {self.bucket_name}/{key} in {len(parts)} parts")
+            return total
+        except Exception as e:
+            # also reached when the client's body breaks off, so no half-written parts are left billed
+            if upload_id is not None:
+                self.abort_multipart(key, upload_id)
+            if isinstance(e, ClientError):
+                print(f"NCP Storage Error: {e}")
+                raise Exception(f"Storage Error: {str(e)}")
+            raise
+
+    def upload_bytes(self, data: bytes, key: str, content_type: str = "application/octet-stream") -> str:
+        try:
+            self.s3_client.upload_fileobj(
+                io.BytesIO(data), self.bucket_name, key,
+                ExtraArgs={"ContentType": content_type}, Config=self.transfer_config
             )
-            
-            print(f"Successfully uploaded to {self.bucket_name}/{unique_key}")
-            return unique_key
-            
-        except ClientError as e:
+            return key
+        except (ClientError, Boto3Error) as e:
             print(f"NCP Storage Error: {e}")
             raise Exception(f"Storage Error: {str(e)}")
-        except Exception as e:
-            print(f"General Error during upload: {e}")
-            raise e
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-                print(f"Cleaned up temp file {temp_path}")
 
+    def presign_put(self, key: str, content_type: str, expires: int) -> str:
+        return self.s3_client.generate_presigned_url(
+            'put_object', Params={"Bucket": self.bucket_name, "Key": key, "ContentType": content_type}, ExpiresIn=expires
+        )
+
+    def start_multipart(self, key: str, content_type: str) -> str:
+        return self.s3_client.create_multipart_upload(Bucket=self.bucket_name, Key=key, ContentType=content_type)["UploadId"]
+
+    def presign_part(self, key: str, upload_id: str, part_number: int, expires: int) -> str:
+        return self.s3_client.generate_presigned_url(
+            'upload_part',
+            Params={"Bucket": self.bucket_name, "Key": key, "UploadId": upload_id, "PartNumber": part_number},
+            ExpiresIn=expires
+        )
+
+    def complete_multipart(self, key: str, upload_id: str, parts: list):
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+        )
+
+    def abort_multipart(self, key: str, upload_id: str):
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+        except ClientError as e:
+            print(f"Warning: Failed to abort multipart upload {upload_id}: {e}")
+
+    def list_multipart_uploads(self, prefix: str = ""):
+        paginator = self.s3_client.get_paginator("list_multipart_uploads")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for upload in page.get("Uploads", []):
+                yield upload["Key"], upload["UploadId"], upload["Initiated"]
+
+    def object_size(self, key: str):
+        try:
+            return self.s3_client.head_object(Bucket=self.bucket_name, Key=key)['ContentLength']
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def open_object(self, key: str):
+        return self.s3_client.get_object(Bucket=self.bucket_name, Key=key)['Body']
+
+    def list_objects(self, prefix: str = ""):
+        # yields (key, size, last_modified) page by page, so callers never hold the whole listing
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield obj["Key"], obj["Size"], obj["LastModified"]
+
+    def delete_objects(self, keys: list) -> list:
+        # DeleteObjects takes at most 1000 keys per call; returns the keys that could not be deleted
+        failed = []
+        for start in range(0, len(keys), 1000):
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys[start:start + 1000]], "Quiet": True}
+            )
+            for error in response.get("Errors", []):
+                print(f"Warning: Failed to delete file {error['Key']}: {error.get('Message')}")
+                failed.append(error["Key"])
+        return failed
 
     def delete_file(self, object_name: str):
         try:
             self.s3_client.delete_object(Bucket=self.bucket_name, Key=object_name)
         except ClientError as e:
-            print(f"Warning: Failed to delete file {object_name}: {e}")
\ No newline at end of file
+            print(f"Warning: Failed to delete file {object_name}: {e}")
+
+class LocalStorage(StorageBackend):
+    # keys map onto files under STORAGE_LOCAL_ROOT; for tests and benchmarks, not for serving Clova
+    def __init__(self, root: str = None):
+        self.root = os.path.abspath(root or Config.STORAGE_LOCAL_ROOT)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, *key.split("/")))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    def upload_stream(self, chunks, key: str, content_type: str = "application/octet-stream") -> int:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # written next to the target and renamed, so readers never see half an object
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        total = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+                    total += len(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return total
+
+    def upload_bytes(self, data: bytes, key: str, content_type: str = "application/octet-stream") -> str:
+        self.upload_stream([data], key, content_type)
+        return key
+
+    def object_size(self, key: str):
+        try:
+            return os.path.getsize(self.path(key))
+        except FileNotFoundError:
+            return None
+
+    def open_object(self, key: str):
+        return open(self.path(key), "rb")
+
+    def list_objects(self, prefix: str = ""):
+        objects = []
+        for directory, _, files in os.walk(self.root):
+            relative = os.path.relpath(directory, self.root)
+            base = "" if relative == "." else relative.replace(os.sep, "/") + "/"
+            for name in files:
+                if name.startswith(".upload-") or not (base + name).startswith(prefix):
+                    continue
+                stat = os.stat(os.path.join(directory, name))
+                objects.append((base + name, stat.st_size, datetime.fromtimestamp(stat.st_mtime, timezone.utc)))
+        # same order as a bucket listing
+        return iter(sorted(objects))
+
+    def delete_objects(self, keys: list) -> list:
+        failed = []
+        for key in keys:
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Warning: Failed to delete file {key}: {e}")
+                failed.append(key)
+        return failed
+
+    def delete_file(self, object_name: str):
+        try:
+            os.remove(self.path(object_name))
+        except OSError as e:
+            print(f"Warning: Failed to delete file {object_name}: {e}")
+
+BACKENDS = {"s3": S3Storage, "local": LocalStorage}
+
+_storage = None
+_storage_pid = None
+_storage_lock = threading.Lock()
+
+def get_storage() -> StorageBackend:
+    global _storage, _storage_pid
+    # built once per worker pid, like the Clova client, instead of a fresh boto3 client per request
+    if _storage is None or _storage_pid != os.getpid():
+        with _storage_lock:
+            if _storage is None or _storage_pid != os.getpid():
+                backend = BACKENDS.get(Config.STORAGE_BACKEND)
+                if backend is None:
+                    raise ValueError(f"Unknown STORAGE_BACKEND '{Config.STORAGE_BACKEND}', expected one of {sorted(BACKENDS)}")
+                _storage = backend()
+                _storage_pid = os.getpid()
+    return _storage
@@ -0,0 +1,126 @@
+import time
+from datetime import datetime, timedelta, timezone
+from app.core.config import Config
+from app.core.database import SessionLocal
+from app.models.models import Job, Lecture as LectureModel, TranscriptionSegment, MediaObject, UploadClaim
+from app.services.jobs import JobQueue, job_handler
+from app.services.storage import get_storage, key_stem
+
+STORAGE_GC_JOB = "collect_storage_garbage"
+MEDIA_PREFIX = "audio-storage/"
+
+def live_stems(db, used_since: datetime) -> set:
+    # media and Clova's "<key>.json" results share a stem, so one set covers both. Segment WAVs are
+    # only needed until their lecture is stitched, and a media row only while a lecture still refers to
+    # it, or while it was used so recently that the upload attaching a lecture may still be under way
+    keys = [row.object_key for row in db.query(LectureModel.object_key).filter(LectureModel.object_key.isnot(None)).distinct()]
+    keys += [row.object_key for row in db.query(TranscriptionSegment.object_key).join(LectureModel)
+             .filter(LectureModel.status == "PROCESSING")]
+    keys += [row.object_key for row in db.query(MediaObject.object_key).filter(MediaObject.last_used_at >= used_since)]
+    return {key_stem(key) for key in keys}
+
+def collect_media_rows(db, used_before: datetime, dry_run: bool = False) -> int:
+    # de-duplication rows for media no lecture refers to any more; once they are gone the objects
+    # they pointed at are orphans like any other
+    referenced = db.query(LectureModel.id).filter(LectureModel.object_key == MediaObject.object_key).exists()
+    candidates = [row.id for row in db.query(MediaObject.id).filter(MediaObject.last_used_at < used_before, ~referenced)]
+    db.commit()
+    if dry_run:
+        return len(candidates)
+    removed = 0
+    for media_id in candidates:
+        # re-checked under the row lock attach_media_lecture takes after committing its lecture, and
+        # claim_media bumps last_used_at before attaching, so a re-upload in progress always wins
+        media = db.query(MediaObject).filter(MediaObject.id == media_id).with_for_update().first()
+        if media is not None and media.last_used_at < used_before \
+                and not db.query(LectureModel.id).filter(LectureModel.object_key == media.object_key).first():
+            db.delete(media)
+            removed += 1
+        db.commit()
+    return removed
+
+def collect_garbage(db, dry_run: bool = False, min_age: float = None, max_deletes: int = None,
+                    pause: float = None) -> dict:
+    storage = get_storage()
+    min_age = Config.STORAGE_GC_MIN_AGE if min_age is None else min_age
+    max_deletes = Config.STORAGE_GC_MAX_DELETES if max_deletes is None else max_deletes
+    pause = Config.STORAGE_GC_PAUSE if pause is None else pause
+    batch_size = min(Config.STORAGE_GC_BATCH_SIZE, 1000)
+
+    # media rows keep naive UTC timestamps, object listings aware ones
+    used_before = datetime.utcnow() - timedelta(seconds=min_age)
+    media_rows = collect_media_rows(db, used_before, dry_run)
+    if not dry_run:
+        # a claim only has to outlive the upload tokens that could complete its object
+        claimed_before = datetime.utcnow() - timedelta(seconds=Config.UPLOAD_URL_EXPIRES)
+        db.query(UploadClaim).filter(UploadClaim.created_at < claimed_before).delete(synchronize_session=False)
+        db.commit()
+    live = live_stems(db, used_before)
+    # don't hold a transaction open for the whole listing
+    db.commit()
+    # anything younger may belong to an upload whose lecture row doesn't exist yet
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=min_age)
+    stats = {"live": len(live), "media_rows": media_rows, "scanned": 0, "orphaned": 0, "orphaned_bytes": 0,
+             "deleted": 0, "failed": 0}
+    batch = []
+
+    def flush():
+        if not dry_run:
+            if stats["deleted"] or stats["failed"]:
+                time.sleep(pause)
+            failed = storage.delete_objects(batch)
+            stats["deleted"] += len(batch) - len(failed)
+            stats["failed"] += len(failed)
+        batch.clear()
+
+    for key, size, modified in storage.list_objects(MEDIA_PREFIX):
+        stats["scanned"] += 1
+        if key_stem(key) in live or modified > cutoff:
+            continue
+        if max_deletes and stats["orphaned"] >= max_deletes:
+            break
+        stats["orphaned"] += 1
+        stats["orphaned_bytes"] += size
+        if dry_run:
+            print(f"Would delete {key} ({size} bytes)")
+        batch.append(key)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    # multipart uploads that were never completed keep their parts (and their storage cost) until
+    # aborted. Past the upload URL's lifetime no client can finish one, and upload-complete refuses it
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=max(min_age, Config.UPLOAD_URL_EXPIRES))
+    stats["aborted_uploads"] = 0
+    for key, upload_id, initiated in storage.list_multipart_uploads(MEDIA_PREFIX):
+        if initiated > stale_before:
+            continue
+        stats["aborted_uploads"] += 1
+        if dry_run:
+            print(f"Would abort upload {upload_id} of {key}")
+        else:
+            storage.abort_multipart(key, upload_id)
+
+    print(f"Storage GC{' (dry run)' if dry_run else ''}: {media_rows} unused media records, scanned {stats['scanned']}, "
+          f"{stats['orphaned']} orphaned ({stats['orphaned_bytes']} bytes), {stats['deleted']} deleted, {stats['failed']} failed, "
+          f"{stats['aborted_uploads']} incomplete uploads aborted")
+    return stats
+
+def schedule_storage_gc():
+    db = SessionLocal()
+    try:
+        # every worker offers a run; one per STORAGE_GC_INTERVAL across the cluster is enough
+        since = datetime.utcnow() - timedelta(seconds=Config.STORAGE_GC_INTERVAL)
+        if db.query(Job.id).filter(Job.type == STORAGE_GC_JOB, Job.created_at >= since).first():
+            return None
+        job = JobQueue.enqueue(db, STORAGE_GC_JOB, {"dry_run": Config.STORAGE_GC_DRY_RUN},
+                               max_attempts=1, dedupe_key=STORAGE_GC_JOB)
+        db.commit()
+        return job.id
+    finally:
+        db.close()
+
+@job_handler(STORAGE_GC_JOB)
+def collect_garbage_job(db, payload: dict) -> dict:
+    return collect_garbage(db, dry_run=payload.get("dry_run", False))
@@ -0,0 +1,130 @@
+import sys
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from app.core.config import Config
+from app.models.models import LectureTimeline
+from app.services.retrieval import LectureCache
+
+def pack(values) -> bytes:
+    packed = array("I", values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+def unpack(data: bytes) -> array:
+    values = array("I")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+class Timeline:
+    def __init__(self, starts: array, ends: array, offsets: array, words: str):
+        self.starts = starts
+        self.ends = ends
+        # one extra trailing offset so word i always spans offsets[i]:offsets[i + 1] - 1
+        self.offsets = offsets
+        self.words = words
+        lowered = words.lower()
+        self.lowered = lowered if len(lowered) == len(words) else words
+
+    @classmethod
+    def from_row(cls, row: LectureTimeline):
+        return cls(unpack(row.starts), unpack(row.ends), unpack(row.offsets), row.words)
+
+    def text(self, i: int, j: int) -> str:
+        if i >= j:
+            return ""
+        return self.words[self.offsets[i]:self.offsets[j] - 1]
+
+    def word_range(self, start_ms: int, end_ms: int) -> tuple:
+        # include the word already being spoken at start_ms, stop before the first word starting at end_ms
+        i = max(bisect_right(self.starts, start_ms) - 1, 0)
+        if i < len(self.ends) and self.ends[i] <= start_ms:
+            i += 1
+        j = bisect_left(self.starts, end_ms)
+        return i, max(i, j)
+
+    def between(self, start_ms: int, end_ms: int, max_words: int) -> dict:
+        i, j = self.word_range(start_ms, end_ms)
+        truncated = j - i > max_words
+        j = min(j, i + max_words)
+        return {
+            "start_ms": self.starts[i] if i < j else start_ms,
+            "end_ms": self.ends[j - 1] if i < j else start_ms,
+            "text": self.text(i, j),
+            "words": [[self.starts[k], self.ends[k], self.text(k, k + 1)] for k in range(i, j)],
+            "truncated": truncated,
+        }
+
+    def find(self, phrase: str, limit: int, context_words: int = 8) -> list:
+        needle = " ".join(phrase.lower().split())
+        matches = []
+        if not needle:
+            return matches
+        position = self.lowered.find(needle)
+        while position != -1 and len(matches) < limit:
+            first = bisect_right(self.offsets, position) - 1
+            last = bisect_right(self.offsets, position + len(needle) - 1) - 1
+            matches.append({
+                "start_ms": self.starts[first],
+                "end_ms": self.ends[last],
+                "context": self.text(max(first - context_words, 0), min(last + 1 + context_words, len(self.starts))),
+            })
+            position = self.lowered.find(needle, self.offsets[last + 1])
+        return matches
+
+timeline_cache = LectureCache(Config.TIMELINE_CACHE_SIZE)
+
+def build_timeline(lecture_id: str, result: dict):
+    timed_words = sorted(
+        (int(start), int(end), word.strip())
+        for segment in result.get('segments') or []
+        for start, end, word in segment.get('words') or []
+        if word.strip()
+    )
+    if not timed_words:
+        return None
+
+    offsets = []
+    length = 0
+    for _, _, word in timed_words:
+        offsets.append(length)
+        length += len(word) + 1
+    offsets.append(length)
+
+    return LectureTimeline(
+        lecture_id=lecture_id,
+        word_count=len(timed_words),
+        starts=pack(start for start, _, _ in timed_words),
+        ends=pack(end for _, end, _ in timed_words),
+        offsets=pack(offsets),
+        words=" ".join(word for _, _, word in timed_words),
+        revision=str(uuid.uuid4()),
+    )
+
+def save_timeline(db, lecture_id: str, result: dict):
+    timeline = build_timeline(lecture_id, result)
+    if timeline is not None:
+        db.merge(timeline)
+        timeline_cache.invalidate(lecture_id)
+    return timeline
+
+def get_timeline(db, lecture_id: str):
+    # the cache is per process and worker.py rewrites timelines in another one, so an entry is only used
+    # while its revision is still the stored one; checking costs a primary-key read of one column
+    current = db.query(LectureTimeline.revision).filter_by(lecture_id=lecture_id).first()
+    if current is None:
+        timeline_cache.invalidate(lecture_id)
+        return None
+    cached = timeline_cache.get(lecture_id)
+    if cached is not None and cached[0] == current.revision:
+        return cached[1]
+
+    row = db.query(LectureTimeline).filter_by(lecture_id=lecture_id).first()
+    if row is None:
+        return None
+    timeline = Timeline.from_row(row)
+    timeline_cache.put(lecture_id, (row.revision, timeline))
+    return timeline
@@ -0,0 +1,161 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from app.core.config import Config
+from app.models.models import Lecture as LectureModel, TranscriptionSegment
+from app.services.ai_client import AIService
+from app.services.audio_segments import split_wav, stitch_results
+from app.services.jobs import job_handler
+from app.services.media import record_media_result, fail_media
+from app.services.retrieval import index_lecture
+from app.services.storage import get_storage
+from app.services.timeline import save_timeline
+
+SEGMENT_TRANSCRIPTION_JOB = "segment_transcription"
+
+def apply_transcription(db, object_key: str, transcript: str, result: dict = None):
+    # the media row is updated first: its row lock orders this against a duplicate upload
+    # attaching a new lecture to the same object (see attach_media_lecture)
+    record_media_result(db, object_key, transcript, result)
+
+    # conditional update so a callback, a /status poll and the reconciler racing on the same
+    # result only apply it once; every lecture sharing the uploaded media is completed together
+    lecture_ids = [row.id for row in db.query(LectureModel.id).filter(
+        LectureModel.object_key == object_key,
+        LectureModel.status == "PROCESSING"
+    )]
+    if not lecture_ids:
+        return None
+    updated = db.query(LectureModel).filter(
+        LectureModel.id.in_(lecture_ids),
+        LectureModel.status == "PROCESSING"
+    ).update({"transcript": transcript, "status": "COMPLETED"}, synchronize_session=False)
+    if not updated:
+        return None
+
+    lectures = db.query(LectureModel).filter(LectureModel.id.in_(lecture_ids)).all()
+    for lecture in lectures:
+        index_lecture(db, lecture)
+        if result:
+            save_timeline(db, lecture.id, result)
+    return lectures[0]
+
+def complete_transcription(db, object_key: str, transcript: str, result: dict = None):
+    lecture = apply_transcription(db, object_key, transcript, result)
+    db.commit()
+    return lecture
+
+def fail_transcriptions(db, object_keys: list) -> int:
+    if not object_keys:
+        return 0
+    fail_media(db, object_keys)
+    updated = db.query(LectureModel).filter(
+        LectureModel.object_key.in_(object_keys),
+        LectureModel.status == "PROCESSING"
+    ).update({"status": "FAILED"}, synchronize_session=False)
+    db.commit()
+    return updated
+
+def fail_transcription(db, object_key: str) -> bool:
+    return bool(fail_transcriptions(db, [object_key]))
+
+def handle_result(db, object_key: str, result: dict):
+    # single entry point for callbacks: the key is either a whole lecture or one of its segments
+    segment = db.query(TranscriptionSegment).filter_by(object_key=object_key).first()
+    if segment is not None:
+        return complete_segment(db, segment, result)
+    if result.get('result', 'COMPLETED') == 'COMPLETED':
+        return complete_transcription(db, object_key, result.get('text', ''), result)
+    fail_transcription(db, object_key)
+    return None
+
+def segment_key(object_key: str, position: int) -> str:
+    return f"{object_key.rsplit('.', 1)[0]}-part{position:03d}.wav"
+
+def start_segmented_transcription(db, lecture: LectureModel, file_obj, language: str) -> int:
+    storage = get_storage()
+    # bounds how many segments are held in memory while waiting for an upload slot
+    slots = threading.BoundedSemaphore(Config.TRANSCRIPTION_SEGMENT_WORKERS * 2)
+
+    def upload(key: str, data: bytes):
+        try:
+            storage.upload_bytes(data, key, "audio/wav")
+        finally:
+            slots.release()
+
+    planned = []
+    futures = []
+    with ThreadPoolExecutor(max_workers=Config.TRANSCRIPTION_SEGMENT_WORKERS) as pool:
+        segments = split_wav(file_obj, Config.TRANSCRIPTION_SEGMENT_SECONDS, Config.TRANSCRIPTION_SEGMENT_OVERLAP)
+        for position, (start_ms, end_ms, data) in enumerate(segments):
+            key = segment_key(lecture.object_key, position)
+            planned.append(TranscriptionSegment(lecture_id=lecture.id, position=position, object_key=key,
+                                                start_ms=start_ms, end_ms=end_ms))
+            slots.acquire()
+            futures.append(pool.submit(upload, key, data))
+        for future in futures:
+            future.result()
+        if not planned:
+            return 0
+
+        # every segment row is committed together before the first trigger: finish_segmented stitches
+        # once all rows it can see are COMPLETED, so an early callback must never see only some of them
+        keys = [segment.object_key for segment in planned]
+        db.add_all(planned)
+        db.commit()
+        for future in [pool.submit(AIService.transcribe_audio, key, language) for key in keys]:
+            future.result()
+    return len(keys)
+
+@job_handler(SEGMENT_TRANSCRIPTION_JOB)
+def segment_transcription_job(db, payload: dict) -> dict:
+    lecture = db.query(LectureModel).filter_by(id=payload["lecture_id"]).first()
+    if lecture is None or lecture.status != "PROCESSING":
+        return {"segments": 0}
+    if db.query(TranscriptionSegment.id).filter_by(lecture_id=lecture.id).first():
+        # already split by a worker whose lock expired; splitting again would submit every segment twice
+        return {"segments": db.query(TranscriptionSegment).filter_by(lecture_id=lecture.id).count()}
+
+    object_key, language = lecture.object_key, payload["language"]
+    try:
+        with closing(get_storage().open_object(object_key)) as body:
+            count = start_segmented_transcription(db, lecture, body, language)
+        if not count:
+            AIService.transcribe_audio(object_key, language)
+    except Exception:
+        # some segments may already be with Clova, so the job isn't retried; the lecture fails instead
+        db.rollback()
+        fail_transcription(db, object_key)
+        raise
+    return {"segments": count}
+
+def complete_segment(db, segment: TranscriptionSegment, result: dict):
+    completed = result.get('result', 'COMPLETED') == 'COMPLETED'
+    updated = db.query(TranscriptionSegment).filter(
+        TranscriptionSegment.id == segment.id,
+        TranscriptionSegment.status == "PROCESSING"
+    ).update({
+        "status": "COMPLETED" if completed else "FAILED",
+        "result": json.dumps(result) if completed else None,
+    }, synchronize_session=False)
+    db.commit()
+    if not updated:
+        return None
+
+    lecture = db.query(LectureModel).filter_by(id=segment.lecture_id).first()
+    if not completed:
+        fail_transcription(db, lecture.object_key)
+        return None
+    return finish_segmented(db, lecture)
+
+def finish_segmented(db, lecture: LectureModel):
+    # runs after the segment's own commit, so whichever of two racing last segments commits
+    # second always sees the full set; apply_transcription keeps a double stitch harmless
+    segments = db.query(TranscriptionSegment).filter_by(lecture_id=lecture.id)\
+        .order_by(TranscriptionSegment.position.asc()).all()
+    if any(segment.status != "COMPLETED" for segment in segments):
+        return None
+
+    stitched = stitch_results([(s.start_ms, s.end_ms, json.loads(s.result)) for s in segments])
+    return complete_transcription(db, lecture.object_key, stitched['text'], stitched)
@@ -0,0 +1,338 @@
+"""Endpoint load benchmark for the tutor-bot backend.
+
+Start the stand-ins and the app first (see "Benchmarking" in READme.md), then:
+
+    python -m bench.loadtest --base-url http://127.0.0.1:8000 --concurrency 16 --duration 60
+
+Every blueprint (auth, classes, lectures, chat, action_items) is exercised with a weighted mix
+of requests. Results are reported per endpoint as throughput and p50/p95/p99 latency; pass
+--json to keep a run and --baseline to fail when a later run regresses against it.
+"""
+import argparse
+import io
+import json
+import math
+import random
+import sys
+import threading
+import time
+import uuid
+import wave
+from collections import defaultdict
+import requests
+
+QUESTIONS = [
+    "What is the main idea of this lecture?",
+    "Why does the cell need ATP?",
+    "Can you explain the second example again?",
+    "이번 강의에서 가장 중요한 개념은 무엇인가요?",
+]
+
+LECTURE_TEXT = "\n".join([
+    "Today we talk about cellular respiration and how the cell stores energy in ATP.",
+    "Glycolysis happens in the cytoplasm and splits glucose into two pyruvate molecules.",
+    "The Krebs cycle runs in the mitochondria and produces NADH and FADH2.",
+    "오늘 강의에서는 세포 호흡과 에너지 저장에 대해 배웁니다.",
+    "Homework: read chapter 3 and solve the practice problems before the quiz on Friday.",
+] * 20)
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, ok: bool):
+        with self.lock:
+            self.samples[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[index]
+
+class VirtualUser:
+    def __init__(self, base_url: str, recorder: Recorder, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.email = None
+        self.password = "bench-password"
+        self.class_id = None
+        self.lecture_id = None
+        self.audio_lecture_id = None
+        self.action_item_id = None
+        self.general_session = None
+        self.socratic_session = None
+
+    def call(self, name: str, method: str, path: str, expect=(200, 201, 202), **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, **kwargs)
+            ok = response.status_code in expect
+        except requests.exceptions.RequestException:
+            response, ok = None, False
+        self.recorder.record(name, time.perf_counter() - started, ok)
+        return response if ok else None
+
+    def stream(self, name: str, path: str, payload: dict):
+        # time to first delta is what students feel; the full reply is recorded separately
+        started = time.perf_counter()
+        first = None
+        ok = False
+        session_id = None
+        try:
+            with self.http.post(self.base_url + path, json={**payload, "stream": True},
+                                stream=True, timeout=self.timeout) as response:
+                event = None
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith("event:"):
+                        event = line[6:].strip()
+                    elif line.startswith("data:"):
+                        data = json.loads(line[5:].strip())
+                        if event == "session":
+                            session_id = data.get("session_id")
+                        elif event == "delta" and first is None:
+                            first = time.perf_counter() - started
+                        elif event == "done":
+                            ok = response.status_code == 200 and bool(data.get("response"))
+                        elif event == "error":
+                            ok = False
+                            break
+        except requests.exceptions.RequestException:
+            ok = False
+        self.recorder.record(name, time.perf_counter() - started, ok)
+        if first is not None:
+            self.recorder.record(f"{name} [first delta]", first, True)
+        return session_id if ok else None
+
+    def setup(self, audio: bytes):
+        self.email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+        username = self.email.split("@")[0]
+        self.call("POST /api/auth/register", "POST", "/api/auth/register",
+                  json={"username": username, "email": self.email, "password": self.password})
+        self.login()
+
+        created = self.call("POST /api/classes", "POST", "/api/classes", json={"title": "Benchmark Biology"})
+        if created is None:
+            raise RuntimeError("Could not create a class; is the backend reachable?")
+        self.class_id = created.json()["id"]
+
+        lecture = self.call("POST /api/lectures/upload-text", "POST", "/api/lectures/upload-text",
+                            data={"class_id": self.class_id, "title": "Cellular respiration"},
+                            files={"file": ("lecture.txt", LECTURE_TEXT.encode("utf-8"), "text/plain")})
+        self.lecture_id = lecture.json()["id"]
+
+        uploaded = self.call("POST /api/lectures/upload-audio", "POST", "/api/lectures/upload-audio",
+                             data={"class_id": self.class_id, "title": "Recorded lecture", "language": "en-US"},
+                             files={"media": ("lecture.wav", audio, "audio/wav")})
+        if uploaded is not None:
+            self.audio_lecture_id = uploaded.json()["id"]
+
+        self.analyze()
+        items = self.call("GET /api/action_items", "GET", "/api/action_items")
+        if items is not None and items.json():
+            self.action_item_id = items.json()[0]["id"]
+
+    def login(self):
+        response = self.call("POST /api/auth/login", "POST", "/api/auth/login",
+                             json={"email": self.email, "password": self.password})
+        if response is None:
+            raise RuntimeError(f"Login failed for {self.email}")
+        self.http.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    def analyze(self):
+        response = self.call("POST /api/lectures/<id>/analyze", "POST", f"/api/lectures/{self.lecture_id}/analyze")
+        if response is None or response.status_code != 202:
+            return
+        job_id = response.json()["job_id"]
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            job = self.call("GET /api/jobs/<id>", "GET", f"/api/jobs/{job_id}")
+            if job is None or job.json()["status"] in ("SUCCEEDED", "DEAD"):
+                return
+            time.sleep(0.5)
+
+    def get_classes(self):
+        self.call("GET /api/classes", "GET", "/api/classes")
+
+    def get_lecture(self):
+        self.call("GET /api/lectures/<id>", "GET", f"/api/lectures/{self.lecture_id}")
+
+    def search_lectures(self):
+        self.call("GET /api/lectures/search", "GET", "/api/lectures/search", params={"q": "glycolysis"})
+
+    def lecture_status(self):
+        if self.audio_lecture_id:
+            self.call("GET /api/lectures/<id>/status", "GET", f"/api/lectures/{self.audio_lecture_id}/status")
+
+    def get_action_items(self):
+        self.call("GET /api/action_items", "GET", "/api/action_items")
+
+    def get_notebook(self):
+        if self.action_item_id:
+            self.call("GET /api/action_items/<id>/notebook", "GET", f"/api/action_items/{self.action_item_id}/notebook")
+
+    def chat_general(self):
+        payload = {"message": random.choice(QUESTIONS), "session_id": self.general_session}
+        response = self.call("POST /api/chat/general", "POST", "/api/chat/general", json=payload)
+        if response is not None:
+            self.general_session = response.json()["session_id"]
+
+    def chat_general_stream(self):
+        payload = {"message": random.choice(QUESTIONS), "session_id": self.general_session}
+        self.general_session = self.stream("POST /api/chat/general (stream)", "/api/chat/general", payload) \
+            or self.general_session
+
+    def chat_socratic_stream(self):
+        payload = {"message": random.choice(QUESTIONS), "session_id": self.socratic_session,
+                   "lecture_id": self.lecture_id}
+        self.socratic_session = self.stream("POST /api/chat/socratic (stream)", "/api/chat/socratic", payload) \
+            or self.socratic_session
+
+    def list_sessions(self):
+        self.call("GET /api/chat/sessions", "GET", "/api/chat/sessions")
+
+# (blueprint, weight, action) — weights roughly follow a class-day mix: mostly chat and reads
+SCENARIOS = [
+    ("auth", 1, VirtualUser.login),
+    ("classes", 6, VirtualUser.get_classes),
+    ("lectures", 5, VirtualUser.get_lecture),
+    ("lectures", 3, VirtualUser.search_lectures),
+    ("lectures", 2, VirtualUser.lecture_status),
+    ("lectures", 1, VirtualUser.analyze),
+    ("action_items", 4, VirtualUser.get_action_items),
+    ("action_items", 1, VirtualUser.get_notebook),
+    ("chat", 2, VirtualUser.chat_general),
+    ("chat", 4, VirtualUser.chat_general_stream),
+    ("chat", 4, VirtualUser.chat_socratic_stream),
+    ("chat", 2, VirtualUser.list_sessions),
+]
+
+def silent_wav(seconds: float, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(rate)
+        handle.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buffer.getvalue()
+
+def run(options) -> dict:
+    blueprints = set(options.blueprints.split(","))
+    scenarios = [s for s in SCENARIOS if s[0] in blueprints]
+    if not scenarios:
+        raise SystemExit(f"No scenarios match --blueprints {options.blueprints}")
+
+    setup_recorder = Recorder()
+    audio = silent_wav(options.audio_seconds)
+    users = []
+    for _ in range(options.users):
+        user = VirtualUser(options.base_url, setup_recorder, options.timeout)
+        user.setup(audio)
+        users.append(user)
+
+    recorder = Recorder()
+    for user in users:
+        user.recorder = recorder
+    weights = [weight for _, weight, _ in scenarios]
+    stop_at = time.monotonic() + options.duration
+
+    def worker(index: int):
+        user = users[index % len(users)]
+        rng = random.Random(options.seed + index)
+        while time.monotonic() < stop_at:
+            _, _, action = rng.choices(scenarios, weights=weights)[0]
+            action(user)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(options.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    endpoints = {}
+    for name, samples in sorted(recorder.samples.items()):
+        endpoints[name] = {
+            "count": len(samples),
+            "errors": recorder.errors[name],
+            "rps": len(samples) / elapsed,
+            "p50_ms": percentile(samples, 50) * 1000,
+            "p95_ms": percentile(samples, 95) * 1000,
+            "p99_ms": percentile(samples, 99) * 1000,
+        }
+    total = sum(len(samples) for name, samples in recorder.samples.items() if not name.endswith("]"))
+    return {
+        "concurrency": options.concurrency,
+        "users": options.users,
+        "duration_s": elapsed,
+        "total_requests": total,
+        "total_rps": total / elapsed,
+        "endpoints": endpoints,
+    }
+
+def print_report(report: dict):
+    print(f"\n{report['total_requests']} requests in {report['duration_s']:.1f}s "
+          f"({report['total_rps']:.1f} req/s, concurrency {report['concurrency']}, {report['users']} users)\n")
+    width = max(len(name) for name in report["endpoints"]) if report["endpoints"] else 10
+    print(f"{'endpoint':<{width}}  {'count':>6}  {'err':>4}  {'req/s':>7}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}")
+    for name, stats in report["endpoints"].items():
+        print(f"{name:<{width}}  {stats['count']:>6}  {stats['errors']:>4}  {stats['rps']:>7.1f}  "
+              f"{stats['p50_ms']:>8.1f}  {stats['p95_ms']:>8.1f}  {stats['p99_ms']:>8.1f}")
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, before in baseline["endpoints"].items():
+        after = report["endpoints"].get(name)
+        if after is None or before["count"] < 20:
+            # too few samples for a stable p95
+            continue
+        if after["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f}ms -> {after['p95_ms']:.1f}ms")
+        if after["count"] and after["errors"] / after["count"] > before["errors"] / before["count"] + 0.01:
+            regressions.append(f"{name}: errors {before['errors']}/{before['count']} -> {after['errors']}/{after['count']}")
+    if report["total_rps"] < baseline["total_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {baseline['total_rps']:.1f} -> {report['total_rps']:.1f} req/s")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-benchmark the tutor-bot API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--users", type=int, default=4, help="accounts to spread the load over")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load after setup")
+    parser.add_argument("--blueprints", default="auth,classes,lectures,action_items,chat")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--audio-seconds", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="report from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95/throughput drift before failing")
+    options = parser.parse_args()
+
+    report = run(options)
+    print_report(report)
+    if options.json:
+        with open(options.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+    if options.baseline:
+        with open(options.baseline) as handle:
+            regressions = compare(report, json.load(handle), options.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""Local stand-ins for Clova Studio, Clova Speech and NCP Object Storage.
+
+Run from the backend directory:
+
+    python -m bench.standins --clova-port 8701 --s3-port 8702 --latency-ms 300 --tokens-per-sec 40
+
+then point the backend at them:
+
+    CLOVA_API_HOST=http://127.0.0.1:8701
+    CLOVA_SPEECH_URL=http://127.0.0.1:8701
+    CLOVA_SPEECH_SECRET=local
+    NCP_ENDPOINT=http://127.0.0.1:8702
+    NCP_ACCESS_KEY=local NCP_SECRET_KEY=local NCP_BUCKET_NAME=local-bucket
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+import requests
+
+LOREM = (
+    "Good question. Before I answer, what do you think happens to the energy stored in glucose "
+    "when the cell needs to do work? Try to connect it to the reaction we discussed in the lecture."
+).split(" ")
+
+ANALYSIS_RESULT = {
+    "summary": "Stand-in summary of the lecture transcript.",
+    "action_items": [
+        {"type": "assignment", "content": "Read chapter 3 before next class", "due_date": None},
+        {"type": "quiz", "content": "Review the practice problems", "due_date": None},
+    ],
+}
+
+class ObjectStore:
+    def __init__(self, root: str):
+        self.root = root
+        self.lock = threading.Lock()
+        self.uploads = {}
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, *key.split("/"))
+
+    def put(self, bucket: str, key: str, data: bytes) -> str:
+        path = self.path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as handle:
+            handle.write(data)
+        return hashlib.md5(data).hexdigest()
+
+    def get(self, bucket: str, key: str):
+        path = self.path(bucket, key)
+        if not os.path.isfile(path):
+            return None
+        with open(path, "rb") as handle:
+            return handle.read()
+
+    def delete(self, bucket: str, key: str):
+        path = self.path(bucket, key)
+        if os.path.isfile(path):
+            os.remove(path)
+
+    def list(self, bucket: str, prefix: str) -> list:
+        base = os.path.join(self.root, bucket)
+        keys = []
+        for directory, _, files in os.walk(base):
+            for name in files:
+                key = os.path.relpath(os.path.join(directory, name), base).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    stat = os.stat(os.path.join(directory, name))
+                    keys.append((key, stat.st_size, stat.st_mtime))
+        return sorted(keys)
+
+class S3Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store: ObjectStore = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def target(self):
+        parts = urlsplit(self.path)
+        bucket, _, key = parts.path.lstrip("/").partition("/")
+        query = {k: v[0] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+        return bucket, unquote(key), query
+
+    def body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def reply(self, status: int, body: bytes = b"", headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def xml(self, status: int, body: str):
+        self.reply(status, body.encode("utf-8"), {"Content-Type": "application/xml"})
+
+    def not_found(self, key: str):
+        self.xml(404, f"<Error><Code>NoSuchKey</Code><Message>Not found</Message><Key>{key}</Key></Error>")
+
+    def do_PUT(self):
+        bucket, key, query = self.target()
+        data = self.body()
+        if "uploadId" in query:
+            upload = self.store.uploads.get(query["uploadId"])
+            if upload is None:
+                return self.xml(404, "<Error><Code>NoSuchUpload</Code></Error>")
+            upload["parts"][int(query["partNumber"])] = data
+            return self.reply(200, headers={"ETag": f'"{hashlib.md5(data).hexdigest()}"'})
+        if not key:
+            return self.reply(200)
+        etag = self.store.put(bucket, key, data)
+        self.reply(200, headers={"ETag": f'"{etag}"'})
+
+    def do_POST(self):
+        bucket, key, query = self.target()
+        data = self.body()
+        if "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            self.store.uploads[upload_id] = {"bucket": bucket, "key": key, "parts": {}, "initiated": time.time()}
+            return self.xml(200, (
+                "<InitiateMultipartUploadResult>"
+                f"<Bucket>{bucket}</Bucket><Key>{key}</Key><UploadId>{upload_id}</UploadId>"
+                "</InitiateMultipartUploadResult>"
+            ))
+        if "uploadId" in query:
+            upload = self.store.uploads.pop(query["uploadId"], None)
+            if upload is None:
+                return self.xml(404, "<Error><Code>NoSuchUpload</Code></Error>")
+            numbers = sorted(upload["parts"])
+            etag = self.store.put(bucket, key, b"".join(upload["parts"][n] for n in numbers))
+            return self.xml(200, (
+                "<CompleteMultipartUploadResult>"
+                f"<Bucket>{bucket}</Bucket><Key>{key}</Key><ETag>\"{etag}-{len(numbers)}\"</ETag>"
+                "</CompleteMultipartUploadResult>"
+            ))
+        if "delete" in query:
+            root = ElementTree.fromstring(data)
+            deleted = []
+            for element in root.iter():
+                if element.tag.endswith("Key"):
+                    self.store.delete(bucket, element.text)
+                    deleted.append(f"<Deleted><Key>{element.text}</Key></Deleted>")
+            return self.xml(200, f"<DeleteResult>{''.join(deleted)}</DeleteResult>")
+        self.xml(400, "<Error><Code>NotImplemented</Code></Error>")
+
+    def do_GET(self):
+        bucket, key, query = self.target()
+        if not key and "uploads" in query:
+            return self.list_uploads(bucket, query)
+        if not key:
+            return self.list_objects(bucket, query)
+        data = self.store.get(bucket, key)
+        if data is None:
+            return self.not_found(key)
+        self.reply(200, data, {
+            "ETag": f'"{hashlib.md5(data).hexdigest()}"',
+            "Content-Type": "application/octet-stream",
+            "Last-Modified": formatdate(usegmt=True),
+        })
+
+    def do_HEAD(self):
+        bucket, key, _ = self.target()
+        data = self.store.get(bucket, key)
+        if data is None:
+            return self.reply(404)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", f'"{hashlib.md5(data).hexdigest()}"')
+        self.send_header("Last-Modified", formatdate(usegmt=True))
+        self.end_headers()
+
+    def do_DELETE(self):
+        bucket, key, query = self.target()
+        if "uploadId" in query:
+            self.store.uploads.pop(query["uploadId"], None)
+        else:
+            self.store.delete(bucket, key)
+        self.reply(204)
+
+    def list_objects(self, bucket: str, query: dict):
+        prefix = query.get("prefix", "")
+        max_keys = int(query.get("max-keys", 1000))
+        start_after = query.get("continuation-token") or query.get("start-after") or ""
+        keys = [entry for entry in self.store.list(bucket, prefix) if entry[0] > start_after]
+        page, rest = keys[:max_keys], keys[max_keys:]
+        contents = "".join(
+            f"<Contents><Key>{escape(key)}</Key><Size>{size}</Size>"
+            f"<LastModified>{time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(mtime))}</LastModified>"
+            f"<ETag>\"etag\"</ETag><StorageClass>STANDARD</StorageClass></Contents>"
+            for key, size, mtime in page
+        )
+        token = f"<NextContinuationToken>{escape(page[-1][0])}</NextContinuationToken>" if rest else ""
+        self.xml(200, (
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            f"<Name>{bucket}</Name><Prefix>{prefix}</Prefix><KeyCount>{len(page)}</KeyCount>"
+            f"<MaxKeys>{max_keys}</MaxKeys><IsTruncated>{'true' if rest else 'false'}</IsTruncated>"
+            f"{token}{contents}</ListBucketResult>"
+        ))
+
+    def list_uploads(self, bucket: str, query: dict):
+        # one unpaginated page: the stand-in only ever holds a handful of open uploads
+        prefix = query.get("prefix", "")
+        uploads = "".join(
+            f"<Upload><Key>{escape(upload['key'])}</Key><UploadId>{upload_id}</UploadId>"
+            f"<Initiated>{time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(upload['initiated']))}</Initiated></Upload>"
+            for upload_id, upload in list(self.store.uploads.items())
+            if upload["bucket"] == bucket and upload["key"].startswith(prefix)
+        )
+        self.xml(200, (
+            '<ListMultipartUploadsResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            f"<Bucket>{bucket}</Bucket><Prefix>{prefix}</Prefix><IsTruncated>false</IsTruncated>"
+            f"{uploads}</ListMultipartUploadsResult>"
+        ))
+
+class ClovaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    options = None
+    store: ObjectStore = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def json_body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def reply_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        body = self.json_body()
+        if random.random() < self.options.error_rate:
+            return self.reply_json(429 if random.random() < 0.5 else 503, {"status": {"code": "42901"}})
+        if "/chat-completions/" in path:
+            return self.chat_completion(body)
+        if path.endswith("/recognizer/object-storage"):
+            return self.recognize(body)
+        self.reply_json(404, {"message": "unknown path"})
+
+    def chat_completion(self, body: dict):
+        time.sleep(self.options.latency_ms / 1000.0)
+        if "text/event-stream" not in self.headers.get("Accept", ""):
+            content = json.dumps(ANALYSIS_RESULT)
+            return self.reply_json(200, {
+                "status": {"code": "20000", "message": "OK"},
+                "result": {"message": {"role": "assistant", "content": content}},
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        tokens = [word + " " for word in LOREM[:self.options.answer_tokens]]
+        for index, token in enumerate(tokens):
+            self.chunk(f"id: {index}\nevent: token\ndata: {json.dumps({'message': {'role': 'assistant', 'content': token}})}\n\n")
+            time.sleep(1.0 / self.options.tokens_per_sec)
+        full = {"message": {"role": "assistant", "content": "".join(tokens)}}
+        self.chunk(f"id: {len(tokens)}\nevent: result\ndata: {json.dumps(full)}\n\n")
+        self.chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def recognize(self, body: dict):
+        token = uuid.uuid4().hex
+        self.reply_json(200, {"result": "SUCCEEDED", "message": "Succeeded", "token": token})
+        threading.Timer(self.options.speech_delay, self.finish_recognition, args=(body, token)).start()
+
+    def finish_recognition(self, body: dict, token: str):
+        words = "this is a stand in transcript for the uploaded lecture recording".split(" ")
+        segments = []
+        for index in range(self.options.speech_segments):
+            start = index * 4000
+            segment_words = [[start + i * 300, start + i * 300 + 250, word] for i, word in enumerate(words)]
+            segments.append({"start": start, "end": start + 4000, "text": " ".join(words), "words": segment_words})
+        result = {
+            "token": token,
+            "result": "COMPLETED",
+            "dataKey": body.get("dataKey"),
+            "text": " ".join(segment["text"] for segment in segments),
+            "segments": segments,
+        }
+        self.store.put(self.options.bucket, f"{body.get('dataKey')}.json", json.dumps(result).encode("utf-8"))
+        if body.get("callback"):
+            try:
+                requests.post(body["callback"], json=result, timeout=10)
+            except requests.exceptions.RequestException as e:
+                print(f"Callback to {body['callback']} failed: {e}")
+
+def serve(handler, port: int):
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Clova and object-storage stand-ins")
+    parser.add_argument("--clova-port", type=int, default=8701)
+    parser.add_argument("--s3-port", type=int, default=8702)
+    parser.add_argument("--data-dir", default=os.path.join("bench", ".data"))
+    parser.add_argument("--bucket", default=os.getenv("NCP_BUCKET_NAME", "local-bucket"))
+    parser.add_argument("--latency-ms", type=float, default=300, help="delay before the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=40)
+    parser.add_argument("--answer-tokens", type=int, default=len(LOREM))
+    parser.add_argument("--speech-delay", type=float, default=2.0, help="seconds until a transcription result appears")
+    parser.add_argument("--speech-segments", type=int, default=5)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of Clova calls answered with 429/503")
+    parser.add_argument("--reset", action="store_true", help="wipe the object store first")
+    options = parser.parse_args()
+
+    if options.reset and os.path.isdir(options.data_dir):
+        shutil.rmtree(options.data_dir)
+    store = ObjectStore(options.data_dir)
+    S3Handler.store = store
+    ClovaHandler.store = store
+    ClovaHandler.options = options
+
+    serve(ClovaHandler, options.clova_port)
+    serve(S3Handler, options.s3_port)
+    print(f"Clova stand-in on http://127.0.0.1:{options.clova_port}")
+    print(f"Object storage stand-in on http://127.0.0.1:{options.s3_port} (bucket '{options.bucket}', data in {options.data_dir})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import argparse
+import sys
+from app.core.database import engine
+from app.migrations import MigrationError, downgrade, rollback, status, upgrade
+from app.migrations.explain import check_hot_queries
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply or roll back database schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    up = commands.add_parser("upgrade", help="apply pending migrations")
+    up.add_argument("--to", help="stop after this version")
+    down = commands.add_parser("rollback", help="revert applied migrations, newest first")
+    down.add_argument("--steps", type=int, default=1, help="how many migrations to revert")
+    down.add_argument("--to", help="revert everything newer than this version instead")
+    commands.add_parser("status", help="list migrations and whether they are applied")
+    commands.add_parser("explain", help="check that the hot queries are served by an index")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "upgrade":
+            done = upgrade(args.to)
+            print(f"Applied {len(done)} migration(s)" if done else "Schema is up to date")
+        elif args.command == "rollback":
+            done = downgrade(args.to) if args.to else rollback(args.steps)
+            print(f"Reverted {len(done)} migration(s)")
+        elif args.command == "status":
+            for version, name, applied in status():
+                print(f"{version} {name:<40} {'applied' if applied else 'pending'}")
+        elif args.command == "explain":
+            with engine.connect() as conn:
+                results = check_hot_queries(conn)
+            for label, expected, ok, plan in results:
+                print(f"{'ok  ' if ok else 'FAIL'} {label:<28} {expected}\n     {plan}")
+            if not all(ok for _, _, ok, _ in results):
+                sys.exit(1)
+    except MigrationError as e:
+        print(f"Migration error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
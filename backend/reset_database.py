@@ -3,8 +3,7 @@ Database Reset Script
 This script drops and recreates the entire database with the correct schema.
 WARNING: This will delete ALL data in the database!
 """
-from app.database import engine
-from app.models import Base
+from app.migrations import upgrade
 from sqlalchemy import text, create_engine
 import os
 from dotenv import load_dotenv
@@ -56,8 +55,8 @@ def reset_database():
         base_engine.dispose()
         
         print("\n🔨 Creating all tables with new schema...")
-        Base.metadata.create_all(bind=engine)
-        print("   ✓ All tables created successfully!")
+        upgrade()
+        print("   ✓ All migrations applied successfully!")
         
         print("\n✅ Database reset complete!")
         print("   All tables now use VARCHAR(36) for IDs (UUID compatible)")
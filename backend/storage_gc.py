@@ -0,0 +1,22 @@
+import argparse
+from app import create_app
+from app.core.database import SessionLocal
+from app.services.storage_gc import collect_garbage
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete media and transcription results no lecture refers to")
+    parser.add_argument("--dry-run", action="store_true", help="only list what would be deleted")
+    parser.add_argument("--min-age", type=float, help="seconds an object must be old before it is collected")
+    parser.add_argument("--max-deletes", type=int, help="stop after this many orphans (0 for no limit)")
+    parser.add_argument("--pause", type=float, help="seconds to wait between delete batches")
+    args = parser.parse_args()
+
+    create_app()
+    db = SessionLocal()
+    try:
+        collect_garbage(db, dry_run=args.dry_run, min_age=args.min_age, max_deletes=args.max_deletes, pause=args.pause)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,19 @@ import sys
 import os
 import requests
 import json
+from dotenv import load_dotenv
+load_dotenv()
 
-# 1. SETUP YOUR CREDENTIALS HERE MANUALLY FOR TESTING
-# (Copy these exactly from your .env file to rule out loading errors)
-INVOKE_URL = "https://clovaspeech-gw.ncloud.com/external/v1/13477/a7cc4dff39f5b0be30aa1633d7018d166cb92dbe77299286a6163e0415dcf9fa"  # e.g., https://clovaspeech-gw.ncloud.com/...
-SECRET_KEY = "ff0034108c9b414d9c53ebb6303ca80d" 
-BUCKET_FILE_KEY = "audio-storage/Download.mp4" # Change this to exactly match your file (e.g. 'speech-input/Download.mp4')
+# Reads the same variables as the backend, so it can also be pointed at bench/standins.py
+INVOKE_URL = os.getenv("CLOVA_SPEECH_URL", "")  # e.g., https://clovaspeech-gw.ncloud.com/...
+SECRET_KEY = os.getenv("CLOVA_SPEECH_SECRET", "")
+BUCKET_FILE_KEY = sys.argv[1] if len(sys.argv) > 1 else "audio-storage/Download.mp4" # e.g. 'speech-input/Download.mp4'
 
 def debug_request():
+    if not INVOKE_URL or not SECRET_KEY:
+        print("Set CLOVA_SPEECH_URL and CLOVA_SPEECH_SECRET (e.g. in your .env file) first.")
+        return
+
     print(f"--- Debugging Clova Speech ---")
     print(f"Target File: {BUCKET_FILE_KEY}")
     
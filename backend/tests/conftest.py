@@ -0,0 +1,24 @@
+import os
+import tempfile
+import pytest
+
+# the engine is built when app.core.database is first imported, so the database is chosen before any test
+# module imports the app
+DATABASE_DIR = tempfile.mkdtemp(prefix="tutor-bot-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DATABASE_DIR, 'test.db')}"
+os.environ.setdefault("JWT_SECRET_KEY", "test")
+
+@pytest.fixture(scope="session")
+def migrated():
+    from app.migrations import upgrade
+    upgrade()
+
+@pytest.fixture
+def db(migrated):
+    from app.core.database import SessionLocal
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
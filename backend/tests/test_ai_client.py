@@ -0,0 +1,35 @@
+from app.services.ai_client import AIService, DeltaAssembler
+
+def test_delta_assembler_forwards_only_the_unseen_tail():
+    assembler = DeltaAssembler()
+    assert assembler.add_token("Hello") == "Hello"
+    assert assembler.add_token(", wor") == ", wor"
+    assert assembler.add_result("Hello, world!") == "ld!"
+    assert assembler.text() == "Hello, world!"
+
+def test_delta_assembler_drops_a_result_that_disagrees_with_the_tokens():
+    assembler = DeltaAssembler()
+    assembler.add_token("Hi there")
+    assert assembler.add_result("Something else") == ""
+    assert assembler.text() == "Something else"
+
+def test_split_transcript_keeps_sentences_whole():
+    transcript = "One two three. Four five six! Seven eight nine?\nTen."
+    chunks = AIService.split_transcript(transcript, 30)
+    assert chunks == ["One two three. Four five six!", "Seven eight nine? Ten."]
+    assert all(len(chunk) <= 30 for chunk in chunks)
+
+def test_split_transcript_cuts_run_on_sentences_on_whitespace():
+    chunks = AIService.split_transcript("alpha beta gamma delta epsilon", 12)
+    assert chunks == ["alpha beta", "gamma delta", "epsilon"]
+    assert AIService.split_transcript("abcdefghij", 4) == ["abcd", "efgh", "ij"]
+    assert AIService.split_transcript("  \n ", 10) == []
+
+def test_merge_analyses_joins_summaries_and_dedupes_action_items():
+    merged = AIService.merge_analyses([
+        {"summary": "First part.", "action_items": [{"type": "Quiz", "content": "Review  Chapter 1"}]},
+        {"summary": "  ", "action_items": [{"type": "Quiz", "content": "review chapter 1"}, {"content": ""}]},
+        {"summary": "Second part.", "action_items": [{"type": "Task", "content": "Read chapter 2"}]},
+    ])
+    assert merged["summary"] == "First part.\n\nSecond part."
+    assert [item["content"] for item in merged["action_items"]] == ["Review  Chapter 1", "Read chapter 2"]
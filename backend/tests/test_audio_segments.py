@@ -0,0 +1,26 @@
+import pytest
+from app.services.audio_segments import plan_segments, stitch_results
+
+def test_plan_segments_overlaps_and_covers_the_recording():
+    assert plan_segments(25, 1, 10, 2) == [(0, 10), (8, 10), (16, 9)]
+    assert plan_segments(5, 1, 10, 2) == [(0, 5)]
+    assert plan_segments(10, 1, 10, 2) == [(0, 10)]
+
+def test_plan_segments_rejects_an_overlap_as_long_as_the_segment():
+    with pytest.raises(ValueError):
+        plan_segments(100, 1, 10, 10)
+
+def test_stitch_results_keeps_overlap_words_once():
+    parts = [
+        (0, 10000, {"segments": [{"words": [[1000, 2000, "one"], [8500, 9000, "two"], [9500, 9900, "three"]]}]}),
+        # starts at 8s, so these words land at 8.5s, 9.5s and 12s on the recording's clock
+        (8000, 18000, {"segments": [{"words": [[500, 1000, "two"], [1500, 1900, "three"], [4000, 4500, "four"]]}]}),
+    ]
+    stitched = stitch_results(parts)
+    assert stitched["text"] == "one two three four"
+    assert [word for segment in stitched["segments"] for _, _, word in segment["words"]] == ["one", "two", "three", "four"]
+    assert stitched["segments"][1]["words"][-1][:2] == [12000, 12500]
+
+def test_stitch_results_falls_back_to_text_without_word_times():
+    stitched = stitch_results([(0, 10000, {"text": " hello "}), (8000, 12000, {"text": "world"})])
+    assert stitched["text"] == "hello world"
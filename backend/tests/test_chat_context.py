@@ -0,0 +1,16 @@
+import uuid
+from app.models.models import GeneralChatSession, User
+from app.services.chat_context import context_version, save_turn
+
+def test_save_turn_moves_the_context_version(db):
+    user = User(id=str(uuid.uuid4()), username=uuid.uuid4().hex[:20], email=f"{uuid.uuid4().hex}@example.com")
+    session = GeneralChatSession(user_id=user.id)
+    db.add_all([user, session])
+    db.commit()
+    assert context_version(db, "GENERAL", session.id, user.id) == (0, 0, None)
+
+    save_turn(db, "GENERAL", session.id, "question", "answer")
+    db.commit()
+    assert context_version(db, "GENERAL", session.id, user.id) == (0, 2, None)
+    assert len(session.messages) == 2
+    assert context_version(db, "GENERAL", session.id, str(uuid.uuid4())) is None
@@ -0,0 +1,32 @@
+import uuid
+from app.services.jobs import JobQueue
+
+def kill(db, job):
+    job.attempts = job.max_attempts
+    JobQueue.fail(db, job, "boom")
+
+def test_requeued_dead_job_keeps_its_dedupe_key(db):
+    key = f"test:{uuid.uuid4()}"
+    job = JobQueue.enqueue(db, "test_job", {}, max_attempts=1, dedupe_key=key)
+    db.commit()
+    kill(db, job)
+    assert job.status == "DEAD" and job.dedupe_key == key
+
+    assert JobQueue.requeue(db, job)
+    db.refresh(job)
+    assert (job.status, job.attempts, job.error, job.dedupe_key) == ("PENDING", 0, None, key)
+    assert JobQueue.enqueue(db, "test_job", {}, dedupe_key=key).id == job.id
+    assert not JobQueue.requeue(db, job)
+
+def test_enqueue_revives_a_dead_job_instead_of_queueing_a_twin(db):
+    key = f"test:{uuid.uuid4()}"
+    dead = JobQueue.enqueue(db, "test_job", {"try": 1}, max_attempts=1, dedupe_key=key)
+    db.commit()
+    kill(db, dead)
+
+    again = JobQueue.enqueue(db, "test_job", {"try": 2}, max_attempts=3, dedupe_key=key)
+    db.commit()
+    assert again.id == dead.id
+    assert (again.status, again.payload, again.max_attempts) == ("PENDING", '{"try": 2}', 3)
+    # a retry arriving after the request has nothing left to revive
+    assert not JobQueue.requeue(db, again)
@@ -0,0 +1,35 @@
+from sqlalchemy import create_engine, text
+from app.core.database import engine
+from app.migrations import status
+from app.migrations.explain import check_hot_queries
+from app.migrations.versions import v0006_message_seq as message_seq
+
+def test_every_migration_applies(migrated):
+    assert all(applied for _, _, applied in status())
+
+def test_hot_queries_use_their_indexes(migrated):
+    with engine.connect() as conn:
+        results = check_hot_queries(conn)
+    failing = [(label, expected, plan) for label, expected, ok, plan in results if not ok]
+    assert results and failing == []
+
+def test_message_seq_backfill_numbers_each_session(monkeypatch):
+    # run against a throwaway database so the shared one stays fully migrated
+    monkeypatch.setattr(message_seq, "SESSION_BATCH_SIZE", 2)
+    scratch = create_engine("sqlite://")
+    with scratch.begin() as conn:
+        conn.execute(text("CREATE TABLE general_messages (id VARCHAR(36) PRIMARY KEY, session_id VARCHAR(36), "
+                          "role VARCHAR(50), created_at DATETIME, seq BIGINT NOT NULL DEFAULT 0)"))
+        rows = [{"id": f"{session}-{i}", "session_id": session, "role": "assistant" if i % 2 else "user",
+                 "created_at": f"2024-01-01 00:00:0{i // 2}"} for session in "abcde" for i in range(4)]
+        # a reply stored with a smaller id than its question, in the same second
+        rows.append({"id": "a-0x", "session_id": "a", "role": "assistant", "created_at": "2024-01-01 00:00:00"})
+        conn.execute(text("INSERT INTO general_messages (id, session_id, role, created_at) "
+                          "VALUES (:id, :session_id, :role, :created_at)"), rows)
+        message_seq.backfill(conn, "general_messages")
+        numbered = conn.execute(text("SELECT session_id, id, seq FROM general_messages ORDER BY session_id, seq")).all()
+    assert all(seq > 0 for _, _, seq in numbered)
+    for session in "bcde":
+        assert [row_id for session_id, row_id, _ in numbered if session_id == session] == \
+            [f"{session}-{i}" for i in range(4)]
+    assert [row_id for session_id, row_id, _ in numbered if session_id == "a"] == ["a-0", "a-0x", "a-1", "a-2", "a-3"]
@@ -0,0 +1,37 @@
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from app.core.pagination import decode_cursor, encode_cursor, keyset_page
+from app.models.models import Class, User
+
+def make_classes(db, count):
+    user = User(id=str(uuid.uuid4()), username=uuid.uuid4().hex[:20], email=f"{uuid.uuid4().hex}@example.com")
+    db.add(user)
+    created = datetime(2024, 1, 1)
+    # pairs share a created_at, so the id has to break the tie
+    db.add_all(Class(title=f"class {i}", user_id=user.id,
+                     created_at=created + timedelta(seconds=i // 2, microseconds=250000)) for i in range(count))
+    db.commit()
+    return user
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_keyset_page_visits_every_row_once_in_order(db, descending):
+    user = make_classes(db, 7)
+    query = db.query(Class).filter(Class.user_id == user.id)
+    seen, after = [], None
+    while True:
+        rows, after = keyset_page(query, Class, decode_cursor(encode_cursor(after)) if after else None, 3,
+                                  descending=descending)
+        seen.extend(rows)
+        if after is None:
+            break
+    expected = sorted(query.all(), key=lambda row: (row.created_at, row.id), reverse=descending)
+    assert [row.id for row in seen] == [row.id for row in expected]
+
+def test_keyset_page_rejects_a_malformed_cursor(db):
+    user = make_classes(db, 2)
+    query = db.query(Class).filter(Class.user_id == user.id)
+    with pytest.raises(ValueError):
+        keyset_page(query, Class, {"id": "x"}, 3)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
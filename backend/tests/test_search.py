@@ -0,0 +1,32 @@
+import uuid
+from app.models.models import Class, Lecture, User
+from app.services.search import index_search, rank, tokenize
+
+def test_tokenize_normalizes_and_adds_hangul_bigrams():
+    assert tokenize("Hello, WORLD 42") == ["hello", "world", "42"]
+    assert tokenize("강의에서") == ["강의에서", "강의", "의에", "에서"]
+    # decomposed Hangul (as macOS writes filenames) indexes the same as composed
+    assert tokenize("가") == tokenize("가")
+
+def test_rank_orders_by_bm25_and_weights_titles(db):
+    user = User(id=str(uuid.uuid4()), username=uuid.uuid4().hex[:20], email=f"{uuid.uuid4().hex}@example.com")
+    course = Class(title="course", user_id=user.id)
+    db.add_all([user, course])
+    db.flush()
+    lectures = {
+        "title": Lecture(title="Entropy", class_id=course.id, status="COMPLETED"),
+        "body": Lecture(title="Week two", class_id=course.id, status="COMPLETED"),
+        "other": Lecture(title="Week three", class_id=course.id, status="COMPLETED"),
+    }
+    db.add_all(lectures.values())
+    db.flush()
+    index_search(db, lectures["title"], ["thermodynamics and heat"])
+    index_search(db, lectures["body"], ["entropy is mentioned once in thermodynamics"])
+    index_search(db, lectures["other"], ["nothing relevant here"])
+    db.commit()
+
+    ranked = rank(db, user.id, {"entropy"})
+    assert [lecture_id for _, lecture_id in ranked] == [lectures["title"].id, lectures["body"].id]
+    assert ranked[0][0] > ranked[1][0] > 0
+    assert rank(db, user.id, {"absent"}) == []
+    assert rank(db, str(uuid.uuid4()), {"entropy"}) == []
@@ -0,0 +1,49 @@
+import uuid
+from app.services.timeline import Timeline, build_timeline, get_timeline, save_timeline
+
+def make_timeline():
+    result = {"segments": [
+        {"words": [[0, 400, "The"], [400, 900, "quick"], [900, 1400, "brown"]]},
+        {"words": [[1500, 1900, "Fox"], [2000, 2400, "jumps"], [2500, 2600, " "], [2600, 3000, "over"]]},
+    ]}
+    return Timeline.from_row(build_timeline("lecture", result))
+
+def test_between_includes_the_word_being_spoken():
+    timeline = make_timeline()
+    window = timeline.between(500, 2000, 10)
+    assert window["text"] == "quick brown Fox"
+    assert (window["start_ms"], window["end_ms"], window["truncated"]) == (400, 1900, False)
+    assert window["words"][0] == [400, 900, "quick"]
+
+def test_between_truncates_and_handles_empty_windows():
+    timeline = make_timeline()
+    window = timeline.between(0, 5000, 2)
+    assert window["text"] == "The quick" and window["truncated"]
+    empty = timeline.between(5000, 6000, 10)
+    assert empty["text"] == "" and empty["words"] == [] and empty["start_ms"] == 5000
+
+def test_find_is_case_insensitive_and_spans_words():
+    timeline = make_timeline()
+    matches = timeline.find("brown  FOX", 5, context_words=1)
+    assert matches == [{"start_ms": 900, "end_ms": 1900, "context": "quick brown Fox jumps"}]
+    assert timeline.find("the", 5)[0]["start_ms"] == 0
+    assert timeline.find("missing", 5) == []
+    assert timeline.find("  ", 5) == []
+
+def test_find_stops_at_the_limit():
+    result = {"segments": [{"words": [[i * 100, i * 100 + 50, "la"] for i in range(10)]}]}
+    timeline = Timeline.from_row(build_timeline("lecture", result))
+    assert [match["start_ms"] for match in timeline.find("la", 3)] == [0, 100, 200]
+
+def test_get_timeline_notices_a_rewrite_from_another_process(db):
+    lecture_id = str(uuid.uuid4())
+    save_timeline(db, lecture_id, {"segments": [{"words": [[0, 100, "first"]]}]})
+    db.commit()
+    assert get_timeline(db, lecture_id).words == "first"
+    assert get_timeline(db, lecture_id) is get_timeline(db, lecture_id)
+
+    # written the way worker.py does it, without touching this process's cache
+    db.merge(build_timeline(lecture_id, {"segments": [{"words": [[0, 100, "second"]]}]}))
+    db.commit()
+    assert get_timeline(db, lecture_id).words == "second"
+    assert get_timeline(db, str(uuid.uuid4())) is None
@@ -0,0 +1,38 @@
+import argparse
+import os
+import socket
+import time
+from app import create_app
+from app.core.config import Config
+from app.services.jobs import JobQueue, load_handlers
+from app.services.reconciler import schedule_reconcile
+from app.services.storage_gc import schedule_storage_gc
+
+def main():
+    parser = argparse.ArgumentParser(description="Background job worker")
+    parser.add_argument("--burst", action="store_true", help="exit once the queue is empty")
+    args = parser.parse_args()
+
+    create_app()
+    load_handlers()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"Worker {worker_id} started")
+
+    next_sweep = 0
+    next_gc = 0
+    while True:
+        if time.monotonic() >= next_sweep:
+            # every worker offers a sweep; the dedupe key keeps a single one queued at a time
+            schedule_reconcile()
+            next_sweep = time.monotonic() + Config.RECONCILE_INTERVAL
+        if Config.STORAGE_GC_INTERVAL and time.monotonic() >= next_gc:
+            schedule_storage_gc()
+            next_gc = time.monotonic() + Config.STORAGE_GC_INTERVAL
+        if JobQueue.run_next(worker_id):
+            continue
+        if args.burst:
+            break
+        time.sleep(Config.JOB_POLL_INTERVAL)
+
+if __name__ == "__main__":
+    main()